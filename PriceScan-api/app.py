@@ -29,7 +29,7 @@ from resources.promotions import PromotionsApi
 from resources.dashboard import DashboardApi
 
 # Import du scraping automatique
-from helpers.auto_scraper import AutoScraper
+from helpers.auto_scraper import get_auto_scraper
 
 sentry_sdk.init(
     dsn="https://e55540efdb25abee9b6509335cfb5bae@o295794.ingest.sentry.io/4506298354499584",
@@ -104,8 +104,8 @@ api.add_resource(DashboardApi, '/api/dashboard/<int:dashboard_id>', endpoint='da
 
 # Scraper Control API
 from resources.scraper_control import ScraperControlAPI, ScrapingStatsAPI
-api.add_resource(ScraperControlAPI, '/api/scraper', endpoint='scraper_control', methods=["GET","POST","PATCH"])
-api.add_resource(ScrapingStatsAPI, '/api/scraper-stats', endpoint='scraper_stats', methods=["GET"])
+api.add_resource(ScraperControlAPI, '/api/scraper', '/api/scraper/<string:route>', endpoint='scraper_control', methods=["GET","POST","PATCH"])
+api.add_resource(ScrapingStatsAPI, '/api/scraper-stats', '/api/scraper-stats/<string:route>', endpoint='scraper_stats', methods=["GET"])
 
 @app.route(BASE_URL + '/')
 def hello():
@@ -190,7 +190,7 @@ if __name__ == '__main__':
         try:
             print("INFO: Démarrage du scraping automatique en arrière-plan...")
             with app.app_context():
-                auto_scraper = AutoScraper()
+                auto_scraper = get_auto_scraper()
                 auto_scraper.start()
                 print("SUCCES: Scraping automatique démarré en arrière-plan !")
                 print("INFO: Configuration des intervalles:")
@@ -41,6 +41,7 @@ def run_daily_scraping():
         
         # Générer le rapport
         report = generate_daily_report(total_products)
+        report['database'] = scraper.writer.run_stats()
         
         # Sauvegarder le rapport
         save_report(report)
@@ -55,30 +56,8 @@ def run_daily_scraping():
 def generate_daily_report(total_products):
     """Génère un rapport quotidien"""
     try:
-        from helpers.scrapper.smart_scraper import SmartScraper
-        from config.database_config import SQL_DB_URL
-        import pymysql
-        
-        # Extraire les informations de connexion
-        parts = SQL_DB_URL.replace("mysql+pymysql://", "").split("@")
-        user_pass = parts[0].split(":")
-        host_port_db = parts[1].split("/")
-        
-        user = user_pass[0]
-        password = user_pass[1] if len(user_pass) > 1 else ""
-        host_port = host_port_db[0].split(":")
-        host = host_port[0]
-        port = int(host_port[1]) if len(host_port) > 1 else 3306
-        database = host_port_db[1]
-        
-        # Connexion à MySQL
-        connection = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=database
-        )
+        from sqlalchemy import text
+        from helpers.scrapper.script_db import get_script_engine
         
         report = {
             'date': datetime.now().isoformat(),
@@ -89,19 +68,16 @@ def generate_daily_report(total_products):
             'recent_products': []
         }
         
-        with connection.cursor() as cursor:
+        # Connexion empruntée au pool partagé des scripts de scraping
+        with get_script_engine().connect() as connection:
             # Statistiques générales
-            cursor.execute("SELECT COUNT(*) FROM ps_stores")
-            stores_count = cursor.fetchone()[0]
+            stores_count = connection.execute(text("SELECT COUNT(*) FROM ps_stores")).scalar()
             
-            cursor.execute("SELECT COUNT(*) FROM ps_categories")
-            categories_count = cursor.fetchone()[0]
+            categories_count = connection.execute(text("SELECT COUNT(*) FROM ps_categories")).scalar()
             
-            cursor.execute("SELECT COUNT(*) FROM ps_products")
-            products_count = cursor.fetchone()[0]
+            products_count = connection.execute(text("SELECT COUNT(*) FROM ps_products")).scalar()
             
-            cursor.execute("SELECT COUNT(*) FROM ps_prices")
-            prices_count = cursor.fetchone()[0]
+            prices_count = connection.execute(text("SELECT COUNT(*) FROM ps_prices")).scalar()
             
             report['statistics'] = {
                 'stores': stores_count,
@@ -111,23 +87,21 @@ def generate_daily_report(total_products):
             }
             
             # Magasins
-            cursor.execute("SELECT store_name, store_city, store_country FROM ps_stores")
-            stores = cursor.fetchall()
+            stores = connection.execute(text("SELECT store_name, store_city, store_country FROM ps_stores")).fetchall()
             report['stores'] = [
                 {'name': store[0], 'city': store[1], 'country': store[2]}
                 for store in stores
             ]
             
             # Catégories
-            cursor.execute("SELECT cat_label, cat_description FROM ps_categories")
-            categories = cursor.fetchall()
+            categories = connection.execute(text("SELECT cat_label, cat_description FROM ps_categories")).fetchall()
             report['categories'] = [
                 {'name': cat[0], 'description': cat[1]}
                 for cat in categories
             ]
             
             # Produits récents (derniers 10)
-            cursor.execute("""
+            recent_products = connection.execute(text("""
                 SELECT p.product_name, c.cat_label, s.store_name, pr.price_amount
                 FROM ps_products p
                 JOIN ps_categories c ON p.category_id = c.id
@@ -135,8 +109,7 @@ def generate_daily_report(total_products):
                 JOIN ps_stores s ON pr.store_id = s.id
                 ORDER BY p.id DESC
                 LIMIT 10
-            """)
-            recent_products = cursor.fetchall()
+            """)).fetchall()
             report['recent_products'] = [
                 {
                     'name': prod[0],
@@ -147,7 +120,6 @@ def generate_daily_report(total_products):
                 for prod in recent_products
             ]
         
-        connection.close()
         return report
         
     except Exception as e:
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Latence de l'API pendant un scraping en arrière-plan
+Usage : python benchmarks/api_latency_benchmark.py [secondes] [processus] [requêtes_par_passage]
+        (backend de parsing : SCRAPING_PARSER_BACKEND=bs4-lxml ..., par défaut auto)
+
+Une application Flask (base SQLite temporaire, route de lecture des prix)
+tourne dans le même processus que le pipeline de scraping, comme
+`start_scraping_background` dans app.py. Un client dans un autre processus
+l'interroge en continu ; on relève p50 / p95 / p99 dans trois situations :
+
+  repos      aucun scraping
+  threads    pipeline en boucle, parsing dans ses threads (SCRAPING_PARSE_PROCESSES=0)
+  processus  pipeline en boucle, parsing dans le pool de processus
+
+Les pages des magasins sont les pages fixes de benchmarks/fixtures, servies
+sans latence par un serveur local : le scraping est limité par le CPU.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCRAPING_SNAPSHOT_MODE', 'off')
+
+
+def client(url, seconds, results):
+    """Requêtes séquentielles pendant `seconds` secondes ; latences en ms"""
+    import http.client
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        started = time.perf_counter()
+        connection.request('GET', parts.path)
+        connection.getresponse().read()
+        latencies.append((time.perf_counter() - started) * 1000)
+        connection.close()
+    results.put(latencies)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+
+def make_app(database_url):
+    from flask import Flask, jsonify
+    from sqlalchemy import select
+
+    from config.db import db
+    from model.PriceScan_db import ps_prices, ps_products
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    @app.route('/api/prices')
+    def prices():
+        rows = db.session.execute(
+            select(ps_products.product_name, ps_prices.price_amount)
+            .join(ps_prices, ps_prices.product_id == ps_products.id)
+            .order_by(ps_prices.id.desc()).limit(50)
+        ).all()
+        return jsonify([{'product': name, 'price': amount} for name, amount in rows])
+
+    return app
+
+
+def run(seconds=10.0, processes=2, queries=20):
+    from werkzeug.serving import make_server
+
+    from config.db import db
+    from config.scraping_config import STORE_CONFIG
+    from helpers.scrape_pipeline import ScrapePipeline
+    from helpers.scrapper.engine import ScrapeEngine
+    from helpers.scrapper.generic import StoreScraper
+    from helpers.scrapper.parse_pool import ParsePool
+    from helpers.scrapper.parsing import get_parser_backend
+    from local_server import LocalStoreServer
+    from scraper_suite import load_fixtures, query_pages
+
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    app = make_app(f"sqlite:///{database.name}")
+    with app.app_context():
+        db.create_all()
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    api = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{api.server_port}/api/prices"
+
+    fixtures = load_fixtures()
+    context = multiprocessing.get_context('spawn')
+    report = {}
+    print(f"Backend {get_parser_backend().name}, {seconds:.0f}s par mesure, "
+          f"{queries * len(fixtures)} pages par passage\n")
+    print(f"{'situation':<10} {'requêtes':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'pages/s':>8}")
+
+    with LocalStoreServer(pages=query_pages(fixtures)) as server:
+        stores = {}
+        for store_id in fixtures:
+            config = dict(STORE_CONFIG[store_id], search_url=f"{server.base_url}/{store_id}/search?q={{query}}")
+            stores[store_id] = {'scraper': StoreScraper(store_id, config), 'name': config['name'], 'enabled': True}
+
+        for name, pool_size in (('repos', None), ('threads', 0), ('processus', processes)):
+            stop = threading.Event()
+            pages = [0]
+            pool = None
+
+            def scrape_loop():
+                passage = 0
+                while not stop.is_set():
+                    jobs = [(store_id, f"requete {passage}-{i}") for i in range(queries) for store_id in stores]
+                    pipeline = ScrapePipeline(ScrapeEngine(stores), parse_pool=pool)
+                    pipeline.run(jobs, app=app)
+                    pages[0] += pipeline.last_run_stats['stages']['parse']['items_out']
+                    passage += 1
+
+            loader = None
+            if pool_size is not None:
+                pool = ParsePool(processes=pool_size)
+                pool.warm_up()
+                loader = threading.Thread(target=scrape_loop, daemon=True)
+                loader.start()
+                time.sleep(0.5)
+
+            results = context.Queue()
+            started = time.perf_counter()
+            process = context.Process(target=client, args=(url, seconds, results))
+            process.start()
+            latencies = results.get()
+            process.join()
+            elapsed = time.perf_counter() - started
+
+            stop.set()
+            if loader:
+                loader.join()
+                pool.shutdown()
+
+            report[name] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'max_ms': round(max(latencies), 2) if latencies else 0.0,
+                'pages_per_sec': round(pages[0] / elapsed, 1)
+            }
+            r = report[name]
+            print(f"{name:<10} {r['requests']:>8} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                  f"{r['max_ms']:>8.2f} {r['pages_per_sec']:>8.1f}")
+
+    api.shutdown()
+    os.unlink(database.name)
+    return report
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 20)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Temps de démarrage à froid d'un worker de l'API
+Usage : python benchmarks/cold_start.py [répétitions] [--blackhole]
+
+Chaque mesure lance un interpréteur neuf qui importe
+resources.scraper_control (comme au démarrage de l'API) puis appelle
+get_scraper_status() une première fois.
+
+--blackhole : les requêtes HTTP(S) passent par un proxy local qui accepte
+les connexions sans jamais répondre (magasins injoignables : chaque
+requête attend son timeout de lecture).
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import statistics
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, os.getcwd())
+os.makedirs('logger', exist_ok=True)
+started = time.perf_counter()
+import resources.scraper_control
+imported = time.perf_counter()
+from helpers.auto_scraper import get_scraper_status
+get_scraper_status()
+status = time.perf_counter()
+print(json.dumps({'import': imported - started, 'first_status': status - imported}))
+"""
+
+
+def start_blackhole():
+    """Proxy qui accepte les connexions et ne répond jamais"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(128)
+    held = []
+
+    def accept():
+        while True:
+            connection, _ = server.accept()
+            held.append(connection)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return f"http://127.0.0.1:{server.getsockname()[1]}"
+
+
+def measure(runs=5, blackhole=False):
+    env = dict(os.environ)
+    if blackhole:
+        proxy = start_blackhole()
+        env.update({'HTTP_PROXY': proxy, 'HTTPS_PROXY': proxy, 'NO_PROXY': ''})
+        print(f"Proxy trou noir : {proxy}")
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=900)
+        lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+        if not lines:
+            print(output.stderr[-2000:])
+            raise SystemExit("Mesure impossible")
+        samples.append(json.loads(lines[-1]))
+
+    report = {}
+    for key in ('import', 'first_status'):
+        values = [sample[key] for sample in samples]
+        report[key] = {'median': statistics.median(values), 'max': max(values)}
+        print(f"{key:<13} médiane {report[key]['median'] * 1000:9.1f} ms   max {report[key]['max'] * 1000:9.1f} ms")
+    return report
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    measure(int(args[0]) if args else 5, blackhole='--blackhole' in sys.argv)
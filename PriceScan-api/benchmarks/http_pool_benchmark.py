@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare `requests.get` nu et le client HTTP partagé sur un serveur local
+Usage : python benchmarks/http_pool_benchmark.py [nombre_de_requetes]
+"""
+
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import LocalStoreServer
+from helpers.scrapper.http_client import HttpClient
+
+
+def run(n_requests=200):
+    page = "<html><body>" + "<div class='product-item'>x</div>" * 50 + "</body></html>"
+
+    with LocalStoreServer(default_page=page) as server:
+        url = f"{server.base_url}/recherche?q=smartphone"
+
+        started = time.perf_counter()
+        for _ in range(n_requests):
+            requests.get(url, timeout=5).content
+        bare_time = time.perf_counter() - started
+        bare_connections = server.connections
+
+        client = HttpClient()
+        started = time.perf_counter()
+        for _ in range(n_requests):
+            client.get(url).content
+        pooled_time = time.perf_counter() - started
+        pooled_connections = server.connections - bare_connections
+        stats = client.get_stats()
+        client.close()
+
+    print(f"Requêtes par mode         : {n_requests}")
+    print(f"requests.get nu           : {bare_time:.3f}s, {bare_connections} connexions ouvertes")
+    print(f"Client partagé            : {pooled_time:.3f}s, {pooled_connections} connexions ouvertes")
+    print(f"Compteurs du client       : {stats['new_connections']} nouvelles, "
+          f"{stats['reused_connections']} réutilisées")
+    return stats
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare l'ancienne sauvegarde ligne à ligne et l'ingestion en masse
+Usage : python benchmarks/ingest_benchmark.py [lignes] [url_base_de_données]
+
+Chaque méthode écrit deux fois le même jeu de lignes (création puis mise à
+jour des prix) dans une base vide ; SQLite en mémoire par défaut. Une
+troisième passe où 10 % des prix changent montre la croissance de ps_prices :
+en mode historique ('changes'), seuls les prix modifiés ajoutent une ligne.
+"""
+
+import os
+import sys
+import time
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from flask import Flask
+
+from config.db import db
+from model.PriceScan_db import ps_products, ps_prices, ps_stores
+from helpers.identity_index import IdentityIndex
+from helpers.price_ingest import PriceIngestor
+
+STORES = ['Carrefour', 'Kedjenou', 'AfrikMall', 'Bazart', 'Jumia']
+
+
+def make_rows(count, seed=42):
+    """Lignes de scraping synthétiques, réparties sur les magasins"""
+    rng = random.Random(seed)
+    per_store = max(1, count // len(STORES))
+    return [{'nom': f"Produit {i}", 'prix': f"{rng.randint(500, 900000):,} FCFA".replace(',', ' '),
+             'store': store}
+            for store in STORES for i in range(per_store)]
+
+
+def change_prices(rows, share=0.1, seed=7):
+    """Copie des lignes où une part `share` des prix a changé"""
+    rng = random.Random(seed)
+    return [dict(row, prix=f"{rng.randint(500, 900000)} FCFA") if rng.random() < share else row
+            for row in rows]
+
+
+def legacy_save(rows):
+    """Ancien chemin : un SELECT par produit et par prix, un commit par ligne"""
+    from datetime import datetime
+
+    for result in rows:
+        store = ps_stores.query.filter_by(store_name=result['store']).first()
+        if not store:
+            store = ps_stores(store_name=result['store'])
+            db.session.add(store)
+            db.session.flush()
+        product = ps_products.query.filter_by(product_name=result['nom']).first()
+        if not product:
+            product = ps_products(product_name=result['nom'],
+                                  product_description=f"Produit trouvé via scraping: {result['nom']}")
+            db.session.add(product)
+            db.session.flush()
+
+        price_amount = float(result['prix'].replace('FCFA', '').replace(' ', '').replace(',', ''))
+        existing_price = ps_prices.query.filter_by(product_id=product.id, store_id=store.id).first()
+        if existing_price:
+            existing_price.price_amount = price_amount
+            existing_price.updated_on = datetime.now()
+        else:
+            db.session.add(ps_prices(product_id=product.id, store_id=store.id, price_amount=price_amount,
+                                     price_currency='CFA', price_is_promo=False, price_source='scraper'))
+        db.session.commit()
+
+
+def bulk_saver(use_index, history='overwrite'):
+    """Ingestion en masse ; l'index d'identité est chargé une fois pour toutes les passes"""
+    index = IdentityIndex() if use_index else None
+    return PriceIngestor(index=index, use_index=use_index, history=history).ingest, index
+
+
+def _measure(app, make_save, rows):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        save, index = make_save()
+        timings = []
+        for _ in range(2):  # création puis mise à jour
+            started = time.perf_counter()
+            save(rows)
+            timings.append(time.perf_counter() - started)
+        prices = ps_prices.query.count()
+        save(change_prices(rows))
+        prices_after_changes = ps_prices.query.count()
+    return timings, prices, prices_after_changes, index
+
+
+def run(count=2000, database_url='sqlite://'):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    rows = make_rows(count)
+    print(f"{len(rows)} lignes, {len(STORES)} magasins, base {database_url}\n")
+
+    report = {}
+    methods = (
+        ('ligne à ligne', lambda: (legacy_save, None)),
+        ('en masse', lambda: bulk_saver(use_index=False)),
+        ('en masse+index', lambda: bulk_saver(use_index=True)),
+        ('historique', lambda: bulk_saver(use_index=True, history='changes'))
+    )
+    for name, make_save in methods:
+        (insert_time, update_time), prices, prices_after_changes, index = _measure(app, make_save, rows)
+        report[name] = {
+            'insert_rows_per_sec': len(rows) / insert_time,
+            'update_rows_per_sec': len(rows) / update_time,
+            'prices': prices,
+            'prices_after_changes': prices_after_changes
+        }
+        print(f"{name:<15} création {len(rows) / insert_time:10.0f} lignes/s   "
+              f"mise à jour {len(rows) / update_time:10.0f} lignes/s   "
+              f"({prices} prix en base, {prices_after_changes} après 10 % de changements)")
+        if index:
+            memory = index.memory_footprint()['total_bytes']
+            report[name]['index_bytes'] = memory
+            print(f"{'':<15} index : {len(index.products)} produits, {memory / 1024:.0f} Ko")
+    return report
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        sys.argv[2] if len(sys.argv) > 2 else 'sqlite://')
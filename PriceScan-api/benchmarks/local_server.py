@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur HTTP local servant de doublure aux sites des magasins
+(keep-alive HTTP/1.1, latence configurable, pages en mémoire)
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LocalStoreServer:
+    """
+    Serveur local démarré dans un thread.
+
+    `pages` associe un chemin (sans la query string) au corps HTML, ou
+    bien est une fonction (chemin complet -> corps ou None) ; les chemins
+    inconnus reçoivent `default_page`. Avec `etags`, chaque
+    réponse porte un ETag et If-None-Match reçoit un 304. `statuses`
+    (chemin complet -> code HTTP ou None) simule des erreurs serveur.
+    """
+
+    def __init__(self, pages=None, default_page=b"<html><body></body></html>", latency=0.0, etags=False,
+                 statuses=None):
+        self.pages = pages or {}
+        self.statuses = statuses
+        self.default_page = default_page
+        self.latency = latency
+        self.etags = etags
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                status = server.statuses(self.path) if server.statuses else None
+                if status:
+                    self.send_response(status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if callable(server.pages):
+                    body = server.pages(self.path) or server.default_page
+                else:
+                    body = server.pages.get(self.path.split('?', 1)[0], server.default_page)
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if server.etags and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if server.etags:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
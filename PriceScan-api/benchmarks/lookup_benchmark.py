@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recherche en direct avec échéance
+Usage : python benchmarks/lookup_benchmark.py [recherches] [échéance_s] [lenteur_s]
+
+Les pages fixes de benchmarks/fixtures sont servies par un serveur local ;
+Carrefour et Jumia répondent après `lenteur_s`, au-delà de l'échéance. Chaque
+recherche doit répondre à l'échéance avec les magasins rapides, et les
+magasins lents doivent quand même finir en base.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCRAPING_SNAPSHOT_MODE', 'off')
+
+from flask import Flask
+
+from config.db import db
+from config.scraping_config import STORE_CONFIG
+from model.PriceScan_db import ps_prices
+from helpers.live_lookup import LiveLookup
+from helpers.scrapper.generic import StoreScraper
+from helpers.scrapper.parse_pool import get_parse_pool
+from local_server import LocalStoreServer
+from scraper_suite import load_fixtures, query_pages
+
+SLOW = ('carrefour', 'jumia')
+
+
+def slow_statuses(delay):
+    """Les magasins de SLOW répondent après `delay` secondes"""
+    def status(path):
+        if path.strip('/').split('/', 1)[0] in SLOW:
+            time.sleep(delay)
+        return None
+    return status
+
+
+def run(lookups=5, deadline=1.0, delay=2.0):
+    fixtures = load_fixtures()
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+    print(f"{lookups} recherches, {len(fixtures)} magasins, échéance {deadline:.1f}s, "
+          f"{', '.join(SLOW)} à {delay:.1f}s\n")
+    print(f"{'recherche':<12} {'durée':>7} {'complète':>9} {'magasins':>9} {'résultats':>10} {'en attente':<20}")
+    with LocalStoreServer(pages=query_pages(fixtures), statuses=slow_statuses(delay)) as server:
+        stores = {}
+        for store_id in fixtures:
+            config = dict(STORE_CONFIG[store_id], search_url=f"{server.base_url}/{store_id}/search?q={{query}}")
+            stores[store_id] = {'scraper': StoreScraper(store_id, config), 'name': config['name'], 'enabled': True}
+        lookup = LiveLookup(stores, deadline=deadline)
+        get_parse_pool().warm_up()  # démarrage des processus hors mesure (service de longue durée)
+
+        report = {'lookups': []}
+        for i in range(lookups):
+            result = lookup.lookup(f"requete {i}", app=app)
+            answered = sum(store['status'] not in ('pending', 'circuit_open') for store in result['stores'].values())
+            report['lookups'].append({key: result[key] for key in ('elapsed', 'complete', 'pending')})
+            print(f"{'requete ' + str(i):<12} {result['elapsed']:>6.2f}s {str(result['complete']):>9} "
+                  f"{answered:>4}/{len(stores):<4} {len(result['results']):>10} {', '.join(result['pending']):<20}")
+
+        # Les recherches lentes terminent puis sont enregistrées après la réponse
+        time.sleep(delay + 0.5)
+        lookup._writer.submit(lambda: None).result()
+        with app.app_context():
+            prices = ps_prices.query.count()
+
+    stats = lookup.get_stats()
+    report.update(stats=stats, prices=prices)
+    print(f"\nà l'heure {stats['in_time']}, en retard {stats['late']}, "
+          f"prix enregistrés {stats['persisted']} ({prices} en base), erreurs d'écriture {stats['persist_errors']}")
+    return report
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 1.0,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 2.0)
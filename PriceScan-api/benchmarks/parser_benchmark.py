@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare les backends de parsing sur des pages enregistrées
+Usage : python benchmarks/parser_benchmark.py [dossier_snapshots] [iterations]
+
+Les pages viennent d'un dossier de snapshots (voir replay_benchmark.py) ;
+chaque URL est associée à son magasin via STORE_CONFIG['url_base'].
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from config.scraping_config import STORE_CONFIG
+from helpers.scrapper.parsing import available_backends, extract_products, get_parser_backend
+from helpers.scrapper.rate_limiter import _domain
+from helpers.scrapper.snapshots import SnapshotStore
+
+
+def load_pages(directory):
+    """[(store_id, url, corps)] pour les URLs d'un magasin connu"""
+    store_by_domain = {_domain(config['url_base']): store_id for store_id, config in STORE_CONFIG.items()}
+    store = SnapshotStore(directory, mode='replay')
+    pages = []
+    for url in store.urls():
+        store_id = store_by_domain.get(_domain(url))
+        if store_id:
+            pages.append((store_id, url, store.replay(url).content))
+    return pages
+
+
+def run(directory='snapshots', iterations=20):
+    pages = load_pages(directory)
+    if not pages:
+        print(f"Aucune page de magasin dans {directory}")
+        return {}
+
+    total_bytes = sum(len(body) for _, _, body in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1024:.1f} Ko, {iterations} itérations\n")
+
+    reference = None
+    report = {}
+    for name in available_backends():
+        backend = get_parser_backend(name)
+        rows = [extract_products(store_id, body, backend=backend) for store_id, _, body in pages]
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for store_id, _, body in pages:
+                extract_products(store_id, body, backend=backend)
+        elapsed = time.perf_counter() - started
+
+        ms_per_page = elapsed * 1000 / (iterations * len(pages))
+        row_count = sum(len(r) for r in rows)
+        same = reference is None or rows == reference
+        reference = reference or rows
+        report[name] = {'ms_per_page': ms_per_page, 'rows': row_count, 'same_rows': same}
+        print(f"{name:<16} {ms_per_page:8.3f} ms/page  {row_count:6d} lignes  "
+              f"{'identique' if same else 'DIFFÉRENT'}")
+    return report
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else 'snapshots',
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20)
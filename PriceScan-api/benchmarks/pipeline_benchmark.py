@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare le scraping « tout récupérer puis enregistrer » et le pipeline en flux
+Usage : python benchmarks/pipeline_benchmark.py [dossier_snapshots] [requêtes] [latence_s]
+
+Une page enregistrée par magasin (voir replay_benchmark.py) est servie par
+un serveur local avec la latence donnée ; chaque méthode scrape les mêmes
+couples (magasin, requête) et enregistre dans une base SQLite en mémoire.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+
+from flask import Flask
+
+from config.db import db
+from config.scraping_config import STORE_CONFIG
+from model.PriceScan_db import ps_prices
+from helpers.price_ingest import ingest_scraped_rows
+from helpers.scrape_pipeline import STAGES, ScrapePipeline
+from helpers.scrapper.engine import ScrapeEngine
+from helpers.scrapper.generic import StoreScraper
+from local_server import LocalStoreServer
+from parser_benchmark import load_pages
+
+
+def local_stores(pages, base_url):
+    """Magasins dont search_url pointe vers le serveur local"""
+    stores, served = {}, {}
+    for store_id, _, body in pages:
+        if store_id in stores:
+            continue
+        config = dict(STORE_CONFIG[store_id], search_url=f"{base_url}/{store_id}/search?q={{query}}")
+        stores[store_id] = {'scraper': StoreScraper(store_id, config), 'name': config['name'], 'enabled': True}
+        served[f"/{store_id}/search"] = body
+    return stores, served
+
+
+def sequential(engine, jobs):
+    """Ancien chemin : tous les couples récupérés et parsés, puis une écriture par produit"""
+    by_product = {}
+    for _, query, results in engine.run(jobs):
+        by_product.setdefault(query, []).extend(results)
+    for results in by_product.values():
+        ingest_scraped_rows(results)
+
+
+def run(directory='snapshots', queries=40, latency=0.05):
+    pages = load_pages(directory)
+    if not pages:
+        print(f"Aucune page de magasin dans {directory}")
+        return {}
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    report = {}
+    with LocalStoreServer(latency=latency) as server:
+        stores, server.pages = local_stores(pages, server.base_url)
+        jobs = [(store_id, f"requete {i}") for i in range(queries) for store_id in stores]
+        print(f"{len(jobs)} couples, {len(stores)} magasins, latence {latency * 1000:.0f} ms\n")
+
+        for name in ('séquentiel', 'pipeline'):
+            engine = ScrapeEngine(stores)
+            with app.app_context():
+                db.drop_all()
+                db.create_all()
+                started = time.perf_counter()
+                if name == 'pipeline':
+                    pipeline = ScrapePipeline(engine)
+                    pipeline.run(jobs, app=app)
+                else:
+                    sequential(engine, jobs)
+                elapsed = time.perf_counter() - started
+                prices = ps_prices.query.count()
+            report[name] = {'duration': elapsed, 'prices': prices}
+            print(f"{name:<12} {elapsed:7.3f}s  {len(jobs) / elapsed:7.1f} couples/s  ({prices} prix en base)")
+
+        stats = pipeline.last_run_stats
+        report['stages'] = stats['stages']
+        print(f"\n{'étage':<10} {'workers':>7} {'sorties':>8} {'débit/s':>8} {'occupation':>10} "
+              f"{'bloqué s':>8} {'file max':>8}")
+        for stage in STAGES:
+            s = stats['stages'][stage]
+            print(f"{stage:<10} {s['workers']:>7} {s['items_out']:>8} {s['throughput']:>8.1f} "
+                  f"{s['utilization']:>10.2f} {s['blocked_time']:>8.2f} {s['max_queue_depth']:>8}")
+        print(f"\nGoulot : {stats['bottleneck']}")
+    return report
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else 'snapshots',
+        int(sys.argv[2]) if len(sys.argv) > 2 else 40,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0.05)
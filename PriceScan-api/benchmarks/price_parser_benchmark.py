@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Débit de la normalisation des prix sur des textes synthétiques
+Usage : python benchmarks/price_parser_benchmark.py [textes] [taille_lot]
+
+Compare l'ancienne conversion texte par texte (regex + boucle Python, comme
+l'ancien `parse_amount`), la version texte à texte de `parse_prices` (petits
+lots) et sa version NumPy par lots ; vérifie que les deux versions de
+`parse_prices` donnent les mêmes montants et codes de rejet, et l'ancienne
+conversion les mêmes montants sur les formats à un seul montant.
+"""
+
+import os
+import sys
+import time
+import random
+import re
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+
+from helpers.scrapper import prices
+from helpers.scrapper.prices import PRICE_OK, parse_prices
+
+# Formats rencontrés sur les sites (les deux derniers sont rejetés)
+FORMATS = [
+    (lambda a, b: f"{a:,}\u00a0FCFA".replace(',', ' '), True),
+    (lambda a, b: f"{a:,} F CFA".replace(',', '.'), True),
+    (lambda a, b: f"{a:,}".replace(',', ' ') + " XOF", True),
+    (lambda a, b: f"{a}F", True),
+    (lambda a, b: f"{b:,} FCFA {a:,} FCFA".replace(',', ' '), False),   # prix barré + promo
+    (lambda a, b: f"{a:,} - {b:,} FCFA".replace(',', ' '), False),      # plage
+    (lambda a, b: "Prix sur demande", False),
+    (lambda a, b: "", False)
+]
+
+_LEGACY_AMOUNT_RE = re.compile(r'\d[\d\s.,\u00a0\u202f]*')
+_LEGACY_SEPARATORS = ' .,\u00a0\u202f'
+
+
+def legacy_parse(text):
+    """Ancien chemin : premier montant du texte, séparateurs retirés un à un"""
+    if not text:
+        return None
+    for match in _LEGACY_AMOUNT_RE.findall(text):
+        raw = match.strip(_LEGACY_SEPARATORS)
+        for separator in _LEGACY_SEPARATORS:
+            raw = raw.replace(separator, '')
+        try:
+            return float(raw)
+        except ValueError:
+            continue
+    return None
+
+
+def make_texts(count, seed=42):
+    """Textes de prix synthétiques ; `simple` marque les formats à un seul montant"""
+    rng = random.Random(seed)
+    texts, simple = [], []
+    for _ in range(count):
+        low = rng.randint(100, 900000)
+        fmt, is_simple = FORMATS[rng.randrange(len(FORMATS))]
+        texts.append(fmt(low, low + rng.randint(100, 50000)))
+        simple.append(is_simple)
+    return texts, np.array(simple)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def by_batches(texts, batch_size):
+    amounts, flags = [], []
+    for start in range(0, len(texts), batch_size):
+        batch = parse_prices(texts[start:start + batch_size])
+        amounts.append(batch.amounts)
+        flags.append(batch.flags)
+    return np.concatenate(amounts), np.concatenate(flags)
+
+
+def run(count=1_000_000, batch_size=None):
+    texts, simple = make_texts(count)
+    batch_size = batch_size or count
+    print(f"{count} textes, lots de {batch_size}\n")
+
+    legacy, legacy_time = timed(lambda: [legacy_parse(text) for text in texts])
+    vector_min = prices.VECTOR_MIN_BATCH
+    try:
+        prices.VECTOR_MIN_BATCH = count + 1      # texte à texte
+        (text_amounts, text_flags), text_time = timed(by_batches, texts, batch_size)
+        prices.VECTOR_MIN_BATCH = 0              # NumPy
+        (amounts, flags), batch_time = timed(by_batches, texts, batch_size)
+    finally:
+        prices.VECTOR_MIN_BATCH = vector_min
+
+    legacy_amounts = np.array([np.nan if value is None else value for value in legacy])
+    agree_legacy = np.array_equal(amounts[simple], legacy_amounts[simple])
+    agree = np.array_equal(flags, text_flags) and np.allclose(amounts, text_amounts, equal_nan=True)
+    rejected = int((flags != PRICE_OK).sum())
+
+    print(f"{'méthode':<22} {'durée s':>8} {'textes/s':>12}")
+    print(f"{'ancienne (texte)':<22} {legacy_time:8.3f} {count / legacy_time:12.0f}")
+    print(f"{'parse_prices (texte)':<22} {text_time:8.3f} {count / text_time:12.0f}")
+    print(f"{'parse_prices (NumPy)':<22} {batch_time:8.3f} {count / batch_time:12.0f}  "
+          f"(x{legacy_time / batch_time:.1f} / ancienne, x{text_time / batch_time:.1f} / texte)")
+    reasons = prices.PriceBatch(amounts, flags).reject_counts()
+    print(f"\nRejetés : {rejected} ({rejected / count:.1%}) {reasons}")
+    print(f"Versions texte / NumPy identiques : {'oui' if agree else 'NON'}, "
+          f"formats simples identiques à l'ancienne : {'oui' if agree_legacy else 'NON'}")
+    return {'legacy': legacy_time, 'text': text_time, 'batch': batch_time, 'rejected': rejected,
+            'agree': agree and agree_legacy}
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark déterministe scrape -> sauvegarde sur des pages enregistrées
+
+  1. Enregistrer un jeu de pages (accès réseau réel) :
+       python benchmarks/replay_benchmark.py record [dossier]
+  2. Rejouer sans réseau et mesurer pages/s et lignes/s :
+       python benchmarks/replay_benchmark.py replay [dossier]
+
+La sauvegarde se fait dans une base SQLite en mémoire.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+
+from helpers.scrapper.snapshots import set_snapshot_mode
+
+QUERIES = ['smartphone', 'laptop', 'casque', 'chargeur', 'tablette']
+SMART_URLS = [('https://carrefour.ci', "Carrefour Côte d'Ivoire"), ('https://playce.ci', 'PlaYce Marcory')]
+
+
+def _store_scrapers():
+    from helpers.scrapper.carrefour import scrape_carrefour
+    from helpers.scrapper.jumia import scrape_jumia
+    from helpers.scrapper.kedjenou import scrape_kedjenou
+
+    return {
+        'carrefour': scrape_carrefour,
+        'jumia': scrape_jumia,
+        'kedjenou': scrape_kedjenou
+    }
+
+
+def _smart_scrape(scraper, url, store_name):
+    analysis = scraper.analyze_site_structure(url, store_name)
+    if not analysis or analysis['products_found'] == 0:
+        return []
+    return scraper.extract_products_from_analysis(analysis, 'Électronique')
+
+
+def record(directory):
+    """Scrape les vrais sites en enregistrant chaque réponse"""
+    from helpers.scrapper.smart_scraper import SmartScraper
+
+    set_snapshot_mode('record', directory)
+    for store_id, scraper in _store_scrapers().items():
+        for query in QUERIES:
+            results = scraper(query)
+            print(f"[record] {store_id:<10} {query:<12} {len(results)} résultats")
+
+    smart = SmartScraper()
+    for url, store_name in SMART_URLS:
+        products = _smart_scrape(smart, url, store_name)
+        print(f"[record] smart      {store_name:<12} {len(products)} résultats")
+
+
+def replay(directory):
+    """Rejoue les pages enregistrées et mesure le chemin scrape -> sauvegarde"""
+    from flask import Flask
+    from config.db import db
+    import model.PriceScan_db  # noqa: F401 (déclare les tables)
+    from helpers.scrapper.smart_scraper import SmartScraper
+
+    set_snapshot_mode('replay', directory)
+
+    # Scraping
+    pages = 0
+    scraped = []
+    started = time.perf_counter()
+    for store_id, scraper in _store_scrapers().items():
+        for query in QUERIES:
+            results = scraper(query)
+            pages += 1
+            for result in results:
+                result.setdefault('store', store_id.title())
+            scraped.append((query, results))
+
+    smart = SmartScraper.__new__(SmartScraper)  # sans connexion MySQL
+    for url, store_name in SMART_URLS:
+        smart_products = _smart_scrape(smart, url, store_name)
+        pages += 1
+        scraped.append((store_name, [
+            {'nom': p['name'], 'prix': str(p['price']), 'store': p['store']} for p in smart_products
+        ]))
+    scrape_time = time.perf_counter() - started
+    rows = sum(len(results) for _, results in scraped)
+
+    # Sauvegarde
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    from helpers.auto_scraper import AutoScraper
+
+    with app.app_context():
+        db.create_all()
+        saver = AutoScraper.__new__(AutoScraper)  # sans test réseau des magasins
+        started = time.perf_counter()
+        for query, results in scraped:
+            if results:
+                saver._save_popular_products_data(results, query)
+        save_time = time.perf_counter() - started
+
+    total = scrape_time + save_time
+    print(f"Pages rejouées   : {pages}")
+    print(f"Lignes extraites : {rows}")
+    print(f"Scraping         : {scrape_time:.3f}s ({pages / scrape_time:.1f} pages/s, {rows / scrape_time:.1f} lignes/s)")
+    print(f"Sauvegarde       : {save_time:.3f}s ({rows / save_time if save_time else 0:.1f} lignes/s)")
+    print(f"Total            : {total:.3f}s ({rows / total if total else 0:.1f} lignes/s)")
+    return {'pages': pages, 'rows': rows, 'scrape_time': scrape_time, 'save_time': save_time}
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'replay'
+    directory = sys.argv[2] if len(sys.argv) > 2 else 'snapshots'
+    if mode == 'record':
+        record(directory)
+    else:
+        replay(directory)
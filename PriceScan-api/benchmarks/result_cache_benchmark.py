@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de résultats des recherches à la demande
+Usage : python benchmarks/result_cache_benchmark.py [utilisateurs] [requêtes_distinctes] [latence_s]
+
+Les pages fixes de benchmarks/fixtures sont servies par un serveur local
+avec latence. `utilisateurs` threads cherchent chacun toutes les requêtes
+sur tous les magasins (mêmes requêtes, casse et espaces variés), en deux
+vagues, sans puis avec cache : on compare les requêtes envoyées aux
+magasins et la durée de chaque vague (la première vague avec cache
+attend une seule récupération par couple, la seconde est servie par le cache).
+"""
+
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCRAPING_SNAPSHOT_MODE', 'off')
+
+from config.scraping_config import STORE_CONFIG
+from helpers.scrapper.generic import StoreScraper
+from helpers.scrapper.metrics import Histogram, LATENCY_BUCKETS
+from helpers.scrapper.parse_pool import get_parse_pool
+from helpers.scrapper.result_cache import ResultCache
+from local_server import LocalStoreServer
+from scraper_suite import load_fixtures, query_pages
+
+
+def run(users=8, queries=4, latency=0.1):
+    fixtures = load_fixtures()
+    get_parse_pool().warm_up()  # démarrage des processus hors mesure (service de longue durée)
+    print(f"{users} utilisateurs, {queries} requêtes, {len(fixtures)} magasins, latence {latency * 1000:.0f} ms\n")
+    print(f"{'scénario':<10} {'requêtes magasins':>18} {'vague 1':>8} {'vague 2':>8} {'p99':>8} {'succès cache':>13}")
+
+    report = {}
+    for name, enabled in (('sans cache', False), ('cache', True)):
+        with LocalStoreServer(pages=query_pages(fixtures), latency=latency) as server:
+            scrapers = {}
+            for store_id in fixtures:
+                config = dict(STORE_CONFIG[store_id], search_url=f"{server.base_url}/{store_id}/search?q={{query}}")
+                scrapers[store_id] = StoreScraper(store_id, config)
+            cache = ResultCache(name, enabled=enabled)
+            latencies = Histogram(LATENCY_BUCKETS)
+            lock = threading.Lock()
+
+            def user(index):
+                for i in range(queries):
+                    # Même recherche, écrite différemment selon l'utilisateur
+                    query = f"requete {i}" if index % 2 else f"  Requete   {i} "
+                    for store_id, scraper in scrapers.items():
+                        began = time.perf_counter()
+                        cache.get(store_id, query, lambda: scraper.scrape_page(query, use_cache=False))
+                        with lock:
+                            latencies.observe(time.perf_counter() - began)
+
+            waves = []
+            for _ in range(2):
+                started = time.perf_counter()
+                threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                waves.append(round(time.perf_counter() - started, 3))
+            upstream = server.requests
+
+        stats = cache.get_stats()
+        report[name] = {'upstream_requests': upstream, 'waves_s': waves,
+                        'latency': latencies.to_dict(), 'cache': stats}
+        r = report[name]
+        print(f"{name:<10} {upstream:>18} {waves[0]:>7.2f}s {waves[1]:>7.2f}s "
+              f"{r['latency']['p99_ms']:>6.1f}ms {stats['hit_ratio'] if enabled else '-':>13}")
+    return report
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0.1)
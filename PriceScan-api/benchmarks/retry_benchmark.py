@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nouvelles tentatives face à des magasins instables
+Usage : python benchmarks/retry_benchmark.py [requêtes] [places_globales]
+
+Les pages fixes de benchmarks/fixtures sont servies par un serveur local ;
+Carrefour répond 503 aux deux premières demandes de chaque URL (panne
+passagère), Jumia répond toujours 503 (magasin en panne). On compare les
+résultats récupérés sans et avec nouvelles tentatives, et l'heure de fin
+des magasins sains : pendant ses pauses, une voie rend sa place globale.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCRAPING_SNAPSHOT_MODE', 'off')
+
+from config.scraping_config import STORE_CONFIG
+from helpers.scrapper.engine import ScrapeEngine
+from helpers.scrapper.generic import StoreScraper
+from helpers.scrapper.retry import RetryPolicy, set_retry_policy
+from local_server import LocalStoreServer
+from scraper_suite import load_fixtures, query_pages
+
+FLAKY, DOWN = 'carrefour', 'jumia'
+
+
+def failing_statuses():
+    """503 pour les deux premières demandes de chaque URL de FLAKY, toujours pour DOWN"""
+    hits = Counter()
+    lock = threading.Lock()
+
+    def status(path):
+        store_id = path.strip('/').split('/', 1)[0]
+        if store_id == DOWN:
+            return 503
+        if store_id == FLAKY:
+            with lock:
+                hits[path] += 1
+                return 503 if hits[path] <= 2 else None
+        return None
+    return status
+
+
+def run(queries=10, slots=2):
+    fixtures = load_fixtures()
+    scenarios = (
+        ('sans retry', RetryPolicy(max_retries=0)),
+        ('retry', RetryPolicy(max_retries=3, base_delay=0.2, max_delay=2.0, budget=5.0))
+    )
+    print(f"{queries} requêtes par magasin, {len(fixtures)} magasins, {slots} places globales\n")
+    print(f"{'scénario':<12} {FLAKY:>10} {DOWN:>8} {'sains':>8} {'fin sains':>10} {'durée':>8} {'tentatives':>11}")
+
+    report = {}
+    for name, policy in scenarios:
+        set_retry_policy(policy)
+        with LocalStoreServer(pages=query_pages(fixtures), statuses=failing_statuses()) as server:
+            stores = {}
+            for store_id in fixtures:
+                config = dict(STORE_CONFIG[store_id], search_url=f"{server.base_url}/{store_id}/search?q={{query}}")
+                stores[store_id] = {'scraper': StoreScraper(store_id, config), 'name': config['name'], 'enabled': True}
+
+            finished = {}
+            results = Counter()
+            started = time.perf_counter()
+
+            def on_result(store_id, query, rows):
+                results[store_id] += len(rows)
+                finished[store_id] = time.perf_counter() - started
+
+            engine = ScrapeEngine(stores, max_workers=slots, per_store_limit=1)
+            engine.run([(store_id, f"requete {i}") for i in range(queries) for store_id in stores], on_result=on_result)
+            wall = time.perf_counter() - started
+
+        healthy = [store_id for store_id in stores if store_id not in (FLAKY, DOWN)]
+        stats = policy.get_stats()
+        report[name] = {
+            'flaky_results': results[FLAKY],
+            'down_results': results[DOWN],
+            'healthy_results': sum(results[store_id] for store_id in healthy),
+            'healthy_done_s': round(max(finished[store_id] for store_id in healthy), 3),
+            'wall_s': round(wall, 3),
+            'retry': stats
+        }
+        r = report[name]
+        print(f"{name:<12} {r['flaky_results']:>10} {r['down_results']:>8} {r['healthy_results']:>8} "
+              f"{r['healthy_done_s']:>9.2f}s {r['wall_s']:>7.2f}s "
+              f"{stats['requests'] + stats['retries']:>11}")
+    return report
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de performance du scraping sur des pages fixes
+Usage : python benchmarks/scraper_suite.py [--latency 0.05] [--queries 20] [--iterations 50]
+                                           [--copies 200] [--database sqlite:///...]
+                                           [--output fichier.json] [--compare ancien.json]
+
+Aucun accès réseau : chaque magasin a sa page HTML dans benchmarks/fixtures
+(résultats attendus dans expected.json), servie par un serveur local qui
+ajoute la latence demandée. Phases :
+
+  fixtures  les pages donnent les produits attendus (sinon code de sortie 1)
+  parse     ms par page et par magasin (extraction + normalisation des prix)
+  pipeline  récupération -> parsing -> écriture SQLite : pages/s, lignes/s
+  persist   ingestion en masse seule : lignes/s en création et en mise à jour
+
+Le pic de mémoire (RSS) est relevé après chaque phase. Le rapport JSON
+(benchmarks/results/ par défaut) porte le commit : comparer deux runs avec
+--compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.makedirs('logger', exist_ok=True)
+# Mesure du chemin complet : pas de GET conditionnel ni de rejeu
+os.environ.setdefault('SCRAPING_PAGE_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCRAPING_SNAPSHOT_MODE', 'off')
+
+import logging
+
+from flask import Flask
+
+from config.db import db
+from model.PriceScan_db import ps_prices
+from helpers.identity_index import IdentityIndex
+from helpers.price_ingest import PriceIngestor
+from helpers.scrape_pipeline import ScrapePipeline
+from helpers.scrapper.engine import ScrapeEngine
+from helpers.scrapper.generic import StoreScraper
+from helpers.scrapper.parsing import get_parser_backend
+from config.scraping_config import STORE_CONFIG
+from local_server import LocalStoreServer
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Métriques comparées par --compare : (chemin, libellé, plus grand = mieux)
+KEY_METRICS = (
+    ('parse.ms_per_page', 'parse ms/page', False),
+    ('pipeline.pages_per_sec', 'pipeline pages/s', True),
+    ('pipeline.rows_per_sec', 'pipeline lignes/s', True),
+    ('persist.insert_rows_per_sec', 'création lignes/s', True),
+    ('persist.update_rows_per_sec', 'mise à jour lignes/s', True),
+    ('peak_rss_mb.total', 'pic RSS Mo', False)
+)
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (Mo)"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnu'
+
+
+def load_fixtures():
+    """{store_id: (corps, attendu)}"""
+    with open(os.path.join(FIXTURES, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+    fixtures = {}
+    for store_id, entry in expected.items():
+        with open(os.path.join(FIXTURES, entry['file']), 'rb') as f:
+            fixtures[store_id] = (f.read(), entry)
+    return fixtures
+
+
+def _parse(scraper, body):
+    response = SimpleNamespace(content=body, unchanged=False)
+    return scraper.parse(scraper.build_url('fixture'), response)
+
+
+# --- phases -------------------------------------------------------------------
+
+def check_fixtures(fixtures) -> dict:
+    report = {}
+    for store_id, (body, expected) in fixtures.items():
+        results = _parse(StoreScraper(store_id), body)
+        first = {'nom': results[0]['nom'], 'prix': results[0]['prix']} if results else None
+        report[store_id] = {'ok': len(results) == expected['valid'] and first == expected['first'],
+                            'results': len(results), 'expected': expected['valid']}
+    return report
+
+
+def bench_parse(fixtures, iterations) -> dict:
+    stores = {}
+    total_time = total_pages = 0
+    for store_id, (body, _) in fixtures.items():
+        scraper = StoreScraper(store_id)
+        _parse(scraper, body)  # préchauffage (sélecteurs compilés)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            results = _parse(scraper, body)
+        elapsed = time.perf_counter() - started
+        stores[store_id] = {'ms_per_page': round(elapsed * 1000 / iterations, 3),
+                            'bytes': len(body), 'results': len(results)}
+        total_time += elapsed
+        total_pages += iterations
+    return {'iterations': iterations, 'ms_per_page': round(total_time * 1000 / total_pages, 3), 'stores': stores}
+
+
+def _app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def query_pages(fixtures):
+    """
+    Pages servies par recherche : les noms de produits de la page fixe
+    portent la requête, pour que chaque recherche écrive des prix distincts
+    """
+    names = {}
+    for store_id, (body, _) in fixtures.items():
+        results = _parse(StoreScraper(store_id), body)
+        names[store_id] = sorted({row['nom'].encode('utf-8') for row in results}, key=len, reverse=True)
+
+    def render(path):
+        route, _, query_string = path.partition('?')
+        store_id = route.strip('/').split('/')[0]
+        if store_id not in fixtures:
+            return None
+        query = parse_qs(query_string).get('q', [''])[0].encode('utf-8')
+        body = fixtures[store_id][0]
+        for name in names[store_id]:
+            body = body.replace(name, name + b' ' + query)
+        return body
+
+    return render
+
+
+def bench_pipeline(fixtures, app, queries, latency) -> dict:
+    with LocalStoreServer(pages=query_pages(fixtures), latency=latency) as server:
+        stores = {}
+        for store_id in fixtures:
+            config = dict(STORE_CONFIG[store_id], search_url=f"{server.base_url}/{store_id}/search?q={{query}}")
+            stores[store_id] = {'scraper': StoreScraper(store_id, config), 'name': config['name'], 'enabled': True}
+
+        jobs = [(store_id, f"requete {i}") for i in range(queries) for store_id in stores]
+        pipeline = ScrapePipeline(ScrapeEngine(stores))
+        pipeline.parse_pool.warm_up()  # démarrage des processus hors mesure (service de longue durée)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            started = time.perf_counter()
+            counts = pipeline.run(jobs, app=app)
+            elapsed = time.perf_counter() - started
+            prices = ps_prices.query.count()
+
+    stats = pipeline.last_run_stats
+    pages = stats['stages']['fetch']['items_out']
+    persisted = stats['inserted'] + stats['updated'] + stats['seen']
+    return {
+        'latency': latency,
+        'jobs': len(jobs),
+        'pages': pages,
+        'results': sum(counts.values()),
+        'rows_persisted': persisted,
+        'prices_in_db': prices,
+        'duration': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2),
+        'rows_per_sec': round(persisted / elapsed, 2),
+        'bottleneck': stats['bottleneck'],
+        'stages': stats['stages']
+    }
+
+
+def bench_persist(fixtures, app, copies) -> dict:
+    """Lignes des pages fixes dupliquées sous des noms distincts, écrites deux fois"""
+    base = []
+    for store_id, (body, _) in fixtures.items():
+        base.extend(_parse(StoreScraper(store_id), body))
+    rows = [dict(row, nom=f"{row['nom']} #{copy}") for copy in range(copies) for row in base]
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ingestor = PriceIngestor(index=IdentityIndex())
+        timings = []
+        for _ in range(2):  # création puis mise à jour
+            started = time.perf_counter()
+            ingestor.ingest(rows)
+            timings.append(time.perf_counter() - started)
+    insert_time, update_time = timings
+    return {
+        'rows': len(rows),
+        'insert_seconds': round(insert_time, 3),
+        'update_seconds': round(update_time, 3),
+        'insert_rows_per_sec': round(len(rows) / insert_time, 1),
+        'update_rows_per_sec': round(len(rows) / update_time, 1)
+    }
+
+
+# --- rapport --------------------------------------------------------------------
+
+def _metric(report, path):
+    value = report
+    for key in path.split('.'):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nComparaison avec {baseline['meta']['commit']} ({baseline['meta']['timestamp']})")
+    if baseline['meta']['params'] != report['meta']['params']:
+        print(f"  attention, paramètres différents : {baseline['meta']['params']} -> {report['meta']['params']}")
+    for path, label, higher_is_better in KEY_METRICS:
+        old, new = _metric(baseline, path), _metric(report, path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = (change > 0) == higher_is_better
+        print(f"  {label:<22} {old:>10} -> {new:>10}  {change:+6.1f}% {'mieux' if better else 'moins bien'}")
+
+
+def run(args):
+    fixtures = load_fixtures()
+    database_url = args.database
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pricescan-bench-'), 'bench.db')}"
+    app = _app(database_url)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser_backend': get_parser_backend().name,
+            'database': database_url.split('://', 1)[0],
+            'params': {'latency': args.latency, 'queries': args.queries,
+                       'iterations': args.iterations, 'copies': args.copies}
+        },
+        'peak_rss_mb': {'start': peak_rss_mb()}
+    }
+
+    report['fixtures'] = check_fixtures(fixtures)
+    failed = [store_id for store_id, entry in report['fixtures'].items() if not entry['ok']]
+    print(f"Pages fixes : {len(fixtures) - len(failed)}/{len(fixtures)} conformes"
+          + (f" (écarts : {', '.join(failed)})" if failed else ""))
+
+    report['parse'] = bench_parse(fixtures, args.iterations)
+    report['peak_rss_mb']['parse'] = peak_rss_mb()
+    print(f"Parsing     : {report['parse']['ms_per_page']:.3f} ms/page ({report['meta']['parser_backend']})")
+    for store_id, entry in report['parse']['stores'].items():
+        print(f"  {store_id:<12} {entry['ms_per_page']:8.3f} ms  {entry['results']:3d} résultats  {entry['bytes'] / 1024:5.1f} Ko")
+
+    report['pipeline'] = bench_pipeline(fixtures, app, args.queries, args.latency)
+    report['peak_rss_mb']['pipeline'] = peak_rss_mb()
+    pipeline = report['pipeline']
+    print(f"Pipeline    : {pipeline['pages']} pages en {pipeline['duration']}s, "
+          f"{pipeline['pages_per_sec']} pages/s, {pipeline['rows_per_sec']} lignes écrites/s "
+          f"(latence {args.latency * 1000:.0f} ms, goulot : {pipeline['bottleneck']})")
+
+    report['persist'] = bench_persist(fixtures, app, args.copies)
+    report['peak_rss_mb']['persist'] = peak_rss_mb()
+    persist = report['persist']
+    print(f"Écriture    : {persist['rows']} lignes, création {persist['insert_rows_per_sec']} lignes/s, "
+          f"mise à jour {persist['update_rows_per_sec']} lignes/s")
+
+    report['peak_rss_mb']['total'] = peak_rss_mb()
+    print(f"Pic RSS     : {report['peak_rss_mb']['total']} Mo")
+
+    output = args.output or os.path.join(
+        RESULTS, f"scraper-{report['meta']['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Rapport     : {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report, not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de performance du scraping (pages fixes, sans réseau)")
+    parser.add_argument('--latency', type=float, default=0.05, help="latence du serveur local (s)")
+    parser.add_argument('--queries', type=int, default=20, help="recherches par magasin (pipeline)")
+    parser.add_argument('--iterations', type=int, default=50, help="parsings par page (parse)")
+    parser.add_argument('--copies', type=int, default=200, help="copies des lignes des pages (persist)")
+    parser.add_argument('--database', help="URL SQLAlchemy (SQLite temporaire par défaut)")
+    parser.add_argument('--output', help="fichier JSON du rapport")
+    parser.add_argument('--compare', help="rapport JSON d'un run précédent")
+    parser.add_argument('--verbose', action='store_true', help="garder les logs du scraping")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    _, ok = run(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,10 @@ if os.getenv('ENVIRONMENT', 'development').lower() == 'production':
         'kedjenou': int(os.getenv('SCRAPING_KEDJENOU_INTERVAL', 432000)),        # 5 jours
         'afrikmall': int(os.getenv('SCRAPING_AFRIKMALL_INTERVAL', 432000)),      # 5 jours
         'bazart': int(os.getenv('SCRAPING_BAZART_INTERVAL', 432000)),            # 5 jours
-        'jumia': int(os.getenv('SCRAPING_JUMIA_INTERVAL', 432000))               # 5 jours
+        'jumia': int(os.getenv('SCRAPING_JUMIA_INTERVAL', 432000)),              # 5 jours
+        'abidjanmall': int(os.getenv('SCRAPING_ABIDJANMALL_INTERVAL', 432000)),  # 5 jours
+        'playce': int(os.getenv('SCRAPING_PLAYCE_INTERVAL', 432000)),            # 5 jours
+        'prosuma': int(os.getenv('SCRAPING_PROSUMA_INTERVAL', 432000))           # 5 jours
     }
 else:
     SCRAPING_INTERVALS = {
@@ -30,7 +33,10 @@ else:
         'kedjenou': int(os.getenv('SCRAPING_KEDJENOU_INTERVAL', 3600)),          # 1 heure
         'afrikmall': int(os.getenv('SCRAPING_AFRIKMALL_INTERVAL', 7200)),        # 2 heures
         'bazart': int(os.getenv('SCRAPING_BAZART_INTERVAL', 7200)),              # 2 heures
-        'jumia': int(os.getenv('SCRAPING_JUMIA_INTERVAL', 3600))                 # 1 heure
+        'jumia': int(os.getenv('SCRAPING_JUMIA_INTERVAL', 3600)),                # 1 heure
+        'abidjanmall': int(os.getenv('SCRAPING_ABIDJANMALL_INTERVAL', 7200)),    # 2 heures
+        'playce': int(os.getenv('SCRAPING_PLAYCE_INTERVAL', 7200)),              # 2 heures
+        'prosuma': int(os.getenv('SCRAPING_PROSUMA_INTERVAL', 7200))             # 2 heures
     }
 
 # Configuration des produits populaires
@@ -55,10 +61,54 @@ SCRAPING_TIMEOUTS = {
     'connection_timeout': int(os.getenv('SCRAPING_CONNECTION_TIMEOUT', 5))
 }
 
+# Configuration des pools de connexions HTTP (une session keep-alive par hôte)
+HTTP_POOL_CONFIG = {
+    'pool_connections': int(os.getenv('SCRAPING_POOL_CONNECTIONS', 10)),
+    'pool_maxsize': int(os.getenv('SCRAPING_POOL_MAXSIZE', 4)),
+    'pool_block': os.getenv('SCRAPING_POOL_BLOCK', 'false').lower() == 'true'
+}
+
+# Configuration du cache de pages (GET conditionnel ETag / Last-Modified)
+PAGE_CACHE_CONFIG = {
+    'enabled': os.getenv('SCRAPING_PAGE_CACHE_ENABLED', 'true').lower() == 'true',
+    'directory': os.getenv('SCRAPING_PAGE_CACHE_DIR', 'cache/pages')
+}
+
+# Sélecteurs de produits appris par SmartScraper (un motif par site, avec son taux de succès)
+SELECTOR_CACHE_CONFIG = {
+    'enabled': os.getenv('SCRAPING_SELECTOR_CACHE_ENABLED', 'true').lower() == 'true',
+    'path': os.getenv('SCRAPING_SELECTOR_CACHE_PATH', 'cache/selectors.json'),
+    # En dessous de ce taux (produits complets / éléments examinés), le motif est redécouvert
+    'min_success_rate': float(os.getenv('SCRAPING_SELECTOR_MIN_SUCCESS', 0.5))
+}
+
+# Enregistrement / rejeu des pages scrapées (off, record, replay)
+SNAPSHOT_CONFIG = {
+    'mode': os.getenv('SCRAPING_SNAPSHOT_MODE', 'off').lower(),
+    'directory': os.getenv('SCRAPING_SNAPSHOT_DIR', 'snapshots')
+}
+
+# Backend de parsing HTML : auto (le plus rapide installé), selectolax, lxml,
+# bs4-lxml ou bs4-html.parser
+PARSER_CONFIG = {
+    'backend': os.getenv('SCRAPING_PARSER_BACKEND', 'auto'),
+    # Processus de parsing (hors GIL de l'API) ; 0 = parsing dans les threads du pipeline
+    'processes': int(os.getenv('SCRAPING_PARSE_PROCESSES', 2)),
+    'start_method': os.getenv('SCRAPING_PARSE_START_METHOD', 'spawn')   # spawn, forkserver, fork
+}
+
+# Pagination par défaut des recherches (surchargée par STORE_CONFIG[...]['pagination'])
+PAGINATION_CONFIG = {
+    'max_pages': int(os.getenv('SCRAPING_MAX_PAGES', 3)),              # pages par recherche
+    'concurrency': int(os.getenv('SCRAPING_PAGE_CONCURRENCY', 2)),     # pages récupérées en même temps
+    'stop_on_known': os.getenv('SCRAPING_STOP_ON_KNOWN', 'true').lower() == 'true'
+}
+
 # Configuration des limites
 SCRAPING_LIMITS = {
     'max_products_per_store': int(os.getenv('SCRAPING_MAX_PRODUCTS', 20)),
     'max_workers': int(os.getenv('SCRAPING_MAX_WORKERS', 4)),
+    'max_per_store': int(os.getenv('SCRAPING_MAX_PER_STORE', 1)),
     'max_retries': int(os.getenv('SCRAPING_MAX_RETRIES', 3))
 }
 
@@ -79,66 +129,208 @@ SCRAPING_SCHEDULE = {
     'sunday': False
 }
 
+# Configuration du planificateur (file de priorité par échéance)
+SCHEDULER_CONFIG = {
+    'max_workers': int(os.getenv('SCRAPING_SCHEDULER_WORKERS', SCRAPING_LIMITS['max_workers'])),
+    'popular_interval': int(os.getenv('SCRAPING_POPULAR_INTERVAL', 4 * 3600)),  # 4 heures
+    'avoid_peak_hours': os.getenv('SCRAPING_AVOID_PEAK_HOURS', 'true').lower() == 'true'
+}
+
+# Pipeline de scraping : récupération -> parsing -> normalisation -> écriture,
+# étages reliés par des files bornées (la récupération suit SCRAPING_MAX_WORKERS
+# et SCRAPING_MAX_PER_STORE)
+PIPELINE_CONFIG = {
+    'parse_workers': int(os.getenv('SCRAPING_PARSE_WORKERS', 2)),
+    'normalize_workers': int(os.getenv('SCRAPING_NORMALIZE_WORKERS', 1)),
+    'persist_workers': int(os.getenv('SCRAPING_PERSIST_WORKERS', 1)),     # 1 : écritures sérialisées
+    'queue_size': int(os.getenv('SCRAPING_PIPELINE_QUEUE_SIZE', 16)),     # éléments par file
+    'persist_batch': int(os.getenv('SCRAPING_PERSIST_BATCH', 500)),       # prix par écriture
+    'flush_interval': float(os.getenv('SCRAPING_PERSIST_FLUSH', 2.0))     # secondes
+}
+
+# Métriques de scraping par magasin (histogrammes, codes HTTP, octets, lignes),
+# exportées en JSON et au format texte Prometheus par /api/scraper-stats
+METRICS_CONFIG = {
+    'enabled': os.getenv('SCRAPING_METRICS_ENABLED', 'true').lower() == 'true',
+    'runs': int(os.getenv('SCRAPING_METRICS_RUNS', 20))                  # passages gardés
+}
+
+# Sondes de disponibilité des magasins (en arrière-plan, en parallèle)
+HEALTH_CONFIG = {
+    'ttl': int(os.getenv('SCRAPING_HEALTH_TTL', 600)),                 # 10 minutes
+    'deadline': float(os.getenv('SCRAPING_HEALTH_DEADLINE', 5.0)),     # échéance d'un sondage
+    'query': os.getenv('SCRAPING_HEALTH_QUERY', 'test')
+}
+
+# Rafraîchissement adaptatif : un intervalle par couple (produit, magasin)
+# selon la volatilité observée, dans la limite d'un budget de requêtes par jour
+REFRESH_CONFIG = {
+    'enabled': os.getenv('SCRAPING_ADAPTIVE_REFRESH', 'true').lower() == 'true',
+    'daily_budget': int(os.getenv('SCRAPING_DAILY_REQUEST_BUDGET', 2000)),
+    'min_interval': int(os.getenv('SCRAPING_MIN_REFRESH_INTERVAL', 6 * 3600)),        # 6 heures
+    'max_interval': int(os.getenv('SCRAPING_MAX_REFRESH_INTERVAL', 14 * 86400)),      # 14 jours
+    'tick': int(os.getenv('SCRAPING_REFRESH_TICK', 900)),                              # 15 minutes
+    'prior_changes': float(os.getenv('SCRAPING_REFRESH_PRIOR_CHANGES', 1)),            # a priori :
+    'prior_days': float(os.getenv('SCRAPING_REFRESH_PRIOR_DAYS', 30))                  # 1 changement / 30 jours
+}
+
+# Recherche à la demande sur tous les magasins (première page de chacun) :
+# réponse sous une échéance, résultats tardifs enregistrés en arrière-plan
+LOOKUP_CONFIG = {
+    'deadline': float(os.getenv('SCRAPING_LOOKUP_DEADLINE', 3.0)),           # secondes
+    'max_deadline': float(os.getenv('SCRAPING_LOOKUP_MAX_DEADLINE', 10.0)),  # plafond demandé par le client
+    'workers': int(os.getenv('SCRAPING_LOOKUP_WORKERS', 16))                 # recherches de magasin en vol
+}
+
+# Cache des résultats des recherches à la demande, par (magasin, requête normalisée)
+RESULT_CACHE_CONFIG = {
+    'enabled': os.getenv('SCRAPING_RESULT_CACHE_ENABLED', 'true').lower() == 'true',
+    'ttl': float(os.getenv('SCRAPING_RESULT_CACHE_TTL', 900)),               # secondes : servi tel quel
+    'stale_ttl': float(os.getenv('SCRAPING_RESULT_CACHE_STALE', 3600)),      # ensuite : servi et rafraîchi en arrière-plan
+    'max_entries': int(os.getenv('SCRAPING_RESULT_CACHE_MAX_ENTRIES', 5000)),
+    'refresh_workers': int(os.getenv('SCRAPING_RESULT_CACHE_REFRESH_WORKERS', 4))
+}
+
+def _store_rate_limit(store_key):
+    """Débit autorisé pour un magasin (token bucket), par défaut 1 requête / store_delay"""
+    return {
+        'rate': float(os.getenv(f'SCRAPING_{store_key}_RATE', 1.0 / SCRAPING_DELAYS['store_delay'])),
+        'burst': int(os.getenv(f'SCRAPING_{store_key}_BURST', 1))
+    }
+
 # Configuration des magasins
+# Clés optionnelles (valeurs par défaut dans helpers/scrapper/generic.py) :
+#   extraction : champs obligatoires ('required') et nombre max de résultats
+#   pagination : paramètre de page ('param'), première page, nombre max de pages,
+#                pages récupérées en même temps ('concurrency'), sélecteur du
+#                lien « page suivante » ('next_selector', suivi à la place du paramètre)
+#   price      : devise, séparateurs de milliers / décimal, choix parmi
+#                plusieurs montants ('multiple' : first, min ou max)
 STORE_CONFIG = {
     'carrefour': {
         'enabled': os.getenv('SCRAPING_CARREFOUR_ENABLED', 'true').lower() == 'true',
+        'rate_limit': _store_rate_limit('CARREFOUR'),
         'name': 'Carrefour',
         'url_base': 'https://www.carrefour.ci',
         'search_url': 'https://www.carrefour.ci/recherche?q={query}',
         'selectors': {
             'product_container': '.product-item',
             'product_name': '.product-name',
-            'product_price': '.product-price',
-            'product_image': '.product-image img'
+            'product_price': '.price, .product-price',
+            'product_image': 'img'
         }
     },
     'kedjenou': {
         'enabled': os.getenv('SCRAPING_KEDJENOU_ENABLED', 'true').lower() == 'true',
+        'rate_limit': _store_rate_limit('KEDJENOU'),
         'name': 'Kedjenou',
-        'url_base': 'https://kedjenou.ci',
-        'search_url': 'https://kedjenou.ci/recherche?q={query}',
+        'url_base': 'https://www.kedjenou.ci',
+        'search_url': 'https://www.kedjenou.ci/recherche?q={query}',
         'selectors': {
             'product_container': '.product-card',
-            'product_name': 'h3, h2, .product-name',
-            'product_price': '.price, .amount',
+            'product_name': '.product-title, .product-name, h3, h2',
+            'product_price': '.product-price, .price, .amount',
             'product_image': 'img'
         }
     },
     'afrikmall': {
         'enabled': os.getenv('SCRAPING_AFRIKMALL_ENABLED', 'true').lower() == 'true',
+        'rate_limit': _store_rate_limit('AFRIKMALL'),
         'name': 'AfrikMall',
-        'url_base': 'https://afrikmall.com',
-        'search_url': 'https://afrikmall.com/search?q={query}',
+        'url_base': 'https://www.afrikmall.ci',
+        'search_url': 'https://www.afrikmall.ci/recherche?q={query}',
         'selectors': {
-            'product_container': '.product-card',
-            'product_name': 'h3, h2, .product-name',
-            'product_price': '.price, .amount',
+            'product_container': '.product-card, .product-item',
+            'product_name': '.product-name, .product-title, h3, h2',
+            'product_price': '.price, .product-price, .amount',
             'product_image': 'img'
         }
     },
     'bazart': {
         'enabled': os.getenv('SCRAPING_BAZART_ENABLED', 'true').lower() == 'true',
+        'rate_limit': _store_rate_limit('BAZART'),
         'name': 'Bazart',
-        'url_base': 'https://bazart.ci',
-        'search_url': 'https://bazart.ci/recherche?q={query}',
+        'url_base': 'https://www.bazart.ci',
+        'search_url': 'https://www.bazart.ci/recherche?q={query}',
         'selectors': {
             'product_container': '.product-card',
-            'product_name': 'h3, h2, .product-name',
-            'product_price': '.price, .amount',
+            'product_name': '.product-title, .product-name, h3, h2',
+            'product_price': '.product-price, .price, .amount',
             'product_image': 'img'
         }
     },
     'jumia': {
         'enabled': os.getenv('SCRAPING_JUMIA_ENABLED', 'true').lower() == 'true',
+        'rate_limit': _store_rate_limit('JUMIA'),
         'name': 'Jumia',
         'url_base': 'https://www.jumia.ci',
         'search_url': 'https://www.jumia.ci/catalog/?q={query}',
         'selectors': {
-            'product_container': '.sku',
-            'product_name': '.name',
+            'product_container': 'article.prd._fb.col.c-prd',
+            'product_name': 'h3.name',
+            'product_price': 'div.prc',
+            'product_image': 'img.img'
+        },
+        'pagination': {
+            'next_selector': 'a.pg[aria-label="Page suivante"]'
+        },
+        'extraction': {
+            'required': ['name', 'price', 'image'],
+            'max_results': None
+        }
+    },
+    # Nouveaux magasins : aucun code à écrire, le scraper générique
+    # (helpers/scrapper/generic.py) est construit depuis cette configuration.
+    # Désactivés par défaut tant que les sélecteurs n'ont pas été validés.
+    'abidjanmall': {
+        'enabled': os.getenv('SCRAPING_ABIDJANMALL_ENABLED', 'false').lower() == 'true',
+        'rate_limit': _store_rate_limit('ABIDJANMALL'),
+        'name': 'Abidjan Mall',
+        'url_base': 'https://abidjanmall.org',
+        'search_url': 'https://abidjanmall.org/catalogsearch/result/?q={query}',
+        'selectors': {
+            'product_container': '.product-item',
+            'product_name': '.product-item-link',
             'product_price': '.price',
-            'product_image': '.img'
+            'product_image': 'img.product-image-photo'
+        },
+        'pagination': {
+            'param': 'p',
+            'next_selector': '.pages-item-next a'
+        }
+    },
+    'playce': {
+        'enabled': os.getenv('SCRAPING_PLAYCE_ENABLED', 'false').lower() == 'true',
+        'rate_limit': _store_rate_limit('PLAYCE'),
+        'name': 'PlaYce',
+        'url_base': 'https://playce.ci',
+        'search_url': 'https://playce.ci/?s={query}&post_type=product',
+        'selectors': {
+            'product_container': 'li.product, .product-item',
+            'product_name': '.woocommerce-loop-product__title, .product-name, h2, h3',
+            'product_price': '.price ins .amount, .price .amount, .price',
+            'product_image': 'img'
+        },
+        'pagination': {
+            'param': 'paged',
+            'next_selector': 'a.next.page-numbers'
+        }
+    },
+    'prosuma': {
+        'enabled': os.getenv('SCRAPING_PROSUMA_ENABLED', 'false').lower() == 'true',
+        'rate_limit': _store_rate_limit('PROSUMA'),
+        'name': 'Prosuma',
+        'url_base': 'https://prosuma.ci',
+        'search_url': 'https://prosuma.ci/?s={query}&post_type=product',
+        'selectors': {
+            'product_container': 'li.product, .product-item',
+            'product_name': '.woocommerce-loop-product__title, .product-name, h2, h3',
+            'product_price': '.price ins .amount, .price .amount, .price',
+            'product_image': 'img'
+        },
+        'pagination': {
+            'param': 'paged',
+            'next_selector': 'a.next.page-numbers'
         }
     }
 }
@@ -174,7 +366,15 @@ NOTIFICATION_CONFIG = {
 DATABASE_CONFIG = {
     'batch_size': int(os.getenv('SCRAPING_BATCH_SIZE', 100)),
     'commit_interval': int(os.getenv('SCRAPING_COMMIT_INTERVAL', 50)),
-    'connection_timeout': int(os.getenv('SCRAPING_DB_TIMEOUT', 30))
+    'connection_timeout': int(os.getenv('SCRAPING_DB_TIMEOUT', 30)),
+    # Pool du moteur partagé des scripts autonomes (helpers/scrapper/script_db.py)
+    'pool_size': int(os.getenv('SCRAPING_DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('SCRAPING_DB_MAX_OVERFLOW', 5)),
+    'pool_recycle': int(os.getenv('SCRAPING_DB_POOL_RECYCLE', 3600)),
+    # 'changes' : une ligne ps_prices par changement de prix (historique complet),
+    #             un prix inchangé ne fait qu'avancer price_last_seen
+    # 'overwrite' : une seule ligne par couple (produit, magasin), mise à jour sur place
+    'price_history': os.getenv('SCRAPING_PRICE_HISTORY', 'changes')
 }
 
 # Configuration des erreurs et retry
@@ -184,6 +384,15 @@ ERROR_CONFIG = {
     'retry_delay': int(os.getenv('SCRAPING_RETRY_DELAY', 60))         # 1 minute
 }
 
+# Nouvelles tentatives d'une requête (timeout, connexion, 408 / 429 / 5xx) :
+# délai exponentiel avec gigue, plafonné par retry_delay, dans un budget total
+RETRY_CONFIG = {
+    'max_retries': SCRAPING_LIMITS['max_retries'],
+    'base_delay': float(os.getenv('SCRAPING_RETRY_BASE_DELAY', 0.5)),  # premier délai maximal
+    'max_delay': float(ERROR_CONFIG['retry_delay']),                    # plafond d'un délai
+    'budget': float(os.getenv('SCRAPING_RETRY_BUDGET', 30))            # secondes par requête, tentatives comprises
+}
+
 def get_store_config(store_id):
     """Retourne la configuration d'un magasin"""
     return STORE_CONFIG.get(store_id, {})
@@ -209,14 +418,16 @@ def get_store_selectors(store_id):
     store_config = get_store_config(store_id)
     return store_config.get('selectors', {})
 
-def is_peak_hour():
-    """Vérifie si c'est une heure de pointe"""
+def is_peak_hour(when=None):
+    """Vérifie si c'est une heure de pointe (maintenant ou à l'instant `when`)"""
     from datetime import datetime
-    now = datetime.now().time()
+    now = (when or datetime.now()).time()
     return PEAK_HOURS['start'] <= now <= PEAK_HOURS['end']
 
-def should_scrape_today():
-    """Vérifie si le scraping doit être effectué aujourd'hui"""
+def should_scrape_today(when=None):
+    """Vérifie si le scraping doit être effectué aujourd'hui (ou le jour de `when`)"""
     from datetime import datetime
-    today = datetime.now().strftime('%A').lower()
+    # Noms anglais quelle que soit la locale du serveur
+    days = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+    today = days[(when or datetime.now()).weekday()]
     return SCRAPING_SCHEDULE.get(today, True)
@@ -90,7 +90,8 @@ def create_mysql_tables():
                     product_is_active BOOLEAN DEFAULT TRUE NOT NULL,
                     creation_date DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
                     updated_on DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL,
-                    FOREIGN KEY (category_id) REFERENCES ps_categories(id)
+                    FOREIGN KEY (category_id) REFERENCES ps_categories(id),
+                    INDEX ix_ps_products_product_name (product_name)
                 )
             """)
             print(" Table ps_products créée")
@@ -106,13 +107,15 @@ def create_mysql_tables():
                     price_amount FLOAT NOT NULL,
                     price_currency VARCHAR(10) DEFAULT 'CFA',
                     price_date DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+                    price_last_seen DATETIME,
                     price_is_promo BOOLEAN DEFAULT FALSE,
                     price_promo_end DATETIME,
                     price_source VARCHAR(50) DEFAULT 'manual',
                     creation_date DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
                     updated_on DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP NOT NULL,
                     FOREIGN KEY (product_id) REFERENCES ps_products(id),
-                    FOREIGN KEY (store_id) REFERENCES ps_stores(id)
+                    FOREIGN KEY (store_id) REFERENCES ps_stores(id),
+                    INDEX ix_ps_prices_product_store_date (product_id, store_id, price_date)
                 )
             """)
             print(" Table ps_prices créée")
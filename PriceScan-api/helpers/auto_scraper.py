@@ -6,25 +6,31 @@
 Système de lancement automatique du scraping au démarrage de l'API
 """
 
-import threading
-import time
-import schedule
 import logging
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import random
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from collections import defaultdict
 
 # Import des modules de scraping
-from .scrapper.carrefour import scrape_carrefour
-from .scrapper.kedjenou import scrape_kedjenou
-from .scrapper.afrikmall import scrape_afrikmall
-from .scrapper.bazart import scrape_bazart
-from .scrapper.jumia import scrape_jumia
+from .scrapper.generic import get_store_scraper
+from .scrapper.engine import ScrapeEngine
+from .scrapper.scheduler import ScrapeScheduler
+from .scrapper.health import StoreHealthProber
+from .scrapper.circuit_breaker import get_circuit_breakers
+from .scrapper.metrics import get_scrape_metrics
+from .scrapper.retry import get_retry_policy
+from .scrapper.result_cache import get_result_cache
 
 # Import de la base de données
-from config.db import db
-from model.PriceScan_db import ps_products, ps_prices, ps_stores
-from config.scraping_config import SCRAPING_INTERVALS, STORE_CONFIG
+from model.PriceScan_db import ps_products, ps_stores
+from .price_ingest import ingest_scraped_rows
+from .scrape_pipeline import ScrapePipeline
+from .live_lookup import LiveLookup
+from .identity_index import get_identity_index
+from .refresh_policy import get_refresh_planner
+from config.scraping_config import (STORE_CONFIG, SCHEDULER_CONFIG, REFRESH_CONFIG, PAGINATION_CONFIG,
+                                   get_popular_products, get_scraping_interval)
 
 # Configuration du logging
 logging.basicConfig(
@@ -42,91 +48,53 @@ class AutoScraper:
     
     def __init__(self):
         self.is_running = False
-        self.scraping_thread = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.app = None
+        
+        # Planificateur : tas de tâches par échéance, exécutées par un pool de workers
+        self.scheduler = ScrapeScheduler()
         
-        # Configuration des magasins
+        # Configuration des magasins (un scraper générique par entrée de STORE_CONFIG)
         self.stores = {
-            'carrefour': {
-                'scraper': scrape_carrefour,
-                'name': 'Carrefour',
-                'enabled': STORE_CONFIG['carrefour']['enabled'],
-                'interval': SCRAPING_INTERVALS['carrefour'],
-                'last_run': None
-            },
-            'kedjenou': {
-                'scraper': scrape_kedjenou,
-                'name': 'Kedjenou',
-                'enabled': STORE_CONFIG['kedjenou']['enabled'],
-                'interval': SCRAPING_INTERVALS['kedjenou'],
-                'last_run': None
-            },
-            'afrikmall': {
-                'scraper': scrape_afrikmall,
-                'name': 'AfrikMall',
-                'enabled': STORE_CONFIG['afrikmall']['enabled'],
-                'interval': SCRAPING_INTERVALS['afrikmall'],
-                'last_run': None
-            },
-            'bazart': {
-                'scraper': scrape_bazart,
-                'name': 'Bazart',
-                'enabled': STORE_CONFIG['bazart']['enabled'],
-                'interval': SCRAPING_INTERVALS['bazart'],
-                'last_run': None
-            },
-            'jumia': {
-                'scraper': scrape_jumia,
-                'name': 'Jumia',
-                'enabled': STORE_CONFIG['jumia']['enabled'],
-                'interval': SCRAPING_INTERVALS['jumia'],
+            store_id: {
+                'scraper': get_store_scraper(store_id),
+                'name': config['name'],
+                'enabled': config['enabled'],
+                'interval': get_scraping_interval(store_id),
                 'last_run': None
             }
+            for store_id, config in STORE_CONFIG.items()
         }
         
         # Produits populaires à surveiller
-        self.popular_products = [
-            'smartphone', 'laptop', 'écran', 'clavier', 'souris',
-            'casque', 'enceinte', 'câble', 'chargeur', 'adaptateur',
-            'mémoire', 'disque dur', 'processeur', 'carte graphique'
-        ]
+        self.popular_products = get_popular_products()
         
-        logger.info("AutoScraper initialisé")
+        # Moteur concurrent (limite globale et par magasin)
+        self.engine = ScrapeEngine(self.stores)
         
-        # Tester la disponibilité des magasins
-        self.working_stores = self._test_store_availability()
-    
-    def _test_store_availability(self):
-        """Teste la disponibilité des magasins et retourne ceux qui fonctionnent"""
-        working_stores = []
-        test_product = "test"
+        # Récupération -> parsing -> normalisation -> écriture, en flux
+        self.pipeline = ScrapePipeline(self.engine)
         
-        for store_id, store_config in self.stores.items():
-            if not store_config['enabled']:
-                continue
-                
-            try:
-                logger.info(f"Test de disponibilité pour {store_config['name']}...")
-                # Test rapide avec timeout réduit
-                import signal
-                
-                def timeout_handler(signum, frame):
-                    raise TimeoutError(f"Timeout pour {store_config['name']}")
-                
-                # Test simple de connectivité
-                results = store_config['scraper'](test_product)
-                if results and len(results) > 0:
-                    working_stores.append(store_id)
-                    logger.info(f" {store_config['name']} - DISPONIBLE")
-                else:
-                    logger.warning(f" {store_config['name']} - AUCUN RÉSULTAT")
-                    
-            except Exception as e:
-                logger.warning(f" {store_config['name']} - NON DISPONIBLE: {e}")
-                continue
+        # Intervalles de rafraîchissement adaptés à la volatilité des prix
+        self.refresh_planner = get_refresh_planner()
         
-        logger.info(f"Magasins disponibles: {[self.stores[s]['name'] for s in working_stores]}")
-        return working_stores
+        # Noms de produits / magasins -> id, rechargé au début de chaque passage
+        self.identity_index = get_identity_index()
+        
+        # Disponibilité des magasins : sondée en arrière-plan, jamais à la construction
+        self.health = StoreHealthProber(self.stores)
+        
+        # Recherches en direct : réponse à l'échéance, enregistrement en arrière-plan
+        self.lookup = LiveLookup(self.stores)
+        
+        # Résultats des scrapings manuels par (magasin, requête normalisée)
+        self.result_cache = get_result_cache('manual')
+        
+        logger.info("AutoScraper initialisé")
+    
+    @property
+    def working_stores(self):
+        """Magasins disponibles au dernier sondage (sans attendre)"""
+        return self.health.working_stores()
     
     def start(self):
         """Démarre le scraping automatique"""
@@ -134,87 +102,99 @@ class AutoScraper:
             logger.warning("AutoScraper déjà en cours d'exécution")
             return
         
+        # Les tâches s'exécutent dans les workers du planificateur : garder l'application
+        from flask import current_app, has_app_context
+        self.app = current_app._get_current_object() if has_app_context() else None
+        
         self.is_running = True
-        self.scraping_thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.scraping_thread.start()
         
-        logger.info("AutoScraper démarré")
+        # Sondage des magasins en parallèle, sans bloquer le démarrage
+        self.health.refresh()
+        
+        # Premier scraping immédiat (tâche ponctuelle), puis chaque magasin à son intervalle
+        self.scheduler.add_job('initial', self._in_app_context(self._run_initial_scraping), None)
+        if REFRESH_CONFIG['enabled']:
+            # Intervalle par couple (produit, magasin) selon la volatilité des prix
+            self.scheduler.add_job('adaptive', self._in_app_context(self._run_adaptive_refresh),
+                                   REFRESH_CONFIG['tick'], delay=REFRESH_CONFIG['tick'])
+        else:
+            for store_id, store_config in self.stores.items():
+                if store_config['enabled']:
+                    self.scheduler.add_job(('store', store_id),
+                                           self._in_app_context(self._run_store_job, store_id),
+                                           store_config['interval'])
         
-        # Premier scraping immédiat
-        self._run_initial_scraping()
+        # Scraping des produits populaires toutes les 4 heures
+        self.scheduler.add_job('popular', self._in_app_context(self._scrape_popular_products),
+                               SCHEDULER_CONFIG['popular_interval'],
+                               delay=SCHEDULER_CONFIG['popular_interval'])
+        self.scheduler.start()
+        
+        logger.info("AutoScraper démarré")
     
     def stop(self):
         """Arrête le scraping automatique"""
         self.is_running = False
-        if self.scraping_thread:
-            self.scraping_thread.join(timeout=5)
-        self.executor.shutdown(wait=True)
+        self.scheduler.stop()
+        for key in list(self.scheduler.jobs):
+            self.scheduler.remove_job(key)
         logger.info("AutoScraper arrêté")
     
+    def _in_app_context(self, func, *args):
+        """Enveloppe une tâche pour qu'elle s'exécute dans le contexte de l'application"""
+        def job():
+            if self.app is None:
+                return func(*args)
+            with self.app.app_context():
+                return func(*args)
+        return job
+    
+    def _run_store_job(self, store_id):
+        """Tâche planifiée d'un magasin"""
+        store_config = self.stores[store_id]
+        logger.info(f"Lancement scraping {store_config['name']}")
+        store_config['last_run'] = datetime.now()
+        self._scrape_store(store_id, store_config)
+    
+    def _run_adaptive_refresh(self):
+        """Tâche planifiée : rescrape les couples échus selon le plan adaptatif"""
+        tick = REFRESH_CONFIG['tick']
+        self.refresh_planner.replan()
+        # Pages revenant à ce passage, converties en recherches (pages par recherche observées)
+        limit = self.refresh_planner.tick_limit(tick, PAGINATION_CONFIG['max_pages'])
+        jobs = [(store_id, product_name) for store_id, product_name in self.refresh_planner.due_jobs()
+                if self.stores.get(store_id, {}).get('enabled')][:limit]
+        if not jobs:
+            self.refresh_planner.record_tick(tick, 0, 0)
+            logger.info("Rafraîchissement adaptatif: aucun couple échu" if limit else
+                        "Rafraîchissement adaptatif: budget de pages épuisé")
+            return
+        for store_id, _ in jobs:
+            self.stores[store_id]['last_run'] = datetime.now()
+        pages = None
+        try:
+            # Pages de ce passage (pas last_run_stats, partagé avec les autres tâches du pipeline)
+            _, stats = self._scrape_and_save_by_product(jobs, "Rafraîchissement adaptatif")
+            pages = stats['stages']['fetch']['items_out']
+        finally:
+            # Passage en échec : aucune page comptée
+            self.refresh_planner.record_tick(tick, len(jobs) if pages is not None else 0, pages or 0)
+    
     def _run_initial_scraping(self):
         """Lance le premier scraping au démarrage"""
         logger.info("Lancement du scraping initial...")
         
+        # Attendre le sondage lancé par start() (au plus son échéance)
+        working_stores = self.health.working_stores(wait_for_result=True)
+        
         # Scraping immédiat des produits populaires sur les magasins disponibles
-        if not self.working_stores:
+        if not working_stores:
             logger.warning("Aucun magasin disponible - scraping initial annulé")
             return
             
-        for product in self.popular_products[:3]:  # Limiter à 3 produits pour démarrer vite
-            try:
-                # Scraper seulement sur les magasins qui fonctionnent
-                all_results = []
-                for store_id in self.working_stores:
-                    if store_id in self.stores and self.stores[store_id]['enabled']:
-                        try:
-                            results = self.stores[store_id]['scraper'](product)
-                            if results:
-                                all_results.extend(results)
-                            time.sleep(random.uniform(1, 2))  # Délai réduit
-                        except Exception as e:
-                            logger.warning(f"Magasin {self.stores[store_id]['name']} non disponible pour {product}: {e}")
-                            continue
-                
-                if all_results:
-                    self._save_popular_products_data(all_results, product)
-                    logger.info(f"Scraping initial {product} terminé: {len(all_results)} résultats")
-                else:
-                    logger.info(f"Aucun résultat pour {product} - magasins non disponibles")
-                    
-            except Exception as e:
-                logger.error(f"Erreur scraping initial {product}: {e}")
-                continue
-    
-    def _run_scheduler(self):
-        """Boucle principale du planificateur"""
-        while self.is_running:
-            try:
-                # Vérifier les magasins à scraper
-                current_time = datetime.now()
-                
-                for store_id, store_config in self.stores.items():
-                    if not store_config['enabled']:
-                        continue
-                    
-                    # Vérifier si c'est le moment de scraper ce magasin
-                    if (store_config['last_run'] is None or 
-                        (current_time - store_config['last_run']).total_seconds() >= store_config['interval']):
-                        
-                        logger.info(f"Lancement scraping {store_config['name']}")
-                        self._scrape_store(store_id, store_config)
-                        store_config['last_run'] = current_time
-                
-                # Scraping des produits populaires toutes les 4 heures
-                if current_time.hour % 4 == 0 and current_time.minute < 10:
-                    logger.info("Scraping des produits populaires")
-                    self._scrape_popular_products()
-                
-                # Attendre 1 minute avant la prochaine vérification
-                time.sleep(60)
-                
-            except Exception as e:
-                logger.error(f"Erreur dans le planificateur: {e}")
-                time.sleep(60)
+        products = self.popular_products[:3]  # Limiter à 3 produits pour démarrer vite
+        jobs = [(store_id, product) for product in products for store_id in working_stores]
+        self._scrape_and_save_by_product(jobs, "Scraping initial")
     
     def _scrape_store(self, store_id, store_config):
         """Scrape un magasin spécifique"""
@@ -231,19 +211,15 @@ class AutoScraper:
                     logger.info(f"Aucun produit trouvé pour {store_config['name']}")
                     return
                 
-                # Scraper chaque produit
-                for product in store_products:
-                    try:
-                        results = store_config['scraper'](product.product_name)
-                        
-                        if results:
-                            self._save_scraped_data(results, product, store_config['name'])
-                        
-                        time.sleep(random.uniform(0.5, 2))  # Délai aléatoire
-                        
-                    except Exception as e:
-                        logger.error(f"Erreur scraping produit {product.product_name}: {e}")
-                        continue
+                # Pipeline : les résultats sont enregistrés sous le nom du produit en base
+                self.identity_index.invalidate()
+                product_names = [product.product_name for product in store_products]
+                self.pipeline.run(
+                    [(store_id, name) for name in product_names],
+                    prepare=lambda _, product_name, result: dict(result, nom=product_name,
+                                                                 store=store_config['name']),
+                    app=self._flask_app()
+                )
                 
                 logger.info(f"Scraping {store_config['name']} terminé")
                 
@@ -255,204 +231,78 @@ class AutoScraper:
     def _scrape_popular_products(self):
         """Scrape les produits populaires"""
         try:
-            for product_name in self.popular_products:
-                try:
-                    # Scraper sur tous les magasins
-                    all_results = []
-                    
-                    for store_id, store_config in self.stores.items():
-                        if store_config['enabled']:
-                            try:
-                                results = store_config['scraper'](product_name)
-                                if results:
-                                    all_results.extend(results)
-                                time.sleep(random.uniform(1, 3))
-                            except Exception as e:
-                                logger.error(f"Erreur scraping {store_config['name']} pour {product_name}: {e}"),
-                    
-                    # Sauvegarder les résultats
-                    if all_results:
-                        self._save_popular_products_data(all_results, product_name)
-                    
-                except Exception as e:
-                    logger.error(f"Erreur scraping produit populaire {product_name}: {e}")
-                    continue
-            
+            jobs = [(store_id, product_name)
+                    for product_name in self.popular_products
+                    for store_id in self.stores]
+            self._scrape_and_save_by_product(jobs, "Scraping produits populaires")
             logger.info("Scraping des produits populaires terminé")
             
         except Exception as e:
             logger.error(f"Erreur scraping produits populaires: {e}")
-            # Continuer avec les autres produits
-            pass
     
-    def _scrape_product(self, product_name):
-        """Scrape un produit spécifique sur tous les magasins"""
-        try:
-            all_results = []
-            
-            for store_id, store_config in self.stores.items():
-                if store_config['enabled']:
-                    try:
-                        results = store_config['scraper'](product_name)
-                        if results:
-                            all_results.extend(results)
-                        time.sleep(random.uniform(0.5, 1.5))
-                    except Exception as e:
-                        logger.error(f"Erreur scraping {store_config['name']}: {e}")
-            
-            if all_results:
-                self._save_popular_products_data(all_results, product_name)
-                logger.info(f"Scraping {product_name} terminé: {len(all_results)} résultats")
-            
-        except Exception as e:
-            logger.error(f"Erreur scraping produit {product_name}: {e}")
-            # Continuer avec les autres produits
-            pass
+    def _scrape_and_save_by_product(self, jobs, label):
+        """
+        Exécute les couples (magasin, produit) dans le pipeline, enregistrés au
+        fil de l'eau ; retourne (résultats par couple, statistiques du passage)
+        """
+        self.identity_index.invalidate()
+        # Les résultats sans magasin viennent de Jumia (ancien format)
+        counts, stats = self.pipeline.run_with_stats(jobs, default_store='Jumia', app=self._flask_app())
+        
+        results_by_product = defaultdict(int)
+        for store_id, product_name in jobs:
+            results_by_product[product_name] += counts.get((store_id, product_name), 0)
+        
+        for product_name, count in results_by_product.items():
+            if count:
+                logger.info(f"{label} {product_name} terminé: {count} résultats")
+            else:
+                logger.info(f"Aucun résultat pour {product_name} - magasins non disponibles")
+        
+        return counts, stats
+    
+    def _flask_app(self):
+        """Application pour les écritures du pipeline (threads sans contexte)"""
+        from flask import current_app, has_app_context
+        if self.app is None and has_app_context():
+            return current_app._get_current_object()
+        return self.app
     
     def _save_scraped_data(self, results, product, store):
-        """Sauvegarde les données scrapées"""
-        try:
-            # Utiliser le contexte Flask pour accéder à la base de données
-            from flask import current_app
-            with current_app.app_context():
-                for result in results:
-                    if not isinstance(result, dict) or 'prix' not in result:
-                        logger.warning(f"Format de résultat invalide pour prix: {result}")
-                        continue
-                    
-                    # Extraire le prix et le convertir en nombre
-                    try:
-                        price_str = result['prix']
-                        # Nettoyer le prix (enlever "FCFA", espaces, etc.)
-                        price_clean = price_str.replace('FCFA', '').replace(' ', '').replace(',', '')
-                        price_amount = float(price_clean)
-                    except (ValueError, KeyError):
-                        logger.warning(f"Prix invalide: {result.get('prix', 'N/A')}")
-                        continue
-                        
-                    # Vérifier si le prix existe déjà
-                    existing_price = ps_prices.query.filter_by(
-                        product_id=product.id,
-                        store_id=store.id
-                    ).first()
-                    
-                    if existing_price:
-                        # Mettre à jour le prix existant
-                        existing_price.price_amount = price_amount
-                        existing_price.updated_on = datetime.now()
-                        db.session.add(existing_price)
-                    else:
-                        # Créer un nouveau prix
-                        new_price = ps_prices()
-                        new_price.product_id = product.id
-                        new_price.store_id = store.id
-                        new_price.price_amount = price_amount
-                        new_price.price_currency = 'CFA'  # Franc CFA
-                        new_price.price_is_promo = False
-                        new_price.price_source = 'scraper'
-                        db.session.add(new_price)
-                
-                db.session.commit()
-                logger.info(f"{len(results)} prix sauvegardés pour {product.product_name}")
-                
-        except Exception as e:
-            logger.error(f"Erreur sauvegarde données: {e}")
-            if 'db' in locals():
-                db.session.rollback()
+        """Sauvegarde les prix scrapés d'un produit connu dans un magasin"""
+        product_name = getattr(product, 'product_name', None)
+        store_name = getattr(store, 'store_name', store)
+        rows = [dict(result, nom=product_name or result.get('nom'), store=store_name)
+                for result in results if isinstance(result, dict)]
+        self._ingest(rows, product_name or 'résultats')
     
     def _save_popular_products_data(self, results, product_name):
         """Sauvegarde les données des produits populaires"""
+        # Les résultats sans magasin viennent de Jumia (ancien format)
+        self._ingest(results, product_name, default_store='Jumia')
+    
+    def _ingest(self, rows, label, default_store=None):
+        """Ingestion en masse (recherches ensemblistes + écritures par lots)"""
         try:
             # Utiliser le contexte Flask pour accéder à la base de données
             from flask import current_app
             with current_app.app_context():
-                # Filtrer les résultats valides (ignorer les métadonnées)
-                valid_results = []
-                for result in results:
-                    if isinstance(result, dict) and 'nom' in result and 'prix' in result:
-                        # Ajouter le nom du magasin s'il n'est pas présent
-                        if 'store' not in result:
-                            result['store'] = 'Jumia'  # Par défaut pour Jumia
-                        valid_results.append(result)
-                    elif isinstance(result, dict) and 'store' in result:
-                        # Résultat avec store déjà défini
-                        valid_results.append(result)
-                    # Ignorer les métadonnées (store, products, status, message)
-                
-                if not valid_results:
-                    logger.info(f"Aucun résultat valide trouvé pour {product_name}")
-                    return
-                
-                # Grouper par magasin
-                store_results = {}
-                for result in valid_results:
-                    store = result.get('store', 'Jumia')
-                    if store not in store_results:
-                        store_results[store] = []
-                    store_results[store].append(result)
-                
-                # Sauvegarder pour chaque magasin
-                for store_name, store_data in store_results.items():
-                    # Vérifier si le magasin existe
-                    store = ps_stores.query.filter_by(store_name=store_name).first()
-                    if not store:
-                        # Créer le magasin s'il n'existe pas
-                        store = ps_stores()
-                        store.store_name = store_name
-                        store.store_description = f"Magasin {store_name}"
-                        store.is_active = True
-                        store.created_at = datetime.now()
-                        store.updated_on = datetime.now()
-                        db.session.add(store)
-                        db.session.flush()  # Pour obtenir l'ID
-                    
-                    # Sauvegarder les produits et prix
-                    for result in store_data:
-                        if isinstance(result, dict) and 'nom' in result:
-                            # Vérifier si le produit existe
-                            product = ps_products.query.filter_by(product_name=result['nom']).first()
-                            if not product:
-                                # Créer le produit s'il n'existe pas
-                                product = ps_products()
-                                product.product_name = result['nom']
-                                product.product_description = f"Produit trouvé via scraping: {result['nom']}"
-                                product.is_active = True
-                                product.created_at = datetime.now()
-                                product.updated_on = datetime.now()
-                                db.session.add(product)
-                                db.session.flush()  # Pour obtenir l'ID
-                            
-                            # Sauvegarder le prix
-                            self._save_scraped_data([result], product, store)
-                        elif isinstance(result, dict) and 'name' in result:
-                            # Format alternatif avec 'name' au lieu de 'nom'
-                            product = ps_products.query.filter_by(product_name=result['name']).first()
-                            if not product:
-                                # Créer le produit s'il n'existe pas
-                                product = ps_products()
-                                product.product_name = result['name']
-                                product.product_description = f"Produit trouvé via scraping: {result['name']}"
-                                product.is_active = True
-                                product.created_at = datetime.now()
-                                product.updated_on = datetime.now()
-                                db.session.add(product)
-                                db.session.flush()  # Pour obtenir l'ID
-                            
-                            # Sauvegarder le prix
-                            self._save_scraped_data([result], product, store)
-                        else:
-                            logger.warning(f"Format de résultat invalide pour produit: {result}")
-                            continue
-                
-                logger.info(f"Données sauvegardées pour {product_name}: {len(results)} résultats")
+                stats = ingest_scraped_rows(rows, default_store=default_store)
+                if stats['rows'] == stats['rejected']:
+                    logger.info(f"Aucun résultat valide trouvé pour {label}")
+                    return stats
+                logger.info(f"Données sauvegardées pour {label}: {stats['inserted']} prix créés, "
+                            f"{stats['updated']} mis à jour, {stats['seen']} inchangés, {stats['rejected']} rejetés "
+                            f"({stats['statements']} requêtes, {stats['duration']}s)")
+                return stats
                 
         except Exception as e:
-            logger.error(f"Erreur sauvegarde produits populaires: {e}")
-            if 'db' in locals():
-                db.session.rollback()
+            logger.error(f"Erreur sauvegarde données: {e}")
+            return None
     
     def get_status(self):
         """Retourne le statut du scraping automatique"""
+        circuit_breakers = get_circuit_breakers().get_stats()
         return {
             'is_running': self.is_running,
             'stores': {
@@ -460,11 +310,28 @@ class AutoScraper:
                     'name': config['name'],
                     'enabled': config['enabled'],
                     'interval': config['interval'],
-                    'last_run': config['last_run'].isoformat() if config['last_run'] else None
+                    'last_run': config['last_run'].isoformat() if config['last_run'] else None,
+                    'circuit': circuit_breakers.get(store_id, {}).get('state')
                 }
                 for store_id, config in self.stores.items()
             },
-            'popular_products_count': len(self.popular_products)
+            'popular_products_count': len(self.popular_products),
+            # Dernier passage terminé du pipeline (`pipeline` : passage en cours s'il y en a un)
+            'last_run_stats': self.pipeline.last_run_stats,
+            'pipeline': self.pipeline.get_stats(),
+            'metrics': get_scrape_metrics().get_stats(runs=1),
+            'rate_limiter': self.engine.rate_limiter.get_stats(),
+            'circuit_breakers': circuit_breakers,
+            'retry': get_retry_policy().get_stats(),
+            'lookup': self.lookup.get_stats(),
+            'result_cache': {
+                'manual': self.result_cache.get_stats(),
+                'lookup': self.lookup.cache.get_stats()
+            },
+            'identity_index': self.identity_index.get_stats(),
+            'scheduler': self.scheduler.get_status(),
+            'health': self.health.get_status(),
+            'refresh': self.refresh_planner.get_stats(top=0)['summary']
         }
     
     def manual_scrape(self, product_name=None, store_id=None):
@@ -473,20 +340,35 @@ class AutoScraper:
             if product_name and store_id:
                 # Scraping d'un produit spécifique sur un magasin
                 if store_id in self.stores:
-                    store_config = self.stores[store_id]
-                    results = store_config['scraper'](product_name)
+                    results, cache_state = self._cached_scrape(store_id, product_name, self._flask_app())
                     if results:
-                        self._save_scraped_data(results, None, store_config['name'])
-                        return f" Scraping manuel terminé: {len(results)} résultats"
+                        source = f" (cache : {cache_state})" if cache_state not in ('miss', 'bypass') else ""
+                        return f" Scraping manuel terminé: {len(results)} résultats{source}"
                     else:
                         return "ℹ Aucun résultat trouvé"
                 else:
                     return " Magasin non trouvé"
             
             elif product_name:
-                # Scraping d'un produit sur tous les magasins
-                self._scrape_product(product_name)
-                return f" Scraping manuel de {product_name} terminé"
+                # Scraping d'un produit sur tous les magasins, chacun via le cache de résultats,
+                # dans les voies du moteur (places globales, limiteur de débit)
+                app = self._flask_app()
+                circuit_breakers = get_circuit_breakers()
+                enabled = [store_id for store_id, config in self.stores.items() if config['enabled']]
+                store_ids = [store_id for store_id in enabled if not circuit_breakers.is_open(store_id)]
+                cache_states = {}
+                
+                def scrape(store_id, query):
+                    results, cache_states[store_id] = self._cached_scrape(store_id, query, app)
+                    return results
+                
+                outputs = self.engine.run([(store_id, product_name) for store_id in store_ids], scrape=scrape)
+                count = sum(len(results) for _, _, results in outputs)
+                cached = sum(state in ('fresh', 'stale', 'collapsed') for state in cache_states.values())
+                skipped = len(enabled) - len(store_ids)
+                return (f" Scraping manuel de {product_name} terminé: {count} résultats "
+                        f"({cached}/{len(store_ids)} magasins depuis le cache"
+                        f"{f', {skipped} en pause (disjoncteur ouvert)' if skipped else ''})")
             
             else:
                 # Scraping de tous les magasins
@@ -499,21 +381,61 @@ class AutoScraper:
             logger.error(f" Erreur scraping manuel: {e}")
             return f" Erreur: {e}"
 
-# Instance globale
-auto_scraper = AutoScraper()
+    def _cached_scrape(self, store_id, product_name, app=None):
+        """
+        Scrape un produit sur un magasin en passant par le cache de résultats :
+        (résultats, état du cache). Seule une vraie récupération est enregistrée
+        """
+        store_config = self.stores[store_id]
+        
+        def load():
+            scraper = store_config['scraper']
+            if hasattr(scraper, 'scrape'):
+                # Toutes les pages téléchargées : une page inchangée ne donne aucun résultat à servir
+                results = scraper.scrape(product_name, use_cache=False)
+            else:
+                results = scraper(product_name)
+            if results:
+                # Le rafraîchissement en arrière-plan n'a pas de contexte Flask
+                with (app.app_context() if app is not None else nullcontext()):
+                    self._save_scraped_data(results, None, store_config['name'])
+            return results
+        
+        return self.result_cache.get(store_id, product_name, load)
+    
+    def live_lookup(self, query, deadline=None):
+        """Recherche en direct sur tous les magasins, résultats partiels à l'échéance"""
+        return self.lookup.lookup(query, deadline=deadline, app=self._flask_app())
+
+# Instance globale, créée au premier usage (l'import du module ne fait aucune I/O)
+_auto_scraper = None
+_auto_scraper_lock = threading.Lock()
+
+def get_auto_scraper():
+    """Retourne l'AutoScraper partagé"""
+    global _auto_scraper
+    if _auto_scraper is None:
+        with _auto_scraper_lock:
+            if _auto_scraper is None:
+                _auto_scraper = AutoScraper()
+    return _auto_scraper
 
 def start_auto_scraper():
     """Démarre le scraping automatique"""
-    auto_scraper.start()
+    get_auto_scraper().start()
 
 def stop_auto_scraper():
     """Arrête le scraping automatique"""
-    auto_scraper.stop()
+    get_auto_scraper().stop()
 
 def get_scraper_status():
     """Retourne le statut du scraping"""
-    return auto_scraper.get_status()
+    return get_auto_scraper().get_status()
 
 def manual_scrape(product_name=None, store_id=None):
     """Lance un scraping manuel"""
-    return auto_scraper.manual_scrape(product_name, store_id)
+    return get_auto_scraper().manual_scrape(product_name, store_id)
+
+def live_lookup(query, deadline=None):
+    """Recherche en direct sur tous les magasins (voir LiveLookup.lookup)"""
+    return get_auto_scraper().live_lookup(query, deadline)
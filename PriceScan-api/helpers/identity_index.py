@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Index d'identité en mémoire pour l'ingestion des prix scrapés
+Associe les noms normalisés (casse, accents, espaces, unités) des produits
+et des magasins à leur id : une résolution est une recherche dans un dict
+au lieu d'une requête par résultat. Chargé une fois par passage, complété
+au fil des insertions, reconstructible depuis la base.
+"""
+
+import re
+import sys
+import threading
+import unicodedata
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+
+from config.db import db
+from model.PriceScan_db import ps_products, ps_stores
+
+logger = logging.getLogger(__name__)
+
+# Unités ramenées à une forme unique (« 1,5 Litres » -> « 1.5l »)
+UNIT_ALIASES = {
+    'l': 'l', 'litre': 'l', 'litres': 'l', 'lt': 'l', 'ltr': 'l',
+    'cl': 'cl', 'ml': 'ml',
+    'kg': 'kg', 'kilo': 'kg', 'kilos': 'kg', 'kilogramme': 'kg', 'kilogrammes': 'kg',
+    'g': 'g', 'gr': 'g', 'grs': 'g', 'gramme': 'g', 'grammes': 'g',
+    'mg': 'mg',
+    'go': 'gb', 'gb': 'gb', 'to': 'tb', 'tb': 'tb', 'mo': 'mb', 'mb': 'mb',
+    'pouce': 'in', 'pouces': 'in', 'inch': 'in', 'inches': 'in', '"': 'in',
+    'mah': 'mah', 'w': 'w', 'watts': 'w', 'v': 'v', 'volts': 'v',
+    'cm': 'cm', 'mm': 'mm', 'm': 'm'
+}
+
+_QUANTITY_RE = re.compile(
+    r'(\d+(?:[.,]\d+)?)\s*(' + '|'.join(sorted((re.escape(u) for u in UNIT_ALIASES), key=len, reverse=True)) + r')(?![a-z])'
+)
+_NON_WORD_RE = re.compile(r'[^\w."]+')
+
+
+def _fold(text: str) -> str:
+    """Minuscules sans accents"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_store_name(name: str) -> str:
+    """Clé d'un magasin : casse, accents et espaces ignorés"""
+    return ' '.join(_fold(name or '').split())
+
+
+def normalize_product_name(name: str) -> str:
+    """
+    Clé d'un produit : casse, accents, ponctuation et espaces ignorés,
+    quantités et unités ramenées à une forme unique
+    """
+    text = _fold(name or '').replace('’', "'")
+    text = _QUANTITY_RE.sub(
+        lambda m: f" {m.group(1).replace(',', '.')}{UNIT_ALIASES[m.group(2)]} ", text
+    )
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+
+def _deep_size(mapping: dict) -> int:
+    """Taille approximative d'un dict de chaînes -> entiers (conteneur + clés + valeurs)"""
+    return sys.getsizeof(mapping) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in mapping.items())
+
+
+class IdentityIndex:
+    """Noms normalisés -> id, pour les produits et les magasins"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.products: Dict[str, int] = {}
+        self.stores: Dict[str, int] = {}
+        self.loaded_at: Optional[datetime] = None
+        self._stats = {'hits': 0, 'misses': 0, 'added': 0}
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def rebuild(self):
+        """Recharge l'index depuis la base (contexte d'application requis)"""
+        products_table, stores_table = ps_products.__table__, ps_stores.__table__
+        products, stores = {}, {}
+        # Par id croissant : le premier produit d'un nom garde la clé (comme un .first())
+        rows = db.session.execute(select(products_table.c.id, products_table.c.product_name).order_by(products_table.c.id))
+        for product_id, name in rows:
+            products.setdefault(normalize_product_name(name), product_id)
+        rows = db.session.execute(select(stores_table.c.id, stores_table.c.store_name).order_by(stores_table.c.id))
+        for store_id, name in rows:
+            stores.setdefault(normalize_store_name(name), store_id)
+
+        with self._lock:
+            self.products, self.stores = products, stores
+            self.loaded_at = datetime.now()
+        logger.info(f"Index d'identité chargé: {len(products)} produits, {len(stores)} magasins")
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.rebuild()
+
+    def invalidate(self):
+        """Force un rechargement au prochain usage (début d'un passage)"""
+        with self._lock:
+            self.loaded_at = None
+
+    def _get(self, mapping: dict, key: str) -> Optional[int]:
+        with self._lock:
+            found = mapping.get(key)
+            self._stats['hits' if found is not None else 'misses'] += 1
+        return found
+
+    def product_id(self, name: str) -> Optional[int]:
+        return self._get(self.products, normalize_product_name(name))
+
+    def store_id(self, name: str) -> Optional[int]:
+        return self._get(self.stores, normalize_store_name(name))
+
+    def _add(self, mapping: dict, key: str, row_id: int):
+        with self._lock:
+            if key not in mapping:
+                mapping[key] = row_id
+                self._stats['added'] += 1
+
+    def add_product(self, name: str, product_id: int):
+        self._add(self.products, normalize_product_name(name), product_id)
+
+    def add_store(self, name: str, store_id: int):
+        self._add(self.stores, normalize_store_name(name), store_id)
+
+    def memory_footprint(self) -> dict:
+        """Octets occupés par les deux tables (approximation sys.getsizeof)"""
+        with self._lock:
+            products = _deep_size(self.products)
+            stores = _deep_size(self.stores)
+        return {'products_bytes': products, 'stores_bytes': stores, 'total_bytes': products + stores}
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'products': len(self.products),
+                'stores': len(self.stores),
+                'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['memory'] = self.memory_footprint()
+        return stats
+
+
+def unique_by_key(names: Iterable[str], normalize) -> Dict[str, str]:
+    """Clé normalisée -> premier nom rencontré (évite les doublons d'un même lot)"""
+    unique = {}
+    for name in names:
+        unique.setdefault(normalize(name), name)
+    return unique
+
+
+_identity_index = None
+_identity_index_lock = threading.Lock()
+
+
+def get_identity_index() -> IdentityIndex:
+    """Retourne l'index d'identité partagé"""
+    global _identity_index
+    if _identity_index is None:
+        with _identity_index_lock:
+            if _identity_index is None:
+                _identity_index = IdentityIndex()
+    return _identity_index
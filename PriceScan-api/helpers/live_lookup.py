@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Recherche de prix en direct sur tous les magasins
+Une recherche absente du catalogue est lancée en même temps sur la première
+page de chaque magasin actif ; la réponse part à l'échéance (3 s par défaut)
+avec les résultats arrivés, magasin par magasin. Chaque magasin est
+enregistré en base en arrière-plan dès qu'il termine, avant ou après
+l'échéance. Les résultats récents sont servis par le cache `lookup`
+(voir scrapper/result_cache.py) sans nouvelle requête au magasin.
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from config.scraping_config import LOOKUP_CONFIG
+from .price_ingest import ingest_scraped_rows
+from .scrapper.circuit_breaker import StoreCircuitBreakers, get_circuit_breakers
+from .scrapper.result_cache import ResultCache, get_result_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LiveLookup:
+    """
+    Recherches à la demande sur `stores` (format de AutoScraper.stores).
+    Les recherches de magasin tournent dans un pool de `workers` threads
+    partagé par toutes les requêtes : une recherche qui dépasse l'échéance
+    continue sans retenir la réponse, puis est enregistrée à sa fin.
+    """
+
+    def __init__(self, stores: Dict[str, dict], deadline: Optional[float] = None,
+                 max_deadline: Optional[float] = None, workers: Optional[int] = None,
+                 circuit_breakers: Optional[StoreCircuitBreakers] = None,
+                 cache: Optional[ResultCache] = None):
+        self.stores = stores
+        self.deadline = deadline or LOOKUP_CONFIG['deadline']
+        self.max_deadline = max_deadline or LOOKUP_CONFIG['max_deadline']
+        self.workers = workers or LOOKUP_CONFIG['workers']
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self.cache = cache or get_result_cache('lookup')
+        self._executor = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'lookups': 0,
+            'complete': 0,        # tous les magasins avant l'échéance
+            'partial': 0,
+            'in_time': 0,         # recherches de magasin terminées avant l'échéance
+            'late': 0,            # terminées après : enregistrées seulement
+            'failed': 0,
+            'persisted': 0,       # prix enregistrés (créés, modifiés ou revus)
+            'persist_errors': 0,
+            'total_time': 0.0
+        }
+
+    def _executors(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='lookup')
+                # Écritures sérialisées, comme l'étage d'écriture du pipeline
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lookup-persist')
+            return self._executor, self._writer
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _search(self, store_id: str, query: str, app, writer):
+        started = time.monotonic()
+        results, cache_state = self.cache.get(store_id, query, lambda: self._fetch(store_id, query, app, writer))
+        return results, time.monotonic() - started, cache_state
+
+    def _fetch(self, store_id: str, query: str, app, writer):
+        scraper = self.stores[store_id]['scraper']
+        if hasattr(scraper, 'scrape_page'):
+            # Première page seulement, sans GET conditionnel : les résultats partent au client
+            results = scraper.scrape_page(query, use_cache=False)
+        else:
+            results = scraper(query)
+        if results:
+            # Une écriture par récupération (rafraîchissement du cache compris), jamais pour un succès du cache
+            writer.submit(self._persist, app, store_id, list(results))
+        return results
+
+    def _persist(self, app, store_id: str, results: list):
+        store_name = self.stores[store_id]['name']
+        rows = [dict(result, store=result.get('store') or store_name) for result in results if isinstance(result, dict)]
+        try:
+            with (app.app_context() if app is not None else nullcontext()):
+                stats = ingest_scraped_rows(rows)
+            self._count('persisted', stats['inserted'] + stats['updated'] + stats['seen'])
+        except Exception as e:
+            self._count('persist_errors')
+            logger.error(f"Erreur enregistrement recherche directe {store_name}: {e}")
+
+    def lookup(self, query: str, deadline: Optional[float] = None, app=None) -> dict:
+        """
+        Lance `query` sur tous les magasins actifs et retourne, à l'échéance :
+        {'query', 'deadline', 'elapsed', 'complete', 'stores': {store_id: état},
+        'pending': [store_id], 'results': [résultat + 'store_id']}.
+        L'enregistrement se fait dans `app.app_context()` si `app` est fourni.
+        """
+        deadline = min(max(deadline or self.deadline, 0.1), self.max_deadline)
+        executor, writer = self._executors()
+        started = time.monotonic()
+        stores = {}
+        store_ids = []
+        for store_id, config in self.stores.items():
+            if not config.get('enabled', True):
+                continue
+            if self.circuit_breakers.is_open(store_id):
+                stores[store_id] = {'name': config['name'], 'status': 'circuit_open', 'count': 0, 'latency': None,
+                                    'cache': None}
+                continue
+            store_ids.append(store_id)
+
+        arrived = {}
+        state = {'closed': False}
+        all_arrived = threading.Event()
+        if not store_ids:
+            all_arrived.set()
+
+        def on_done(store_id, future):
+            try:
+                results, latency, cache_state = future.result()
+                error = None
+            except Exception as e:
+                results, latency, cache_state, error = None, time.monotonic() - started, None, e
+            with self._lock:
+                if state['closed']:
+                    self._stats['late'] += 1
+                    return
+                arrived[store_id] = (results, latency, cache_state, error)
+                self._stats['in_time'] += 1
+                if len(arrived) == len(store_ids):
+                    all_arrived.set()
+
+        for store_id in store_ids:
+            future = executor.submit(self._search, store_id, query, app, writer)
+            future.add_done_callback(lambda future, store_id=store_id: on_done(store_id, future))
+
+        all_arrived.wait(deadline)
+        with self._lock:
+            state['closed'] = True
+            arrived = dict(arrived)
+
+        results = []
+        for store_id in store_ids:
+            name = self.stores[store_id]['name']
+            if store_id not in arrived:
+                stores[store_id] = {'name': name, 'status': 'pending', 'count': 0, 'latency': None,
+                                    'cache': None}
+                continue
+            store_results, latency, cache_state, error = arrived[store_id]
+            if error is not None:
+                status = 'error'
+                logger.warning(f"Recherche directe {name} pour {query}: {error}")
+            elif store_results is None:
+                status = 'unavailable'
+            else:
+                status = 'ok' if store_results else 'empty'
+            store_results = [dict(result, store_id=store_id) for result in store_results or []
+                             if isinstance(result, dict)]
+            stores[store_id] = {'name': name, 'status': status, 'count': len(store_results),
+                                'latency': round(latency, 3), 'cache': cache_state}
+            results.extend(store_results)
+
+        elapsed = time.monotonic() - started
+        pending = [store_id for store_id, store in stores.items() if store['status'] == 'pending']
+        with self._lock:
+            self._stats['lookups'] += 1
+            self._stats['complete' if not pending else 'partial'] += 1
+            self._stats['failed'] += sum(store['status'] in ('error', 'unavailable') for store in stores.values())
+            self._stats['total_time'] += elapsed
+        logger.info(f"Recherche directe {query}: {len(results)} résultats de "
+                    f"{len(store_ids) - len(pending)}/{len(store_ids)} magasins en {elapsed:.2f}s")
+        return {
+            'query': query,
+            'deadline': deadline,
+            'elapsed': round(elapsed, 3),
+            'complete': not pending,
+            'stores': stores,
+            'pending': pending,
+            'results': results
+        }
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['lookups']
+        stats['avg_time_ms'] = round(stats.pop('total_time') * 1000 / lookups, 1) if lookups else 0.0
+        stats.update(deadline=self.deadline, workers=self.workers)
+        return stats
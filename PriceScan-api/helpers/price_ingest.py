@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Ingestion en masse des prix scrapés
+Les magasins et produits sont résolus par requêtes ensemblistes (IN), puis
+les prix sont écrits par lots (executemany). En mode « changes » (défaut),
+seul un prix différent du dernier connu ajoute une ligne à ps_prices ; un
+prix inchangé ne fait qu'avancer price_last_seen, si bien que l'historique
+grandit avec les variations de prix et non avec la fréquence de scraping.
+En mode « overwrite », chaque couple (produit, magasin) garde une seule
+ligne, mise à jour sur place.
+Les noms sont résolus via l'index d'identité en mémoire (identity_index.py) ;
+seuls les noms inconnus de l'index interrogent la base.
+A appeler dans un contexte d'application Flask.
+"""
+
+import time
+import logging
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, func, insert, select, tuple_, update
+
+from config.db import db
+from config.scraping_config import DATABASE_CONFIG
+from model.PriceScan_db import ps_products, ps_prices, ps_stores
+from helpers.scrapper.prices import parse_prices, same_amount
+from helpers.refresh_policy import get_volatility_tracker
+from helpers.identity_index import (get_identity_index, normalize_product_name,
+                                    normalize_store_name, unique_by_key)
+
+logger = logging.getLogger(__name__)
+
+NORMALIZERS = {'product': normalize_product_name, 'store': normalize_store_name}
+HISTORY_MODES = ('changes', 'overwrite')
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def normalize_rows(rows, default_store=None):
+    """
+    Résultats de scraping -> {(nom produit, nom magasin): montant}
+    Accepte 'nom' ou 'name', 'prix' ou 'price' ; le dernier prix d'un couple l'emporte.
+    Les textes de prix du lot sont convertis en un seul passage (`parse_prices`).
+    Retourne aussi le nombre de lignes rejetées.
+    """
+    rows = list(rows)
+    valid = [row for row in rows if isinstance(row, dict)]
+    amounts = parse_prices([row.get('prix', row.get('price')) for row in valid])
+    prices = {}
+    rejected = len(rows) - len(valid)
+    for index, row in enumerate(valid):
+        name = row.get('nom') or row.get('name')
+        store = row.get('store') or default_store
+        amount = amounts.amount(index)
+        if not name or not store or amount is None:
+            rejected += 1
+            continue
+        prices[(name, store)] = amount
+    return prices, rejected
+
+
+class PriceIngestor:
+    """
+    Ecrit un ensemble de prix en quelques requêtes par lot de `batch_size`
+    lignes ; commit tous les `commit_interval` lots (et à la fin).
+    `history` : 'changes' ou 'overwrite' (par défaut DATABASE_CONFIG['price_history'])
+    """
+
+    def __init__(self, batch_size=None, commit_interval=None, source='scraper', index=None, use_index=True,
+                 history=None):
+        self.history = history or DATABASE_CONFIG['price_history']
+        if self.history not in HISTORY_MODES:
+            raise ValueError(f"Mode d'historique des prix inconnu: {self.history}")
+        self.index = (index or get_identity_index()) if use_index else None
+        self.batch_size = batch_size or DATABASE_CONFIG['batch_size']
+        self.commit_interval = commit_interval or DATABASE_CONFIG['commit_interval']
+        self.source = source
+        self._pending_batches = 0
+        self._staged_ids = []   # (kind, nom, id) ajoutés à l'index après le commit final
+        self.stats = {}
+
+    def _reset_stats(self):
+        self._pending_batches = 0
+        self._staged_ids = []
+        self.stats = {
+            'rows': 0,
+            'rejected': 0,
+            'stores_created': 0,
+            'products_created': 0,
+            'inserted': 0,
+            'updated': 0,
+            'seen': 0,
+            'statements': 0,
+            'commits': 0,
+            'duration': 0.0
+        }
+
+    def _execute(self, statement, params=None):
+        self.stats['statements'] += 1
+        return db.session.execute(statement, params) if params is not None else db.session.execute(statement)
+
+    def _batch_written(self):
+        self._pending_batches += 1
+        if self._pending_batches >= self.commit_interval:
+            self._commit()
+
+    def _commit(self):
+        db.session.commit()
+        self.stats['commits'] += 1
+        self._pending_batches = 0
+
+    def _lookup_ids(self, id_column, key_column, keys):
+        """{clé: plus petit id} pour les clés existantes (comme un .first())"""
+        found = {}
+        for chunk in _chunks(keys, self.batch_size):
+            rows = self._execute(select(id_column, key_column).where(key_column.in_(chunk)))
+            for row_id, key in rows:
+                if key not in found or row_id < found[key]:
+                    found[key] = row_id
+        return found
+
+    def _resolve(self, kind, table, key_column, names, make_row):
+        """
+        Ids des noms demandés : index d'identité d'abord (dict), puis la base
+        pour les absents (noms exacts, colonne indexée), et création des derniers
+        """
+        normalize = NORMALIZERS[kind]
+        by_key = unique_by_key(names, normalize)
+        ids = {}
+        missing = []
+        for key, name in by_key.items():
+            found = getattr(self.index, f'{kind}_id')(name) if self.index else None
+            if found is None:
+                missing.append(name)
+            else:
+                ids[key] = found
+
+        if missing:
+            known = self._lookup_ids(table.c.id, key_column, missing)
+            # La collation de la base peut renvoyer une autre casse : comparaison par clé
+            known_keys = {normalize(name) for name in known}
+            to_create = [name for name in missing if normalize(name) not in known_keys]
+            for chunk in _chunks(to_create, self.batch_size):
+                self._execute(insert(table), [make_row(name) for name in chunk])
+                self._batch_written()
+            self.stats[f'{kind}s_created'] += len(to_create)
+            if to_create:
+                known.update(self._lookup_ids(table.c.id, key_column, to_create))
+            for name, row_id in known.items():
+                ids.setdefault(normalize(name), row_id)
+                if self.index:
+                    # Une création annulée par un rollback ne doit pas rester dans l'index
+                    self._staged_ids.append((kind, name, row_id))
+
+        return {name: ids[normalize(name)] for name in names}
+
+    def _find_ids(self, kind, table, key_column, names):
+        """Ids des noms déjà connus (index d'identité puis base), sans création"""
+        normalize = NORMALIZERS[kind]
+        ids, missing = {}, []
+        for key, name in unique_by_key(names, normalize).items():
+            found = getattr(self.index, f'{kind}_id')(name) if self.index else None
+            if found is None:
+                missing.append(name)
+            else:
+                ids[key] = found
+        if missing:
+            for name, row_id in self._lookup_ids(table.c.id, key_column, missing).items():
+                ids.setdefault(normalize(name), row_id)
+        return {name: ids[normalize(name)] for name in names if normalize(name) in ids}
+
+    def _resolve_stores(self, names):
+        now = datetime.now()
+        table = ps_stores.__table__
+        return self._resolve(
+            'store', table, table.c.store_name, names,
+            lambda name: {'store_name': name, 'store_is_active': True,
+                          'creation_date': now, 'updated_on': now}
+        )
+
+    def _resolve_products(self, names):
+        now = datetime.now()
+        table = ps_products.__table__
+        return self._resolve(
+            'product', table, table.c.product_name, names,
+            lambda name: {'product_name': name,
+                          'product_description': f"Produit trouvé via scraping: {name}",
+                          'product_is_active': True, 'creation_date': now, 'updated_on': now}
+        )
+
+    def _existing_prices(self, pairs):
+        """
+        {(product_id, store_id): (id du prix, montant)} pour les couples déjà en base :
+        la ligne la plus récente (price_date, puis id) en mode 'changes', la
+        première (comme un .first()) en mode 'overwrite'. Une ligne lue par
+        couple, trouvée par l'index (product_id, store_id, price_date)
+        """
+        table = ps_prices.__table__
+        pair = tuple_(table.c.product_id, table.c.store_id)
+        existing = {}
+        for chunk in _chunks(pairs, self.batch_size):
+            # product_id seul en plus : recherche par l'index même sans support des IN sur tuples
+            in_chunk = and_(table.c.product_id.in_({product_id for product_id, _ in chunk}), pair.in_(chunk))
+            if self.history == 'changes':
+                newest = (
+                    select(table.c.product_id, table.c.store_id, func.max(table.c.price_date).label('price_date'))
+                    .where(in_chunk)
+                    .group_by(table.c.product_id, table.c.store_id)
+                    .subquery()
+                )
+                query = select(table.c.id, table.c.product_id, table.c.store_id, table.c.price_amount).join(
+                    newest, and_(table.c.product_id == newest.c.product_id, table.c.store_id == newest.c.store_id,
+                                 table.c.price_date == newest.c.price_date)
+                )
+            else:
+                first = select(func.min(table.c.id)).where(in_chunk) \
+                    .group_by(table.c.product_id, table.c.store_id)
+                query = select(table.c.id, table.c.product_id, table.c.store_id, table.c.price_amount) \
+                    .where(table.c.id.in_(first))
+            # Même price_date pour plusieurs lignes : la plus grande id l'emporte
+            for price_id, product_id, store_id, amount in self._execute(query.order_by(table.c.id)):
+                existing[(product_id, store_id)] = (price_id, amount)
+        return existing
+
+    def _write_prices(self, amounts):
+        table = ps_prices.__table__
+        existing = self._existing_prices(amounts)
+        now = datetime.now()
+
+        unchanged = {key for key, amount in amounts.items()
+                     if key in existing and same_amount(existing[key][1], amount)}
+        if self.history == 'overwrite':
+            # Sans historique en base, les changements observés alimentent
+            # l'estimation de volatilité (en mode 'changes', ps_prices suffit)
+            tracker = get_volatility_tracker()
+            for key in amounts:
+                if key in existing:
+                    tracker.record(key, key not in unchanged, now)
+
+        if self.history == 'changes':
+            # Prix inchangé : seul le dernier relevé avance ; sinon nouvelle ligne
+            seen = [existing[key][0] for key in unchanged]
+            updates = []
+            new_keys = [key for key in amounts if key not in unchanged]
+        else:
+            seen = []
+            updates = [{'_id': existing[key][0], '_amount': amount, '_now': now}
+                       for key, amount in amounts.items() if key in existing]
+            new_keys = [key for key in amounts if key not in existing]
+
+        inserts = [{'product_id': product_id, 'store_id': store_id, 'price_amount': amounts[(product_id, store_id)],
+                    'price_currency': 'CFA', 'price_is_promo': False, 'price_source': self.source,
+                    'price_date': now, 'price_last_seen': now, 'creation_date': now, 'updated_on': now}
+                   for product_id, store_id in new_keys]
+
+        for chunk in _chunks(seen, self.batch_size):
+            self._execute(update(table).where(table.c.id.in_(chunk)).values(price_last_seen=now))
+            self._batch_written()
+        update_statement = (update(table)
+                            .where(table.c.id == bindparam('_id'))
+                            .values(price_amount=bindparam('_amount'), price_last_seen=bindparam('_now'),
+                                    updated_on=bindparam('_now')))
+        for chunk in _chunks(updates, self.batch_size):
+            self._execute(update_statement, chunk)
+            self._batch_written()
+        for chunk in _chunks(inserts, self.batch_size):
+            self._execute(insert(table), chunk)
+            self._batch_written()
+
+        self.stats['seen'] += len(seen)
+        self.stats['updated'] += len(updates)
+        self.stats['inserted'] += len(inserts)
+
+    def ingest(self, rows, default_store=None) -> dict:
+        """
+        Enregistre une liste de résultats de scraping
+        ({'nom', 'prix', 'store'}) et retourne les statistiques d'écriture
+        """
+        started = time.perf_counter()
+        rows = list(rows)
+        prices, rejected = normalize_rows(rows, default_store)
+        stats = self.ingest_prices(prices, rows=len(rows), rejected=rejected)
+        self.stats['duration'] = stats['duration'] = round(time.perf_counter() - started, 4)
+        return stats
+
+    def ingest_prices(self, prices, rows=None, rejected=0) -> dict:
+        """
+        Enregistre des prix déjà normalisés ({(nom produit, nom magasin): montant},
+        voir `normalize_rows`) et retourne les statistiques d'écriture
+        """
+        self._reset_stats()
+        started = time.perf_counter()
+        self.stats['rows'] = len(prices) + rejected if rows is None else rows
+        self.stats['rejected'] = rejected
+
+        if prices:
+            try:
+                if self.index:
+                    self.index.ensure_loaded()
+                store_ids = self._resolve_stores(sorted({store for _, store in prices}))
+                product_ids = self._resolve_products(sorted({name for name, _ in prices}))
+                amounts = {(product_ids[name], store_ids[store]): amount
+                           for (name, store), amount in prices.items()}
+                self._write_prices(amounts)
+                self._commit()
+            except Exception:
+                db.session.rollback()
+                self._staged_ids = []
+                raise
+            for kind, name, row_id in self._staged_ids:
+                getattr(self.index, f'add_{kind}')(name, row_id)
+            self._staged_ids = []
+
+        self.stats['duration'] = round(time.perf_counter() - started, 4)
+        return dict(self.stats)
+
+    def mark_seen(self, pairs) -> dict:
+        """
+        Avance price_last_seen des couples (nom produit, nom magasin) déjà en
+        base, sans nouveau prix : leur page n'a pas changé depuis le dernier
+        passage. Les couples inconnus sont ignorés.
+        """
+        self._reset_stats()
+        started = time.perf_counter()
+        pairs = set(pairs)
+        if pairs:
+            try:
+                if self.index:
+                    self.index.ensure_loaded()
+                stores, products = ps_stores.__table__, ps_products.__table__
+                store_ids = self._find_ids('store', stores, stores.c.store_name, sorted({store for _, store in pairs}))
+                product_ids = self._find_ids('product', products, products.c.product_name,
+                                             sorted({name for name, _ in pairs}))
+                keys = {(product_ids[name], store_ids[store]) for name, store in pairs
+                        if name in product_ids and store in store_ids}
+                existing = self._existing_prices(keys) if keys else {}
+                now = datetime.now()
+                if self.history == 'overwrite':
+                    tracker = get_volatility_tracker()
+                    for key in existing:
+                        tracker.record(key, False, now)
+                table = ps_prices.__table__
+                for chunk in _chunks([price_id for price_id, _ in existing.values()], self.batch_size):
+                    self._execute(update(table).where(table.c.id.in_(chunk)).values(price_last_seen=now))
+                    self._batch_written()
+                self._commit()
+                self.stats['seen'] = len(existing)
+            except Exception:
+                db.session.rollback()
+                raise
+
+        self.stats['duration'] = round(time.perf_counter() - started, 4)
+        return dict(self.stats)
+
+
+def ingest_scraped_rows(rows, default_store=None, source='scraper', history=None) -> dict:
+    """Raccourci : ingestion en masse avec les réglages de DATABASE_CONFIG"""
+    return PriceIngestor(source=source, history=history).ingest(rows, default_store=default_store)
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+Fréquence de rafraîchissement adaptée à la volatilité des prix
+Le taux de changement de chaque couple (produit, magasin) est estimé à partir
+de l'historique de ps_prices et des changements observés à l'ingestion.
+Un budget fixe de requêtes par jour est ensuite réparti pour maximiser la
+fraîcheur moyenne : modèle de changements de Poisson, fraîcheur attendue
+F = (1 - e^-r) / r avec r = taux x intervalle, allocation optimale par
+multiplicateur de Lagrange, intervalles bornés par la configuration.
+L'historique est gardé en mémoire et complété à chaque replanification par
+les seules lignes de ps_prices modifiées depuis (rechargement complet une
+fois par jour). Le budget est compté en pages récupérées et réparti sur les
+heures où les passages ont lieu (calendrier du planificateur).
+"""
+
+import math
+import threading
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import or_, select
+
+from config.db import db
+from config.scraping_config import REFRESH_CONFIG, STORE_CONFIG, get_scraping_interval
+from model.PriceScan_db import ps_prices, ps_products, ps_stores
+from helpers.scrapper.scheduler import allowed_fraction
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[int, int]  # (product_id, store_id)
+
+DAY = 86400.0
+
+
+def expected_freshness(rate: float, interval: float) -> float:
+    """Probabilité moyenne qu'un prix en base soit encore exact"""
+    r = rate * interval
+    if r < 1e-9:
+        return 1.0
+    return (1.0 - math.exp(-r)) / r
+
+
+def _marginal_gain_inverse(target: float) -> float:
+    """r tel que 1 - e^-r (1 + r) = target (0 < target < 1), par dichotomie"""
+    low, high = 0.0, 64.0
+    for _ in range(48):
+        middle = (low + high) / 2
+        if 1.0 - math.exp(-middle) * (1.0 + middle) < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class VolatilityTracker:
+    """
+    Changements observés à l'ingestion (en mode 'overwrite', les prix sont
+    mis à jour sur place et ps_prices ne garde pas l'historique)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observations: Dict[Pair, list] = defaultdict(lambda: [0, 0, None, None])
+
+    def record(self, pair: Pair, changed: bool, when: Optional[datetime] = None):
+        when = when or datetime.now()
+        with self._lock:
+            entry = self._observations[pair]
+            entry[0] += 1
+            entry[1] += int(changed)
+            entry[2] = entry[2] or when
+            entry[3] = when
+
+    def snapshot(self) -> Dict[Pair, tuple]:
+        """{couple: (observations, changements, première, dernière)}"""
+        with self._lock:
+            return {pair: tuple(entry) for pair, entry in self._observations.items()}
+
+
+class RefreshPlanner:
+    """
+    Calcule un intervalle de rafraîchissement par couple (produit, magasin)
+    à partir d'un budget de requêtes par jour
+    """
+
+    def __init__(self, tracker: Optional[VolatilityTracker] = None, config: Optional[dict] = None):
+        self.tracker = tracker or VolatilityTracker()
+        self.config = {**REFRESH_CONFIG, **(config or {})}
+        self._lock = threading.Lock()
+        self.plan: Dict[Pair, dict] = {}
+        self.summary: dict = {}
+        self.planned_at: Optional[datetime] = None
+        # Historique tiré de la base, complété à chaque chargement
+        self._history: Dict[Pair, dict] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._full_load_at: Optional[datetime] = None
+        # Budget des passages : pages non dépensées (ou dépassées), pages par recherche
+        self._page_credit = 0.0
+        self._pages_per_job: Optional[float] = None
+
+    # --- estimation -----------------------------------------------------------
+
+    def _load_rows(self, since: Optional[datetime]):
+        """Lignes de ps_prices (avec les noms), seulement celles modifiées depuis `since` si donné"""
+        prices, products, stores = ps_prices.__table__, ps_products.__table__, ps_stores.__table__
+        query = (
+            select(prices.c.id, prices.c.product_id, prices.c.store_id, prices.c.price_amount,
+                   prices.c.price_date, prices.c.price_last_seen, prices.c.creation_date, prices.c.updated_on,
+                   products.c.product_name, stores.c.store_name)
+            .join(products, products.c.id == prices.c.product_id)
+            .join(stores, stores.c.id == prices.c.store_id)
+            .order_by(prices.c.product_id, prices.c.store_id, prices.c.price_date, prices.c.id)
+        )
+        if since is not None:
+            # >= : les lignes écrites dans la même seconde que le chargement précédent sont relues
+            query = query.where(or_(prices.c.creation_date >= since, prices.c.updated_on >= since,
+                                    prices.c.price_last_seen >= since))
+        return db.session.execute(query)
+
+    def _merge_rows(self, history: Dict[Pair, dict], rows) -> Optional[datetime]:
+        """Ajoute des lignes à l'historique ; retourne leur date la plus récente"""
+        latest = None
+        for price_id, product_id, store_id, amount, price_date, seen, created, updated, product_name, store_name \
+                in rows:
+            pair = (product_id, store_id)
+            first_seen = price_date or created
+            last_seen = seen or updated or first_seen
+            latest = max(filter(None, (latest, created, updated, seen)), default=None)
+            entry = history.get(pair)
+            if entry is None:
+                history[pair] = {
+                    'product_name': product_name, 'store_name': store_name, 'changes': 0,
+                    'first_seen': first_seen, 'last_seen': last_seen, 'amount': amount, 'last_id': price_id
+                }
+                continue
+            if price_id > entry['last_id']:
+                # Nouvelle ligne pour un couple : un montant différent est un changement
+                if amount != entry['amount']:
+                    entry['changes'] += 1
+                entry['amount'], entry['last_id'] = amount, price_id
+            elif price_id == entry['last_id']:
+                # Ligne relue (dernier relevé avancé, ou mise à jour sur place, comptée par le tracker)
+                entry['amount'] = amount
+            entry['first_seen'] = min(entry['first_seen'], first_seen)
+            entry['last_seen'] = max(entry['last_seen'], last_seen)
+        return latest
+
+    def load_history(self, now: Optional[datetime] = None) -> Dict[Pair, dict]:
+        """
+        Historique par couple : nombre de changements, durée observée,
+        dernier passage, noms du produit et du magasin (contexte d'application requis).
+        Seules les lignes modifiées depuis le chargement précédent sont lues,
+        sauf une fois par jour (lignes supprimées, noms modifiés)
+        """
+        now = now or datetime.now()
+        with self._lock:
+            history, since, full_load_at = self._history, self._loaded_until, self._full_load_at
+        if since is None or full_load_at is None or (now - full_load_at).total_seconds() >= DAY:
+            history, since, full_load_at = {}, None, now
+        else:
+            history = {pair: dict(entry) for pair, entry in history.items()}
+        latest = self._merge_rows(history, self._load_rows(since))
+        with self._lock:
+            self._history = history
+            self._loaded_until = max(filter(None, (since, latest)), default=None)
+            self._full_load_at = full_load_at
+
+        merged = dict(history)
+        for pair, (_, changes, first, last) in self.tracker.snapshot().items():
+            entry = merged.get(pair)
+            if entry:
+                merged[pair] = dict(entry, changes=entry['changes'] + changes,
+                                    first_seen=min(entry['first_seen'], first),
+                                    last_seen=max(entry['last_seen'], last))
+        return merged
+
+    def change_rate(self, changes: int, observed_seconds: float) -> float:
+        """
+        Taux de changement (par seconde), estimateur bayésien : l'a priori
+        vaut `prior_changes` changements sur `prior_days` jours
+        """
+        prior_seconds = self.config['prior_days'] * DAY
+        return (changes + self.config['prior_changes']) / (max(observed_seconds, 0.0) + prior_seconds)
+
+    # --- allocation -------------------------------------------------------------
+
+    def allocate(self, rates: Dict[Pair, float], daily_budget: Optional[float] = None) -> Dict[Pair, float]:
+        """
+        Fréquences (par seconde) maximisant la fraîcheur moyenne sous
+        la contrainte sum(f) = budget, bornées par min/max_interval
+        """
+        if not rates:
+            return {}
+        budget = (daily_budget or self.config['daily_budget']) / DAY
+        f_min = 1.0 / self.config['max_interval']
+        f_max = 1.0 / self.config['min_interval']
+
+        if len(rates) * f_max <= budget:
+            return {pair: f_max for pair in rates}
+        if len(rates) * f_min >= budget:
+            return {pair: f_min for pair in rates}
+
+        def frequency(rate, mu):
+            # Gain marginal dF/df = (1 - e^-r (1 + r)) / taux : égal à mu pour tous
+            target = mu * rate
+            if rate <= 0 or target >= 1.0:
+                return f_min
+            return min(f_max, max(f_min, rate / _marginal_gain_inverse(target)))
+
+        # Beaucoup de couples partagent le même taux : un calcul par taux distinct
+        counts = Counter(rates.values())
+        low, high = math.log(1e-3), math.log(1e15)
+        for _ in range(60):
+            mu = math.exp((low + high) / 2)
+            total = sum(count * frequency(rate, mu) for rate, count in counts.items())
+            if total > budget:
+                low = math.log(mu)
+            else:
+                high = math.log(mu)
+        mu = math.exp(high)
+        by_rate = {rate: frequency(rate, mu) for rate in counts}
+        return {pair: by_rate[rate] for pair, rate in rates.items()}
+
+    def _store_ids(self) -> Dict[str, str]:
+        """Nom de magasin -> clé de STORE_CONFIG"""
+        return {config['name']: store_id for store_id, config in STORE_CONFIG.items()}
+
+    def replan(self, daily_budget: Optional[float] = None, now: Optional[datetime] = None,
+               apply: bool = True) -> dict:
+        """
+        Recalcule les intervalles et le bilan fraîcheur / requêtes
+        (apply=False : simulation d'un autre budget, le plan en cours est conservé)
+        """
+        now = now or datetime.now()
+        history = self.load_history(now)
+        store_ids = self._store_ids()
+        # Seuls les magasins scrapés consomment le budget
+        history = {pair: entry for pair, entry in history.items() if entry['store_name'] in store_ids}
+
+        rates = {
+            pair: self.change_rate(entry['changes'], (entry['last_seen'] - entry['first_seen']).total_seconds())
+            for pair, entry in history.items()
+        }
+        frequencies = self.allocate(rates, daily_budget)
+
+        plan = {}
+        adaptive_requests = fixed_requests = adaptive_freshness = fixed_freshness = 0.0
+        for pair, entry in history.items():
+            interval = 1.0 / frequencies[pair]
+            fixed_interval = get_scraping_interval(store_ids[entry['store_name']])
+            plan[pair] = {
+                'product_name': entry['product_name'],
+                'store_name': entry['store_name'],
+                'store_id': store_ids[entry['store_name']],
+                'changes': entry['changes'],
+                'change_rate_per_day': rates[pair] * DAY,
+                'interval': interval,
+                'last_seen': entry['last_seen'],
+                'next_due': entry['last_seen'].timestamp() + interval
+            }
+            adaptive_requests += DAY / interval
+            fixed_requests += DAY / fixed_interval
+            adaptive_freshness += expected_freshness(rates[pair], interval)
+            fixed_freshness += expected_freshness(rates[pair], fixed_interval)
+
+        count = len(plan) or 1
+        summary = {
+            'pairs': len(plan),
+            'daily_budget': daily_budget or self.config['daily_budget'],
+            'adaptive': {
+                'requests_per_day': round(adaptive_requests, 1),
+                'expected_freshness': round(adaptive_freshness / count, 4)
+            },
+            'fixed_intervals': {
+                'requests_per_day': round(fixed_requests, 1),
+                'expected_freshness': round(fixed_freshness / count, 4)
+            },
+            'bounds': {'min_interval': self.config['min_interval'], 'max_interval': self.config['max_interval']},
+            'planned_at': now.isoformat()
+        }
+        if not apply:
+            return summary
+        with self._lock:
+            self.plan, self.summary, self.planned_at = plan, summary, now
+        logger.info(f"Plan de rafraîchissement: {len(plan)} couples, "
+                    f"{summary['adaptive']['requests_per_day']} requêtes/jour, "
+                    f"fraîcheur {summary['adaptive']['expected_freshness']} "
+                    f"(intervalles fixes: {summary['fixed_intervals']['expected_freshness']})")
+        return summary
+
+    def due_jobs(self, now: Optional[datetime] = None, limit: Optional[int] = None):
+        """(store_id, nom du produit) des couples échus, les plus en retard d'abord"""
+        timestamp = (now or datetime.now()).timestamp()
+        with self._lock:
+            due = sorted((entry['next_due'], entry['store_id'], entry['product_name'])
+                         for entry in self.plan.values() if entry['next_due'] <= timestamp)
+        jobs = list(dict.fromkeys((store_id, name) for _, store_id, name in due))
+        return jobs[:limit] if limit else jobs
+
+    def tick_budget(self, tick: float) -> float:
+        """
+        Pages à récupérer par passage : le budget journalier réparti sur les
+        seules heures où les passages ont lieu (les autres sont reportés)
+        """
+        return self.config['daily_budget'] * tick / (DAY * max(allowed_fraction(tick), 1.0 / 672))
+
+    def tick_limit(self, tick: float, max_pages: int) -> int:
+        """
+        Recherches à lancer ce passage : pages disponibles (part du passage et
+        reliquat des précédents) / pages récupérées par recherche (moyenne
+        observée, `max_pages` avant le premier passage)
+        """
+        with self._lock:
+            available = self.tick_budget(tick) + self._page_credit
+            pages_per_job = self._pages_per_job or max_pages
+        return max(0, int(available // max(pages_per_job, 1.0)))
+
+    def record_tick(self, tick: float, jobs: int, pages: int):
+        """Pages réellement récupérées par un passage de `jobs` recherches"""
+        budget = self.tick_budget(tick)
+        with self._lock:
+            # Le reliquat est plafonné à un passage, un dépassement est rendu aux suivants
+            self._page_credit = min(self._page_credit + budget - pages, budget)
+            if jobs:
+                observed = pages / jobs
+                self._pages_per_job = observed if self._pages_per_job is None else \
+                    0.8 * self._pages_per_job + 0.2 * observed
+
+    def get_stats(self, top: int = 20) -> dict:
+        """Bilan du dernier plan et les couples rafraîchis le plus souvent"""
+        with self._lock:
+            entries = sorted(self.plan.values(), key=lambda entry: entry['interval'])[:top]
+            return {
+                'summary': dict(self.summary, page_credit=round(self._page_credit, 1),
+                                pages_per_job=round(self._pages_per_job, 2) if self._pages_per_job else None),
+                'intervals': [{
+                    'product_name': entry['product_name'],
+                    'store_name': entry['store_name'],
+                    'changes': entry['changes'],
+                    'change_rate_per_day': round(entry['change_rate_per_day'], 4),
+                    'interval_hours': round(entry['interval'] / 3600, 2),
+                    'next_due': datetime.fromtimestamp(entry['next_due']).isoformat()
+                } for entry in entries]
+            }
+
+
+_refresh_planner = None
+_refresh_planner_lock = threading.Lock()
+
+
+def get_refresh_planner() -> RefreshPlanner:
+    """Retourne le planificateur de rafraîchissement partagé"""
+    global _refresh_planner
+    if _refresh_planner is None:
+        with _refresh_planner_lock:
+            if _refresh_planner is None:
+                _refresh_planner = RefreshPlanner()
+    return _refresh_planner
+
+
+def get_volatility_tracker() -> VolatilityTracker:
+    """Changements observés à l'ingestion (partagés avec le planificateur)"""
+    return get_refresh_planner().tracker
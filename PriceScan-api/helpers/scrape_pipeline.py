@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de scraping en flux
+récupération -> parsing -> normalisation -> écriture, chaque étage avec ses
+propres workers, reliés par des files bornées : réseau, CPU et base
+travaillent en même temps, et un étage lent bloque ses fournisseurs au lieu
+de laisser la mémoire grossir (contre-pression). Débit, occupation et
+profondeur de file par étage sont exportés : l'étage goulot est celui dont
+l'occupation est la plus haute.
+Une page nouvelle n'entre dans le cache de pages qu'une fois ses prix
+écrits (ou si elle n'en contient aucun) : après un échec, elle est
+reparsée au passage suivant au lieu d'être vue comme inchangée. L'entrée
+garde les couples (produit, magasin) de la page : quand elle revient
+inchangée, leur dernier relevé (price_last_seen) avance quand même.
+"""
+
+import queue
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config.scraping_config import PIPELINE_CONFIG
+from helpers.price_ingest import PriceIngestor, normalize_rows
+from helpers.scrapper.engine import ScrapeEngine
+from helpers.scrapper.parse_pool import ParsePool, get_parse_pool
+from helpers.scrapper.metrics import ScrapeMetrics, get_scrape_metrics
+from helpers.scrapper.retry import SlotLease
+from helpers.scrapper.utils import UnchangedResults
+from helpers.scrapper.page_cache import get_page_cache
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # fin de flux, un par worker de l'étage suivant
+
+STAGES = ('fetch', 'parse', 'normalize', 'persist')
+
+
+class StageStats:
+    """Compteurs d'un étage (protégés par leur propre verrou)"""
+
+    def __init__(self, name: str, workers: int, inbox: Optional[queue.Queue] = None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+        self._lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0        # temps de travail cumulé des workers
+        self.blocked = 0.0     # temps passé à attendre de la place dans la file suivante
+        self.max_depth = 0
+        self._depth_total = 0
+
+    def received(self):
+        depth = self.inbox.qsize() if self.inbox else 0
+        with self._lock:
+            self.items_in += 1
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_total += depth
+
+    def worked(self, seconds: float, produced: int = 1, failed: bool = False):
+        with self._lock:
+            self.busy += seconds
+            self.items_out += produced
+            self.errors += int(failed)
+
+    def waited(self, seconds: float):
+        with self._lock:
+            self.blocked += seconds
+
+    def to_dict(self, wall: float) -> dict:
+        with self._lock:
+            capacity = self.workers * wall
+            return {
+                'workers': self.workers,
+                'items_in': self.items_in,
+                'items_out': self.items_out,
+                'errors': self.errors,
+                'throughput': round(self.items_out / wall, 3) if wall > 0 else 0.0,
+                'busy_time': round(self.busy, 3),
+                'blocked_time': round(self.blocked, 3),
+                'utilization': round(min(self.busy / capacity, 1.0), 3) if capacity > 0 else 0.0,
+                'queue_depth': self.inbox.qsize() if self.inbox else 0,
+                'max_queue_depth': self.max_depth,
+                'avg_queue_depth': round(self._depth_total / self.items_in, 2) if self.items_in else 0.0
+            }
+
+
+class ScrapePipeline:
+    """
+    Exécute des couples (store_id, requête) à travers les quatre étages.
+
+    La récupération reprend les voies du moteur (`per_store_limit` par
+    magasin, places globales partagées, jeton du limiteur, disjoncteur) ;
+    les pages suivantes d'une recherche sont redemandées par le parsing
+    (`PageCrawl`), passent avant les nouvelles recherches du magasin et sont
+    récupérées ensemble, jusqu'à `concurrency` pages par voie.
+    """
+
+    def __init__(self, engine: ScrapeEngine, parse_workers: Optional[int] = None,
+                 normalize_workers: Optional[int] = None, persist_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, persist_batch: Optional[int] = None,
+                 flush_interval: Optional[float] = None, parse_pool: Optional[ParsePool] = None,
+                 metrics: Optional[ScrapeMetrics] = None):
+        self.engine = engine
+        self.parse_pool = parse_pool or get_parse_pool()
+        self.metrics = metrics or get_scrape_metrics()
+        # Avec le pool, les threads de parsing attendent les processus : au moins un par processus
+        self.parse_workers = max(parse_workers or PIPELINE_CONFIG['parse_workers'], self.parse_pool.processes)
+        self.normalize_workers = normalize_workers or PIPELINE_CONFIG['normalize_workers']
+        self.persist_workers = persist_workers or PIPELINE_CONFIG['persist_workers']
+        self.queue_size = queue_size or PIPELINE_CONFIG['queue_size']
+        self.persist_batch = persist_batch or PIPELINE_CONFIG['persist_batch']
+        self.flush_interval = flush_interval or PIPELINE_CONFIG['flush_interval']
+        self.last_run_stats = None
+        self._current = None  # (début, {étage: StageStats}, compteurs) du passage en cours
+        self._lock = threading.Lock()
+
+    # --- outils -------------------------------------------------------------
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stats: StageStats):
+        """Dépose dans la file suivante ; le temps bloqué mesure la contre-pression"""
+        started = time.monotonic()
+        target.put(item)
+        stats.waited(time.monotonic() - started)
+
+    def _workers(self, count: int, target: Callable, name: str):
+        threads = [threading.Thread(target=target, name=f'pipeline-{name}-{i}', daemon=True) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    # --- passage ------------------------------------------------------------
+
+    def run(self, jobs: Iterable[Tuple[str, str]], prepare: Optional[Callable[[str, str, dict], dict]] = None,
+            default_store: Optional[str] = None, app=None) -> Dict[Tuple[str, str], int]:
+        """
+        Scrape et enregistre les couples (store_id, requête) ; retourne
+        {(store_id, requête): nombre de résultats}.
+
+        `prepare(store_id, requête, résultat)` adapte chaque résultat avant
+        normalisation (par exemple pour imposer le nom du produit en base).
+        L'écriture se fait dans `app.app_context()` si `app` est fourni.
+        """
+        return self.run_with_stats(jobs, prepare, default_store, app)[0]
+
+    def run_with_stats(self, jobs: Iterable[Tuple[str, str]],
+                       prepare: Optional[Callable[[str, str, dict], dict]] = None,
+                       default_store: Optional[str] = None, app=None) -> Tuple[Dict[Tuple[str, str], int], dict]:
+        """
+        Comme `run`, en retournant aussi les statistiques de ce passage :
+        `last_run_stats` est partagé par les passages simultanés du pipeline
+        """
+        stores = self.engine.stores
+        pending_jobs = defaultdict(deque)
+        for store_id, query in jobs:
+            store_config = stores.get(store_id)
+            if store_config and store_config.get('enabled', True):
+                pending_jobs[store_id].append((query, None, None))
+
+        parse_queue = queue.Queue(self.queue_size)
+        normalize_queue = queue.Queue(self.queue_size)
+        persist_queue = queue.Queue(self.queue_size)
+        lanes = [store_id for store_id in pending_jobs for _ in range(self.engine.per_store_limit)]
+        stages = {
+            'fetch': StageStats('fetch', min(self.engine.max_workers, len(lanes)) if lanes else 0),
+            'parse': StageStats('parse', self.parse_workers, parse_queue),
+            'normalize': StageStats('normalize', self.normalize_workers, normalize_queue),
+            'persist': StageStats('persist', self.persist_workers, persist_queue)
+        }
+        totals = defaultdict(int)
+        started = time.time()
+        metrics_run = self.metrics.begin_run()
+        with self._lock:
+            self._current = (started, stages, totals)
+        # Les lots d'écriture sont par nom de magasin, les métriques par store_id
+        store_ids = {config['name']: store_id for store_id, config in stores.items()}
+
+        # État par recherche : résultats collectés, pagination, pages en attente de parsing
+        counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        crawls: Dict[Tuple[str, str], object] = {}
+        in_parsing = defaultdict(int)
+        condition = threading.Condition()
+        page_cache = get_page_cache()
+
+        def paginated(store_id):
+            scraper = stores[store_id]['scraper']
+            return getattr(scraper, 'pagination', {}).get('max_pages', 1) > 1
+
+        # --- étage 1 : récupération (voies par magasin) ---------------------
+        def fetch_lane(store_id):
+            store_config = stores[store_id]
+            scraper = store_config['scraper']
+            follow_ups = paginated(store_id)
+            window = getattr(scraper, 'pagination', {}).get('concurrency', 1)
+            stats = stages['fetch']
+            while True:
+                with condition:
+                    # Une page en cours de parsing peut encore demander la suivante
+                    while follow_ups and not pending_jobs[store_id] and in_parsing[store_id]:
+                        condition.wait()
+                    if not pending_jobs[store_id]:
+                        return
+                    query, page, url = pending_jobs[store_id].popleft()
+                    requests = [(page, url)]
+                    # Pages suivantes de la même recherche : récupérées ensemble
+                    while (page is not None and len(requests) < window and pending_jobs[store_id]
+                           and pending_jobs[store_id][0][0] == query and pending_jobs[store_id][0][1] is not None):
+                        requests.append(pending_jobs[store_id].popleft()[1:])
+                for _ in requests:
+                    stats.received()
+
+                if self.engine.circuit_breakers.is_open(store_id):
+                    with condition:
+                        totals['skipped'] += len(requests)
+                    continue
+
+                self.engine.rate_limiter.wait_for_store(store_id)
+                began = time.monotonic()
+                fetched, failed = [], False
+                with SlotLease(self.engine.global_slots):
+                    try:
+                        if hasattr(scraper, 'fetch_pages'):
+                            fetched = scraper.fetch_pages(query, requests)
+                        elif hasattr(scraper, 'fetch'):
+                            fetched = [(page, *scraper.fetch(query, page))]
+                        else:
+                            # Scraper sans étapes séparées : résultats déjà parsés
+                            fetched = [(page, None, scraper(query) or [])]
+                    except Exception as e:
+                        failed = True
+                        logger.error(f"Erreur récupération {store_config['name']} pour {query}: {e}")
+                        fetched = [(page, None, None) for page, _ in requests]
+                stats.worked(time.monotonic() - began, produced=len(fetched), failed=failed)
+
+                if follow_ups:
+                    with condition:
+                        in_parsing[store_id] += len(fetched)
+                for page, url, response in fetched:
+                    self._put(parse_queue, (store_id, query, page, url, response), stats)
+
+        # --- étage 2 : parsing --------------------------------------------
+        def parse_worker():
+            stats = stages['parse']
+            while True:
+                item = parse_queue.get()
+                if item is _DONE:
+                    return
+                stats.received()
+                store_id, query, page, url, response = item
+                scraper = stores[store_id]['scraper']
+                cache_entry = getattr(response, 'cache_entry', None)
+                began = time.monotonic()
+                page_results, results, next_pages, failed = None, [], [], False
+                try:
+                    if isinstance(response, list):
+                        page_results = results = response
+                    else:
+                        page_results = self.parse_pool.parse(scraper, url, response)
+                        # Pages parsées en parallèle : la pagination de la recherche est partagée
+                        with condition:
+                            crawl = crawls.get((store_id, query))
+                            if crawl is None:
+                                crawl = crawls[(store_id, query)] = scraper.crawl(query)
+                            page = page if page is not None else crawl.start
+                            results, next_pages = crawl.accept(page, page_results)
+                except Exception as e:
+                    failed = True
+                    logger.error(f"Erreur parsing {stores[store_id]['name']} pour {query}: {e}")
+                finally:
+                    with condition:
+                        pending_jobs[store_id].extendleft((query, number, link) for number, link in reversed(next_pages))
+                        if paginated(store_id):
+                            in_parsing[store_id] -= 1
+                        counts[(store_id, query)] += len(results)
+                        if isinstance(page_results, UnchangedResults):
+                            totals['unchanged'] += 1
+                        elif page_results is None:
+                            totals['failed_pages'] += 1
+                        condition.notify_all()
+                stats.worked(time.monotonic() - began, failed=failed)
+                if results:
+                    self._put(normalize_queue, (store_id, query, results, cache_entry), stats)
+                elif cache_entry and not failed:
+                    page_cache.commit(cache_entry)
+                elif isinstance(page_results, UnchangedResults) and url:
+                    # Page inchangée : ses prix sont toujours affichés, seul le dernier relevé avance
+                    seen = [tuple(key) for key in (page_cache.get(url) or {}).get('keys', [])]
+                    if seen:
+                        self._put(persist_queue, ({}, 0, None, seen), stats)
+
+        # --- étage 3 : normalisation --------------------------------------
+        def normalize_worker():
+            stats = stages['normalize']
+            while True:
+                item = normalize_queue.get()
+                if item is _DONE:
+                    return
+                stats.received()
+                store_id, query, results, cache_entry = item
+                began = time.monotonic()
+                prices, rejected, failed = {}, 0, False
+                try:
+                    store_name = stores[store_id]['name']
+                    rows = []
+                    for result in results:
+                        if isinstance(result, dict):
+                            result.setdefault('store', store_name)
+                        rows.append(prepare(store_id, query, result) if prepare else result)
+                    prices, rejected = normalize_rows(rows, default_store)
+                except Exception as e:
+                    failed = True
+                    logger.error(f"Erreur normalisation {store_id} pour {query}: {e}")
+                stats.worked(time.monotonic() - began, failed=failed)
+                if cache_entry is not None:
+                    cache_entry['keys'] = [list(key) for key in prices]
+                if prices or rejected:
+                    self._put(persist_queue, (prices, rejected, cache_entry, ()), stats)
+                elif cache_entry and not failed:
+                    page_cache.commit(cache_entry)
+
+        # --- étage 4 : écriture par lots -----------------------------------
+        def persist_worker():
+            stats = stages['persist']
+            ingestor = PriceIngestor()
+            batch, rejected, cache_entries, seen = {}, 0, [], set()
+
+            def flush():
+                nonlocal batch, rejected, cache_entries, seen
+                if not batch and not rejected and not seen:
+                    return
+                began = time.monotonic()
+                failed = False
+                try:
+                    written = []
+                    if batch or rejected:
+                        written.append(ingestor.ingest_prices(batch, rejected=rejected))
+                        rows_by_store = defaultdict(int)
+                        for _, store_name in batch:
+                            rows_by_store[store_ids.get(store_name, store_name)] += 1
+                        self.metrics.record_write(rows_by_store, time.monotonic() - began)
+                    # Couples des pages inchangées, sauf ceux réécrits par le lot
+                    seen.difference_update(batch)
+                    if seen:
+                        written.append(ingestor.mark_seen(seen))
+                    with condition:
+                        for stats_written in written:
+                            for key in ('rejected', 'inserted', 'updated', 'seen', 'statements', 'commits'):
+                                totals[key] += stats_written[key]
+                        totals['batches'] += 1
+                    # Pages du lot en base : elles peuvent entrer dans le cache
+                    for entry in cache_entries:
+                        page_cache.commit(entry)
+                except Exception as e:
+                    failed = True
+                    logger.error(f"Erreur écriture de {len(batch)} prix: {e}")
+                stats.worked(time.monotonic() - began, failed=failed)
+                batch, rejected, cache_entries, seen = {}, 0, [], set()
+
+            with (app.app_context() if app is not None else nullcontext()):
+                while True:
+                    try:
+                        item = persist_queue.get(timeout=self.flush_interval)
+                    except queue.Empty:
+                        flush()  # flux ralenti : ne pas garder les prix en mémoire
+                        continue
+                    if item is _DONE:
+                        flush()
+                        return
+                    stats.received()
+                    prices, item_rejected, cache_entry, item_seen = item
+                    batch.update(prices)
+                    rejected += item_rejected
+                    seen.update(item_seen)
+                    if cache_entry:
+                        cache_entries.append(cache_entry)
+                    if len(batch) + len(seen) >= self.persist_batch:
+                        flush()
+
+        # Démarrage de l'aval d'abord, puis arrêt étage par étage
+        persisters = self._workers(self.persist_workers, persist_worker, 'persist')
+        normalizers = self._workers(self.normalize_workers, normalize_worker, 'normalize')
+        parsers = self._workers(self.parse_workers, parse_worker, 'parse')
+        fetchers = [threading.Thread(target=fetch_lane, args=(store_id,), name=f'pipeline-fetch-{store_id}', daemon=True)
+                    for store_id in lanes]
+        for thread in fetchers:
+            thread.start()
+
+        for threads, next_queue, count in ((fetchers, parse_queue, len(parsers)),
+                                           (parsers, normalize_queue, len(normalizers)),
+                                           (normalizers, persist_queue, len(persisters)),
+                                           (persisters, None, 0)):
+            for thread in threads:
+                thread.join()
+            for _ in range(count):
+                next_queue.put(_DONE)
+
+        duration = time.time() - started
+        stats = self.last_run_stats = self._build_stats(started, stages, totals, duration, dict(counts))
+        self.metrics.end_run(metrics_run, jobs=stats['jobs'], results=stats['results'],
+                             bottleneck=stats['bottleneck'])
+        with self._lock:
+            self._current = None
+        logger.info(
+            f"Pipeline terminé: {sum(counts.values())} résultats, {totals['inserted']} prix créés, "
+            f"{totals['updated']} mis à jour, {totals['seen']} inchangés en {duration:.2f}s "
+            f"(goulot: {stats['bottleneck']})"
+        )
+        return dict(counts), stats
+
+    # --- statistiques ---------------------------------------------------------
+
+    @staticmethod
+    def _build_stats(started, stages, totals, wall, counts=None) -> dict:
+        stage_stats = {name: stages[name].to_dict(wall) for name in STAGES}
+        busiest = max(STAGES, key=lambda name: stage_stats[name]['utilization'])
+        stats = {
+            'started_at': started,
+            'duration': round(wall, 3),
+            'bottleneck': busiest if stage_stats[busiest]['utilization'] > 0 else None,
+            'stages': stage_stats,
+            'jobs': len(counts) if counts is not None else None,
+            'results': sum(counts.values()) if counts is not None else None
+        }
+        stats.update({key: totals[key] for key in ('skipped', 'unchanged', 'failed_pages', 'batches',
+                                                   'rejected', 'inserted', 'updated', 'seen', 'statements',
+                                                   'commits')})
+        return stats
+
+    def get_stats(self) -> Optional[dict]:
+        """Statistiques du passage en cours (profondeur des files en direct), sinon du dernier"""
+        with self._lock:
+            current = self._current
+        if current is None:
+            stats = dict(self.last_run_stats) if self.last_run_stats else None
+        else:
+            started, stages, totals = current
+            stats = self._build_stats(started, stages, totals, time.time() - started)
+            stats['running'] = True
+        if stats is not None:
+            stats['parse_pool'] = self.parse_pool.get_stats()
+        return stats
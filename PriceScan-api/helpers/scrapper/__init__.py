@@ -8,7 +8,19 @@ from .kedjenou import scrape_kedjenou
 from .afrikmall import scrape_afrikmall
 from .bazart import scrape_bazart
 from .jumia import scrape_jumia
+from .abidjanmall import scrape_abidjanmall
+from .playce import scrape_playce
+from .prosuma import scrape_prosuma
+from .generic import StoreScraper, get_store_scraper, scrape_store
 from .utils import fetch_page, clean_price
+from .prices import parse_prices, parse_amount
+from .engine import ScrapeEngine
+from .http_client import HttpClient, get_http_client
+from .rate_limiter import DomainRateLimiter, get_rate_limiter
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breakers
+from .metrics import ScrapeMetrics, get_scrape_metrics
+from .retry import RetryPolicy, get_retry_policy
+from .result_cache import ResultCache, get_result_cache
 
 __all__ = [
     'scrape_carrefour',
@@ -16,6 +28,28 @@ __all__ = [
     'scrape_afrikmall',
     'scrape_bazart',
     'scrape_jumia',
+    'scrape_abidjanmall',
+    'scrape_playce',
+    'scrape_prosuma',
+    'StoreScraper',
+    'get_store_scraper',
+    'scrape_store',
     'fetch_page',
-    'clean_price'
+    'clean_price',
+    'parse_prices',
+    'parse_amount',
+    'ScrapeEngine',
+    'HttpClient',
+    'get_http_client',
+    'DomainRateLimiter',
+    'get_rate_limiter',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'get_circuit_breakers',
+    'ScrapeMetrics',
+    'get_scrape_metrics',
+    'RetryPolicy',
+    'get_retry_policy',
+    'ResultCache',
+    'get_result_cache'
 ]
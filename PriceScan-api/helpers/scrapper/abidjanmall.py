@@ -1,17 +1,14 @@
-from .utils import fetch_page, clean_price
+# -*- coding: utf-8 -*-
+"""
+Scraper pour Abidjan Mall
+(URL, sélecteurs et règles de prix dans STORE_CONFIG['abidjanmall'])
+"""
 
-def scrape_abidjanmall(product_name):
-    url = f"https://abidjanmall.org/catalogsearch/result/?q={product_name.replace(' ', '+')}"
-    soup = fetch_page(url)
-    if not soup:
-        return []
+from .generic import scrape_store
 
-    results = []
-    for product in soup.select(".product-item"):
-        try:
-            name = product.select_one(".product-item-link").text.strip()
-            price = product.select_one(".price").text.strip()
-            results.append({"store": "Abidjan Mall", "name": name, "price": clean_price(price)})
-        except:
-            continue
-    return results
\ No newline at end of file
+
+def scrape_abidjanmall(query):
+    """
+    Scraper les produits Abidjan Mall
+    """
+    return scrape_store('abidjanmall', query)
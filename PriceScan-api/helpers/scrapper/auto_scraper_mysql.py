@@ -5,55 +5,23 @@ Auto-scraper PriceScan pour MySQL/MariaDB
 Scrape automatiquement les sites ivoiriens et enregistre dans la base de données
 """
 
-import requests
 from bs4 import BeautifulSoup
-import pymysql
-import uuid
 import time
 from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config.database_config import SQL_DB_URL
-import re
+from config.scraping_config import SCRAPING_LIMITS
+from helpers.scrapper.prices import parse_amount
+from helpers.scrapper.http_client import get_http_client
+from helpers.scrapper.script_db import CatalogWriter
 
 class PriceScanAutoScraper:
     def __init__(self):
         """Initialise le scraper avec la connexion MySQL"""
-        self.setup_mysql_connection()
+        self.writer = CatalogWriter(source='scraper')
         self.setup_stores()
         
-    def setup_mysql_connection(self):
-        """Configure la connexion MySQL"""
-        try:
-            # Extraire les informations de connexion
-            parts = SQL_DB_URL.replace("mysql+pymysql://", "").split("@")
-            user_pass = parts[0].split(":")
-            host_port_db = parts[1].split("/")
-            
-            self.user = user_pass[0]
-            self.password = user_pass[1] if len(user_pass) > 1 else ""
-            host_port = host_port_db[0].split(":")
-            self.host = host_port[0]
-            self.port = int(host_port[1]) if len(host_port) > 1 else 3306
-            self.database = host_port_db[1]
-            
-            print(f" Configuration MySQL : {self.host}:{self.port}/{self.database}")
-            
-        except Exception as e:
-            print(f" Erreur configuration MySQL : {e}")
-            raise
-    
-    def get_mysql_connection(self):
-        """Obtient une connexion MySQL"""
-        return pymysql.connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            password=self.password,
-            database=self.database
-        )
-    
     def setup_stores(self):
         """Configure les magasins ivoiriens dans la base"""
         stores = [
@@ -72,33 +40,12 @@ class PriceScanAutoScraper:
         ]
         
         try:
-            connection = self.get_mysql_connection()
-            with connection.cursor() as cursor:
-                for store in stores:
-                    # Vérifier si le magasin existe déjà
-                    cursor.execute(
-                        "SELECT id FROM ps_stores WHERE store_name = %s",
-                        (store['name'],)
-                    )
-                    
-                    if not cursor.fetchone():
-                        # Créer le magasin
-                        cursor.execute("""
-                            INSERT INTO ps_stores (store_uid, store_name, store_website, store_city, store_country)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (
-                            str(uuid.uuid4()),
-                            store['name'],
-                            store['website'],
-                            store['city'],
-                            store['country']
-                        ))
-                        print(f" Magasin créé : {store['name']}")
-                    else:
-                        print(f"ℹ️ Magasin existant : {store['name']}")
-            
-            connection.commit()
-            connection.close()
+            created = self.writer.ensure_stores(stores)
+            for store in stores:
+                if store['name'] in created:
+                    print(f" Magasin créé : {store['name']}")
+                else:
+                    print(f"ℹ️ Magasin existant : {store['name']}")
             print(" Configuration des magasins terminée")
             
         except Exception as e:
@@ -112,13 +59,6 @@ class PriceScanAutoScraper:
             # URL de base Carrefour
             base_url = "https://carrefour.ci"
             
-            # Headers pour éviter le blocage
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "fr-FR,fr;q=0.8,en-US;q=0.5,en;q=0.3"
-            }
-            
             # URLs spécifiques par catégorie pour Carrefour CI
             category_urls = {
                 'Électronique': f"{base_url}/electronique",
@@ -135,7 +75,8 @@ class PriceScanAutoScraper:
             
             print(f"📡 Accès à : {url}")
             
-            response = requests.get(url, headers=headers, timeout=15)
+            # Client HTTP partagé (en-têtes navigateur, connexions réutilisées)
+            response = get_http_client().get(url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -153,7 +94,7 @@ class PriceScanAutoScraper:
             for selector in selectors:
                 items = soup.select(selector)
                 if items:
-                    product_items = items[:5]  # Limiter à 5 produits
+                    product_items = items[:SCRAPING_LIMITS['max_products_per_store']]
                     print(f" Sélecteur trouvé : {selector} ({len(items)} éléments)")
                     break
             
@@ -234,115 +175,33 @@ class PriceScanAutoScraper:
             }]
     
     def clean_price(self, price_text):
-        """Nettoie et convertit le texte de prix en nombre"""
-        try:
-            # Supprimer les caractères non numériques sauf le point et la virgule
-            cleaned = re.sub(r'[^\d.,]', '', price_text)
-            
-            # Remplacer la virgule par un point pour la conversion
-            cleaned = cleaned.replace(',', '.')
-            
-            # Convertir en float
-            price = float(cleaned)
-            
-            # Si le prix semble trop petit, multiplier par 1000 (CFA)
-            if price < 100:
-                price *= 1000
-                
-            return price
-            
-        except:
-            return 0.0
+        """Nettoie et convertit le texte de prix en nombre (0.0 si rejeté)"""
+        return parse_amount(price_text) or 0.0
     
     def save_product_to_mysql(self, product_data):
         """Sauvegarde un produit dans MySQL"""
+        return self.save_products_to_mysql([product_data]) == 1
+    
+    def save_products_to_mysql(self, products):
+        """Sauvegarde les produits d'une catégorie en un lot ; retourne le nombre enregistré"""
         try:
-            connection = self.get_mysql_connection()
-            
-            with connection.cursor() as cursor:
-                # 1. Récupérer ou créer la catégorie
-                cursor.execute(
-                    "SELECT id FROM ps_categories WHERE cat_label = %s",
-                    (product_data['category'],)
-                )
-                category_result = cursor.fetchone()
-                
-                if category_result:
-                    category_id = category_result[0]
-                else:
-                    # Créer la catégorie si elle n'existe pas
-                    cursor.execute("""
-                        INSERT INTO ps_categories (cat_uid, cat_label, cat_description, cat_icon)
-                        VALUES (%s, %s, %s, %s)
-                    """, (
-                        str(uuid.uuid4()),
-                        product_data['category'],
-                        f'Catégorie {product_data["category"]}',
-                        f'icon_{product_data["category"].lower().replace(" ", "_")}'
-                    ))
-                    category_id = cursor.lastrowid
-                
-                # 2. Récupérer l'ID du magasin
-                cursor.execute(
-                    "SELECT id FROM ps_stores WHERE store_name = %s",
-                    (product_data['store'],)
-                )
-                store_result = cursor.fetchone()
-                
-                if not store_result:
-                    print(f" Magasin non trouvé : {product_data['store']}")
-                    return False
-                
-                store_id = store_result[0]
-                
-                # 3. Vérifier si le produit existe déjà
-                cursor.execute("""
-                    SELECT id FROM ps_products 
-                    WHERE product_name = %s AND category_id = %s
-                """, (product_data['name'], category_id))
-                
-                product_result = cursor.fetchone()
-                
-                if product_result:
-                    product_id = product_result[0]
-                    print(f"ℹ️ Produit existant : {product_data['name']}")
-                else:
-                    # 4. Créer le produit
-                    cursor.execute("""
-                        INSERT INTO ps_products (product_uid, product_name, product_description, category_id, product_image)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (
-                        str(uuid.uuid4()),
-                        product_data['name'],
-                        f'Produit {product_data["name"]}',
-                        category_id,
-                        product_data.get('image_url', '')
-                    ))
-                    product_id = cursor.lastrowid
-                    print(f" Produit créé : {product_data['name']}")
-                
-                # 5. Créer le prix
-                cursor.execute("""
-                    INSERT INTO ps_prices (price_uid, product_id, store_id, price_amount, price_currency, price_source)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    str(uuid.uuid4()),
-                    product_id,
-                    store_id,
-                    product_data['price'],
-                    'CFA',
-                    'scraper'
-                ))
-                
-                print(f" Prix enregistré : {product_data['name']} - {product_data['price']} CFA")
-            
-            connection.commit()
-            connection.close()
-            return True
+            stats = dict(self.writer.totals)
+            saved = self.writer.save_products(products)
+            created = self.writer.totals['inserted'] - stats['inserted']
+            seen = self.writer.totals['seen'] - stats['seen']
+            print(f" Prix enregistrés : {saved} produits ({created} nouveaux prix, {seen} inchangés)")
+            return saved
             
         except Exception as e:
             print(f" Erreur sauvegarde MySQL : {e}")
-            return False
+            return 0
+    
+    def report_database_usage(self):
+        """Connexions ouvertes et requêtes exécutées pendant le passage"""
+        stats = self.writer.run_stats()
+        print(f" Base : {stats['connections_opened']} connexions ouvertes, "
+              f"{stats['statements']} requêtes, {stats['saved']} produits enregistrés")
+        return stats
     
     def run_auto_scraping(self):
         """Lance l'auto-scraping complet"""
@@ -352,19 +211,19 @@ class PriceScanAutoScraper:
         categories = ['Électronique', 'Téléphonie', 'Informatique', 'Mode']
         
         total_products = 0
+        self.writer.start_run()
         
         for category in categories:
             print(f"\n Scraping de la catégorie : {category}")
             
-            # Scraper Carrefour
+            # Scraper Carrefour (produits de la catégorie enregistrés en un lot)
             carrefour_products = self.scrape_carrefour(category)
-            for product in carrefour_products:
-                if self.save_product_to_mysql(product):
-                    total_products += 1
+            total_products += self.save_products_to_mysql(carrefour_products)
             
             # Pause entre les catégories pour éviter le blocage
             time.sleep(2)
         
+        self.report_database_usage()
         print(f"\n🎉 Auto-scraping terminé ! {total_products} produits enregistrés dans MySQL")
         return total_products
 
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Disjoncteur par magasin
+Après `max_consecutive_errors` échecs consécutifs (timeout, connexion
+refusée, erreur 5xx / 429), le magasin n'est plus interrogé pendant
+`error_cooldown` secondes ; une seule requête d'essai passe ensuite
+(demi-ouvert) : un succès referme le circuit, un échec le rouvre.
+"""
+
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import requests
+
+from config.scraping_config import ERROR_CONFIG, STORE_CONFIG
+from .rate_limiter import _domain
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Requête refusée sans appel réseau : le circuit du magasin est ouvert"""
+
+
+class CircuitBreaker:
+    """États fermé -> ouvert -> demi-ouvert d'un magasin"""
+
+    def __init__(self, name: str, max_failures: Optional[int] = None, cooldown: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self.name = name
+        self.max_failures = max(1, max_failures or ERROR_CONFIG['max_consecutive_errors'])
+        self.cooldown = cooldown if cooldown is not None else ERROR_CONFIG['error_cooldown']
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def _retry_at(self) -> Optional[float]:
+        return self.opened_at + self.cooldown if self.state == OPEN else None
+
+    def allow(self) -> bool:
+        """Vrai si une requête peut partir (passe en demi-ouvert après le délai)"""
+        with self._lock:
+            if self.state == OPEN and self.clock() >= self._retry_at():
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+                logger.info(f"Circuit {self.name} demi-ouvert : requête d'essai")
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Vrai si le magasin est en période de refroidissement (sans changer l'état)"""
+        with self._lock:
+            return self.state == OPEN and self.clock() < self._retry_at()
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self.failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuit {self.name} refermé")
+            self.state = CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self._stats['failures'] += 1
+            self.failures += 1
+            self.last_error = error
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.max_failures):
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._stats['opened'] += 1
+                logger.warning(f"Circuit {self.name} ouvert après {self.failures} échecs consécutifs "
+                               f"({error}) : pause de {self.cooldown}s")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            retry_at = self._retry_at()
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'max_failures': self.max_failures,
+                'cooldown': self.cooldown,
+                'opened_at': datetime.fromtimestamp(self.opened_at).isoformat() if self.opened_at else None,
+                'retry_at': datetime.fromtimestamp(retry_at).isoformat() if retry_at else None,
+                'last_error': self.last_error,
+                **self._stats
+            }
+
+
+def is_store_failure(response: requests.Response) -> bool:
+    """Réponse qui signale un magasin indisponible ou saturé"""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class StoreCircuitBreakers:
+    """
+    Un `CircuitBreaker` par domaine de magasin (comme le limiteur de débit).
+    Les domaines inconnus ne sont pas protégés.
+    """
+
+    def __init__(self, store_config: Optional[dict] = None, max_failures: Optional[int] = None,
+                 cooldown: Optional[float] = None):
+        store_config = STORE_CONFIG if store_config is None else store_config
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._by_domain: Dict[str, CircuitBreaker] = {}
+
+        for store_id, config in store_config.items():
+            domain = _domain(config.get('url_base', ''))
+            if not domain:
+                continue
+            breaker = CircuitBreaker(config.get('name', store_id), max_failures, cooldown)
+            self._breakers[store_id] = breaker
+            self._by_domain[domain] = breaker
+
+    def for_url(self, url: str) -> Optional[CircuitBreaker]:
+        return self._by_domain.get(_domain(url))
+
+    def for_store(self, store_id: str) -> Optional[CircuitBreaker]:
+        return self._breakers.get(store_id)
+
+    def is_open(self, store_id: str) -> bool:
+        breaker = self._breakers.get(store_id)
+        return bool(breaker and breaker.is_open())
+
+    def get_stats(self) -> dict:
+        """État du disjoncteur de chaque magasin"""
+        return {store_id: breaker.to_dict() for store_id, breaker in self._breakers.items()}
+
+
+_circuit_breakers = None
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> StoreCircuitBreakers:
+    """Retourne les disjoncteurs partagés par le client HTTP"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        with _circuit_breakers_lock:
+            if _circuit_breakers is None:
+                _circuit_breakers = StoreCircuitBreakers()
+    return _circuit_breakers
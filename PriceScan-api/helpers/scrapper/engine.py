@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de scraping concurrent pour PriceScan
+Exécute les couples (magasin, produit) en parallèle avec une limite
+globale et une limite par magasin
+"""
+
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.scraping_config import SCRAPING_LIMITS
+from .rate_limiter import DomainRateLimiter, get_rate_limiter
+from .circuit_breaker import StoreCircuitBreakers, get_circuit_breakers
+from .retry import SlotLease
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeEngine:
+    """
+    Répartit les recherches sur tous les magasins en même temps.
+
+    Chaque magasin dispose de ses propres « voies » (au plus
+    `per_store_limit` requêtes en vol), et le nombre total de requêtes
+    en vol est borné par `max_workers`. La politesse est assurée par le
+    limiteur de débit par domaine : une voie attend le jeton de son magasin
+    avant de prendre une place globale, donc attendre Jumia ne retarde pas
+    Carrefour. La limite globale vaut aussi pour plusieurs `run` simultanés.
+    Les requêtes d'un magasin dont le disjoncteur est ouvert sont sautées,
+    et une voie en pause avant une nouvelle tentative rend sa place globale.
+    """
+
+    def __init__(self, stores: Dict[str, dict], max_workers: Optional[int] = None,
+                 per_store_limit: Optional[int] = None, rate_limiter: Optional[DomainRateLimiter] = None,
+                 circuit_breakers: Optional[StoreCircuitBreakers] = None):
+        self.stores = stores
+        self.max_workers = max_workers or SCRAPING_LIMITS['max_workers']
+        self.per_store_limit = per_store_limit or SCRAPING_LIMITS['max_per_store']
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+        self.last_run_stats = None
+        # Partagé entre les runs simultanés (tâches du planificateur, pipeline)
+        self.global_slots = threading.BoundedSemaphore(self.max_workers)
+
+    def run(self, jobs: Iterable[Tuple[str, str]],
+            on_result: Optional[Callable[[str, str, list], None]] = None,
+            scrape: Optional[Callable[[str, str], list]] = None) -> List[Tuple[str, str, list]]:
+        """
+        Exécute les couples (store_id, requête) et retourne
+        une liste de (store_id, requête, résultats).
+
+        `on_result` est appelé depuis le thread de travail dès qu'un couple
+        est terminé (utile pour enregistrer au fil de l'eau).
+        `scrape(store_id, requête)` remplace l'appel du scraper du magasin
+        (par exemple pour passer par un cache de résultats).
+        """
+        queues = defaultdict(deque)
+        for store_id, query in jobs:
+            store_config = self.stores.get(store_id)
+            if not store_config or not store_config.get('enabled', True):
+                continue
+            queues[store_id].append(query)
+
+        stats = {
+            'started_at': time.time(),
+            'jobs': sum(len(q) for q in queues.values()),
+            'requests': 0,
+            'results': 0,
+            'errors': 0,
+            'unchanged': 0,
+            'skipped': 0,
+            'stores': {
+                store_id: {'requests': 0, 'results': 0, 'errors': 0, 'unchanged': 0, 'skipped': 0, 'busy_time': 0.0}
+                for store_id in queues
+            }
+        }
+        outputs = []
+        lock = threading.Lock()
+        global_slots = self.global_slots
+
+        def lane(store_id):
+            store_config = self.stores[store_id]
+            while True:
+                with lock:
+                    if not queues[store_id]:
+                        return
+                    query = queues[store_id].popleft()
+
+                # Disjoncteur ouvert : ni attente du jeton, ni requête
+                if self.circuit_breakers.is_open(store_id):
+                    with lock:
+                        stats['stores'][store_id]['skipped'] += 1
+                        stats['skipped'] += 1
+                        outputs.append((store_id, query, []))
+                    continue
+
+                # Attendre le jeton du magasin sans occuper de place globale
+                self.rate_limiter.wait_for_store(store_id)
+
+                results = []
+                failed = False
+                with SlotLease(global_slots):
+                    started = time.monotonic()
+                    try:
+                        results = (scrape(store_id, query) if scrape else store_config['scraper'](query)) or []
+                    except Exception as e:
+                        failed = True
+                        logger.error(f"Erreur scraping {store_config['name']} pour {query}: {e}")
+                    elapsed = time.monotonic() - started
+
+                for result in results:
+                    if isinstance(result, dict):
+                        result.setdefault('store', store_config['name'])
+
+                with lock:
+                    store_stats = stats['stores'][store_id]
+                    store_stats['requests'] += 1
+                    store_stats['results'] += len(results)
+                    store_stats['busy_time'] += elapsed
+                    stats['requests'] += 1
+                    stats['results'] += len(results)
+                    if failed:
+                        store_stats['errors'] += 1
+                        stats['errors'] += 1
+                    if getattr(results, 'unchanged', False):
+                        store_stats['unchanged'] += 1
+                        stats['unchanged'] += 1
+                    outputs.append((store_id, query, results))
+
+                if on_result:
+                    try:
+                        on_result(store_id, query, results)
+                    except Exception as e:
+                        logger.error(f"Erreur traitement résultats {store_config['name']} pour {query}: {e}")
+
+        lanes = [store_id for store_id in queues for _ in range(self.per_store_limit)]
+        if lanes:
+            with ThreadPoolExecutor(max_workers=len(lanes), thread_name_prefix='scrape') as executor:
+                for future in [executor.submit(lane, store_id) for store_id in lanes]:
+                    future.result()
+
+        duration = time.time() - stats['started_at']
+        stats['duration'] = round(duration, 3)
+        stats['requests_per_sec'] = round(stats['requests'] / duration, 3) if duration > 0 else 0.0
+        stats['results_per_sec'] = round(stats['results'] / duration, 3) if duration > 0 else 0.0
+        for store_stats in stats['stores'].values():
+            store_stats['busy_time'] = round(store_stats['busy_time'], 3)
+
+        self.last_run_stats = stats
+        logger.info(
+            f"Run terminé: {stats['requests']} requêtes, {stats['results']} résultats "
+            f"en {stats['duration']}s ({stats['requests_per_sec']} req/s)"
+        )
+        return outputs
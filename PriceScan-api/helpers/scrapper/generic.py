@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Scraper générique piloté par STORE_CONFIG
+Chaque entrée de STORE_CONFIG (search_url, selectors, extraction, pagination,
+price) suffit à construire un scraper : récupération via `fetch_page`
+(client partagé, cache, limite de débit), extraction via `extract_page`
+(sélecteurs précompilés, dans le pool de processus de parsing), puis normalisation des prix selon les règles du magasin.
+Les pages suivantes sont explorées par `PageCrawl` (lien ou paramètre de page)
+"""
+
+import contextvars
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urlencode, urlsplit
+
+from config.scraping_config import STORE_CONFIG, PAGINATION_CONFIG
+from .utils import fetch_page, is_unchanged, UnchangedResults
+from .parsing import PageRows, store_selectors
+from .prices import DEFAULT_PRICE, format_price
+from .parse_pool import extract_page, get_parse_pool
+from .metrics import get_scrape_metrics
+
+logger = logging.getLogger(__name__)
+
+# Règles par défaut, complétées / remplacées par celles de chaque magasin
+DEFAULT_EXTRACTION = {
+    'required': ['name', 'price'],   # champs obligatoires pour garder un produit
+    'max_results': None              # None = tous les produits des pages explorées
+}
+
+DEFAULT_PAGINATION = {
+    'param': 'page',                 # paramètre ajouté à search_url
+    'start': 1,                      # numéro de la première page
+    'next_selector': None,           # lien « page suivante » (prioritaire sur le paramètre)
+    **PAGINATION_CONFIG              # max_pages, concurrency, stop_on_known
+}
+
+
+class StoreScraper:
+    """
+    Scraper d'un magasin décrit dans STORE_CONFIG.
+    S'appelle comme les anciennes fonctions : `scraper(query) -> [résultats]`
+    """
+
+    def __init__(self, store_id: str, config: Optional[dict] = None):
+        if config is None and store_id not in STORE_CONFIG:
+            raise KeyError(f"Magasin inconnu dans STORE_CONFIG: {store_id}")
+        self.store_id = store_id
+        self.config = config or STORE_CONFIG[store_id]
+        self.name = self.config['name']
+        self.url_base = self.config.get('url_base')
+        self.extraction = {**DEFAULT_EXTRACTION, **self.config.get('extraction', {})}
+        self.pagination = {**DEFAULT_PAGINATION, **self.config.get('pagination', {})}
+        self.price_rules = {**DEFAULT_PRICE, **self.config.get('price', {})}
+        self.selectors = store_selectors({**self.config, 'pagination': self.pagination})
+
+    def build_url(self, query: str, page: Optional[int] = None) -> str:
+        """URL de recherche, avec le paramètre de page au-delà de la première"""
+        url = self.config['search_url'].format(query=quote_plus(query))
+        if page is not None and page != self.pagination['start']:
+            separator = '&' if urlsplit(url).query else '?'
+            url = f"{url}{separator}{urlencode({self.pagination['param']: page})}"
+        return url
+
+    def to_result(self, row: dict, amount: Optional[float]) -> Optional[dict]:
+        """Produit extrait et son montant (None si rejeté) -> résultat ({'nom', 'prix', 'image_url', 'store'})"""
+        if any(not row.get(field) for field in self.extraction['required']):
+            return None
+        if amount is None:
+            return None
+        return {
+            'nom': row['name'],
+            'prix': format_price(amount, self.price_rules['currency']),
+            'image_url': row['image'],
+            'store': self.name
+        }
+
+    def fetch(self, query: str, page: Optional[int] = None, url: Optional[str] = None, use_cache: bool = True):
+        """
+        Récupère une page de résultats : (url, réponse), réponse None si inaccessible.
+        `url` (lien « page suivante ») remplace l'URL construite depuis la requête ;
+        sans `use_cache`, la page est toujours téléchargée et parsée (pas de 304)
+        """
+        url = url or self.build_url(query, page)
+        response = fetch_page(url, use_cache=use_cache, store=self.store_id)
+        if not response:
+            logger.warning(f"Impossible de récupérer la page {self.name}: {url}")
+        return url, response
+
+    def parse(self, url: str, response):
+        """
+        Résultats d'une page récupérée : liste de résultats (`next_url` : lien
+        vers la page suivante), UnchangedResults si la page n'a pas changé,
+        None si elle est inaccessible
+        """
+        if not response:
+            return None
+        if is_unchanged(response):
+            return UnchangedResults()
+        started = time.perf_counter()
+        rows, next_url = extract_page(self.store_id, response.content, url, self.price_rules, self.selectors)
+        return self.build_results(rows, next_url, time.perf_counter() - started)
+
+    def build_results(self, rows: List[tuple], next_url: Optional[str], parse_time: float = 0.0) -> PageRows:
+        """
+        Lignes de `extract_page` -> résultats de la page (`next_url` : page
+        suivante) ; `parse_time` et le nombre de résultats vont aux métriques
+        """
+        results = PageRows()
+        results.next_url = next_url
+        for name, price, image, amount in rows:
+            result = self.to_result({'name': name, 'price': price, 'image': image}, amount)
+            if result:
+                results.append(result)
+        get_scrape_metrics().record_parse(self.store_id, parse_time, len(results))
+        return results
+
+    def scrape_page(self, query: str, page: Optional[int] = None, url: Optional[str] = None, use_cache: bool = True):
+        """Scrape une page de résultats (voir `parse` ; parsing dans le pool de processus)"""
+        return get_parse_pool().parse(self, *self.fetch(query, page, url, use_cache))
+
+    def crawl(self, query: str) -> 'PageCrawl':
+        """Nouvelle exploration des pages d'une recherche"""
+        return PageCrawl(self, query)
+
+    def fetch_pages(self, query: str, pages: List[Tuple[int, Optional[str]]], use_cache: bool = True) -> List[tuple]:
+        """
+        Récupère plusieurs pages (numéro, lien) d'une recherche en même temps :
+        [(numéro, url, réponse)] dans l'ordre demandé. Le limiteur de débit du
+        client HTTP garde l'espacement entre requêtes, seules les attentes
+        réseau se chevauchent. Les threads héritent du contexte de l'appelant
+        (place globale de la voie, voir `retry.SlotLease`)
+        """
+        def fetch(request):
+            page, url = request
+            return (page, *self.fetch(query, page, url, use_cache))
+
+        if len(pages) <= 1:
+            return [fetch(request) for request in pages]
+        contexts = [contextvars.copy_context() for _ in pages]
+        with ThreadPoolExecutor(max_workers=len(pages), thread_name_prefix=f'pages-{self.store_id}') as executor:
+            return list(executor.map(lambda context, request: context.run(fetch, request), contexts, pages))
+
+    def scrape(self, query: str, use_cache: bool = False) -> List[dict]:
+        """
+        Scrape les produits d'une recherche (pages explorées par `PageCrawl`).
+        Sans `use_cache`, toutes les pages sont téléchargées : le cache de
+        pages est réservé au pipeline, qui n'y ajoute une page qu'une fois ses
+        prix enregistrés ; avec, les pages nouvelles ne sont pas mises en cache
+        """
+        logger.info(f"Recherche {self.name} pour : {query}")
+        try:
+            crawl = self.crawl(query)
+            results = []
+            pages = crawl.first_pages()
+            while pages:
+                requested, pages = pages, []
+                for page, url, response in self.fetch_pages(query, requested, use_cache):
+                    new_results, next_pages = crawl.accept(page, self.parse(url, response))
+                    results.extend(new_results)
+                    pages.extend(next_pages)
+
+            if not results and crawl.unchanged:
+                logger.info(f"Page {self.name} inchangée depuis le dernier passage")
+                return UnchangedResults()
+
+            logger.info(f"Scraping {self.name} terminé: {len(results)} résultats "
+                        f"({crawl.pages_done} pages, arrêt: {crawl.stop_reason})")
+            return results
+
+        except Exception as e:
+            logger.error(f"Erreur scraping {self.name}: {e}")
+            return []
+
+    __call__ = scrape
+
+
+def _result_key(result: dict) -> tuple:
+    """Identité d'un produit dans une recherche : nom (casse et espaces ignorés) et prix"""
+    return ' '.join(str(result.get('nom', '')).casefold().split()), result.get('prix')
+
+
+class PageCrawl:
+    """
+    Pagination d'une recherche sur un magasin.
+
+    Avec `next_selector`, les pages suivent le lien « page suivante » (une à
+    la fois, le lien n'est connu qu'après le parsing) ; sinon le paramètre de
+    page permet de garder `concurrency` pages en vol. L'exploration s'arrête
+    à `max_pages`, sur une page inaccessible ou vide, à `max_results`, ou dès
+    qu'une page ne contient que des produits déjà vus (site qui ignore le
+    paramètre de page, dernière page répétée). Les doublons entre pages sont
+    retirés. Non thread-safe : l'appelant sérialise `accept`.
+    """
+
+    def __init__(self, scraper: StoreScraper, query: str):
+        pagination = scraper.pagination
+        self.query = query
+        self.start = pagination['start']
+        self.last = self.start + max(1, pagination['max_pages']) - 1
+        self.window = max(1, pagination['concurrency'])
+        self.follow_links = bool(pagination['next_selector'])
+        self.stop_on_known = pagination['stop_on_known']
+        self.max_results = scraper.extraction['max_results']
+        self.requested = {self.start}
+        self.seen = set()
+        self.collected = 0
+        self.pages_done = 0
+        self.unchanged = False
+        self.stop_page = None
+        self.stop_reason = None
+
+    @property
+    def done(self) -> bool:
+        return self.stop_page is not None
+
+    def first_pages(self) -> List[Tuple[int, Optional[str]]]:
+        """Pages (numéro, lien) à demander en premier"""
+        return [(self.start, None)]
+
+    def _stop(self, page: int, reason: str):
+        # Les pages parsées dans le désordre : seules celles après `page` sont ignorées
+        if self.stop_page is None or page < self.stop_page:
+            self.stop_page, self.stop_reason = page, reason
+
+    def accept(self, page: int, page_results) -> Tuple[List[dict], List[Tuple[int, Optional[str]]]]:
+        """
+        Résultats d'une page (voir `StoreScraper.parse`) ->
+        (nouveaux résultats, pages (numéro, lien) à demander ensuite)
+        """
+        if self.stop_page is not None and page > self.stop_page:
+            return [], []
+        self.pages_done += 1
+
+        if page_results is None:
+            self._stop(page, 'page inaccessible')
+            return [], []
+        if isinstance(page_results, UnchangedResults):
+            # Page identique au dernier passage : les suivantes ont pu changer
+            self.unchanged = True
+            return [], self._next_pages(page, None)
+        if not page_results:
+            self._stop(page, 'page vide')
+            return [], []
+
+        new_results = []
+        for result in page_results:
+            key = _result_key(result)
+            if key not in self.seen:
+                self.seen.add(key)
+                new_results.append(result)
+        if not new_results and self.stop_on_known:
+            self._stop(page, 'produits déjà vus')
+            return [], []
+
+        if self.max_results and self.collected + len(new_results) >= self.max_results:
+            new_results = new_results[:max(0, self.max_results - self.collected)]
+            self._stop(page, 'max_results')
+        self.collected += len(new_results)
+        return new_results, self._next_pages(page, getattr(page_results, 'next_url', None))
+
+    def _next_pages(self, page: int, next_url: Optional[str]) -> List[Tuple[int, Optional[str]]]:
+        if self.done:
+            return []
+        if page >= self.last:
+            self.stop_reason = self.stop_reason or 'max_pages'
+            return []
+        if self.follow_links:
+            if not next_url:
+                self._stop(page, 'dernière page')
+                return []
+            candidates = [(page + 1, next_url)]
+        else:
+            last = min(page + self.window, self.last)
+            candidates = [(number, None) for number in range(page + 1, last + 1)]
+        pages = [(number, url) for number, url in candidates if number not in self.requested]
+        self.requested.update(number for number, _ in pages)
+        return pages
+
+
+_scrapers: Dict[str, StoreScraper] = {}
+_scrapers_lock = threading.Lock()
+
+
+def get_store_scraper(store_id: str) -> StoreScraper:
+    """Scraper (mis en cache) d'un magasin de STORE_CONFIG"""
+    with _scrapers_lock:
+        scraper = _scrapers.get(store_id)
+        if scraper is None:
+            scraper = _scrapers[store_id] = StoreScraper(store_id)
+        return scraper
+
+
+def scrape_store(store_id: str, query: str) -> List[dict]:
+    """Scrape un magasin de STORE_CONFIG pour une recherche"""
+    return get_store_scraper(store_id).scrape(query)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Sondes de disponibilité des magasins
+Les magasins sont testés en parallèle (première page de la recherche), en
+arrière-plan, avec une échéance courte ; le résultat est mis en cache pendant
+`ttl` secondes. Lire l'état ne bloque jamais : un état périmé déclenche
+simplement un nouveau sondage.
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.scraping_config import HEALTH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class StoreHealthProber:
+    """Disponibilité par magasin : {'available', 'results', 'latency', 'checked_at', 'error'}"""
+
+    def __init__(self, stores: Dict[str, dict], ttl: Optional[float] = None,
+                 deadline: Optional[float] = None, query: Optional[str] = None):
+        self.stores = stores
+        self.ttl = ttl if ttl is not None else HEALTH_CONFIG['ttl']
+        self.deadline = deadline if deadline is not None else HEALTH_CONFIG['deadline']
+        self.query = query or HEALTH_CONFIG['query']
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._probing = False
+        self._results: Dict[str, dict] = {}
+        self._checked_at: Optional[float] = None
+        self.probes = 0
+
+    def _probe_store(self, store_id: str) -> dict:
+        store_config = self.stores[store_id]
+        started = time.monotonic()
+        try:
+            scraper = store_config['scraper']
+            if hasattr(scraper, 'scrape_page'):
+                # Première page seulement, sans GET conditionnel : une page suffit à savoir si le magasin répond
+                results = scraper.scrape_page(self.query, use_cache=False)
+            else:
+                results = scraper(self.query)
+            available = bool(results)
+            return {'available': available, 'results': len(results or []),
+                    'latency': round(time.monotonic() - started, 3), 'error': None}
+        except Exception as e:
+            return {'available': False, 'results': 0,
+                    'latency': round(time.monotonic() - started, 3), 'error': str(e)}
+
+    def _probe_all(self):
+        store_ids = [store_id for store_id, config in self.stores.items() if config['enabled']]
+        results = {}
+        # Pas de `with` : on n'attend pas les sondes qui dépassent l'échéance
+        executor = ThreadPoolExecutor(max_workers=max(1, len(store_ids)), thread_name_prefix='probe')
+        try:
+            futures = {executor.submit(self._probe_store, store_id): store_id for store_id in store_ids}
+            wait(futures, timeout=self.deadline)
+            for future, store_id in futures.items():
+                if future.done():
+                    results[store_id] = future.result()
+                else:
+                    results[store_id] = {'available': False, 'results': 0, 'latency': self.deadline,
+                                         'error': f"Pas de réponse en {self.deadline}s"}
+        except Exception as e:
+            # Sondage avorté (arrêt de l'interpréteur...) : ne pas rester bloqué en « probing »
+            logger.error(f"Erreur sondage des magasins: {e}")
+            with self._lock:
+                self._probing = False
+            self._done.set()
+            return
+        finally:
+            executor.shutdown(wait=False)
+
+        now = time.time()
+        for result in results.values():
+            result['checked_at'] = datetime.fromtimestamp(now).isoformat()
+        with self._lock:
+            self._results = results
+            self._checked_at = now
+            self._probing = False
+            self.probes += 1
+        self._done.set()
+
+        available = [self.stores[s]['name'] for s, r in results.items() if r['available']]
+        logger.info(f"Magasins disponibles: {available}")
+
+    def refresh(self, wait_for_result: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Lance un sondage en arrière-plan (sauf s'il y en a déjà un).
+        Avec `wait_for_result`, attend la fin (au plus `timeout` secondes).
+        """
+        with self._lock:
+            if not self._probing:
+                self._probing = True
+                self._done.clear()
+                threading.Thread(target=self._probe_all, name='store-health', daemon=True).start()
+        if wait_for_result:
+            return self._done.wait(timeout if timeout is not None else self.deadline + 1)
+        return True
+
+    @property
+    def is_stale(self) -> bool:
+        return self._checked_at is None or time.time() - self._checked_at > self.ttl
+
+    def working_stores(self, wait_for_result: bool = False) -> List[str]:
+        """Magasins disponibles au dernier sondage (sonde si l'état est périmé)"""
+        if self.is_stale:
+            self.refresh(wait_for_result=wait_for_result)
+        with self._lock:
+            return [store_id for store_id, result in self._results.items() if result['available']]
+
+    def get_status(self) -> dict:
+        """État en cache, sans attendre ; relance un sondage s'il est périmé"""
+        stale = self.is_stale
+        if stale:
+            self.refresh()
+        with self._lock:
+            return {
+                'checked_at': datetime.fromtimestamp(self._checked_at).isoformat() if self._checked_at else None,
+                'stale': stale,
+                'probing': self._probing,
+                'ttl': self.ttl,
+                'deadline': self.deadline,
+                'probes': self.probes,
+                'stores': {store_id: dict(result) for store_id, result in self._results.items()}
+            }
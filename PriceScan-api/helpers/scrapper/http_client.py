@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Client HTTP partagé par tous les scrapers
+Une session keep-alive par hôte, des pools de connexions configurables
+et des compteurs de connexions nouvelles / réutilisées
+"""
+
+import threading
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config.scraping_config import HTTP_HEADERS, HTTP_POOL_CONFIG, SCRAPING_TIMEOUTS
+from .rate_limiter import DomainRateLimiter, get_rate_limiter
+from .circuit_breaker import CircuitOpenError, StoreCircuitBreakers, get_circuit_breakers, is_store_failure
+from .snapshots import get_snapshot_store
+from .retry import sleep_without_slot
+
+logger = logging.getLogger(__name__)
+
+
+class _HostStats:
+    """Compteurs d'un hôte (protégés par le verrou du client)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'new_connections': self.new_connections,
+            'reused_connections': max(self.requests - self.new_connections, 0)
+        }
+
+
+class _CountingAdapter(HTTPAdapter):
+    """Adaptateur qui compte les connexions TCP/TLS réellement ouvertes"""
+
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        on_new_connection = self._on_new_connection
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+
+class HttpClient:
+    """
+    Couche HTTP commune : une `requests.Session` par hôte pour réutiliser
+    les connexions (et éviter une nouvelle résolution DNS et un nouveau
+    handshake TLS à chaque recherche). Le disjoncteur puis le limiteur de
+    débit du domaine sont consultés avant chaque requête.
+    """
+
+    def __init__(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 pool_block: Optional[bool] = None, timeouts: Optional[dict] = None,
+                 headers: Optional[dict] = None, rate_limiter: Optional[DomainRateLimiter] = None,
+                 circuit_breakers: Optional[StoreCircuitBreakers] = None):
+        self.pool_connections = pool_connections or HTTP_POOL_CONFIG['pool_connections']
+        self.pool_maxsize = pool_maxsize or HTTP_POOL_CONFIG['pool_maxsize']
+        self.pool_block = HTTP_POOL_CONFIG['pool_block'] if pool_block is None else pool_block
+        timeouts = timeouts or SCRAPING_TIMEOUTS
+        # (connexion, lecture) au format requests
+        self.timeout = (timeouts['connection_timeout'], timeouts['request_timeout'])
+        self.headers = dict(headers or HTTP_HEADERS)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.circuit_breakers = circuit_breakers or get_circuit_breakers()
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, _HostStats] = {}
+        self._lock = threading.Lock()
+
+    def _host_stats(self, host: str) -> _HostStats:
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = _HostStats()
+        return stats
+
+    def _record_new_connection(self, host: str):
+        with self._lock:
+            self._host_stats(host).new_connections += 1
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = _CountingAdapter(
+            self._record_new_connection,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Retourne (ou crée) la session associée à l'hôte de l'URL"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = self._create_session()
+            return session
+
+    def get(self, url: str, timeout=None, **kwargs) -> requests.Response:
+        """
+        GET via la session de l'hôte ; lève les exceptions de requests
+        (CircuitOpenError si le magasin est en pause après trop d'échecs).
+        En mode snapshot « replay », la page enregistrée est servie sans réseau.
+        """
+        snapshots = get_snapshot_store()
+        if snapshots.mode == 'replay':
+            return snapshots.replay(url)
+
+        # Magasin en panne : refuser tout de suite plutôt qu'attendre un timeout
+        breaker = self.circuit_breakers.for_url(url)
+        if breaker and not breaker.allow():
+            raise CircuitOpenError(f"Circuit ouvert pour {breaker.name}")
+
+        session = self.session_for(url)
+        try:
+            # Attente du jeton sans tenir la place globale du moteur
+            self.rate_limiter.acquire(url, sleep=sleep_without_slot)
+            with self._lock:
+                self._host_stats(urlsplit(url).hostname or '').requests += 1
+            response = session.get(url, timeout=timeout or self.timeout, **kwargs)
+        except Exception as e:
+            if breaker:
+                breaker.record_failure(type(e).__name__)
+            raise
+        if breaker:
+            if is_store_failure(response):
+                breaker.record_failure(f"HTTP {response.status_code}")
+            else:
+                breaker.record_success()
+
+        if snapshots.mode == 'record':
+            snapshots.record(url, response)
+        return response
+
+    def get_stats(self) -> dict:
+        """Compteurs globaux et par hôte"""
+        with self._lock:
+            hosts = {host: stats.to_dict() for host, stats in self._stats.items()}
+        totals = {
+            'requests': sum(h['requests'] for h in hosts.values()),
+            'new_connections': sum(h['new_connections'] for h in hosts.values()),
+            'reused_connections': sum(h['reused_connections'] for h in hosts.values())
+        }
+        totals['hosts'] = hosts
+        return totals
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        """Ferme toutes les sessions et leurs connexions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Instance partagée par tous les scrapers
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Retourne le client HTTP partagé"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Métriques de scraping par magasin
+Latence des requêtes, codes HTTP, octets téléchargés, temps de parsing,
+lignes extraites et écrites, temps d'écriture en base : compteurs cumulés
+depuis le démarrage et bilan de chaque passage du pipeline. Exportées en
+JSON (`get_stats`) et au format texte de Prometheus (`to_prometheus`).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+from config.scraping_config import METRICS_CONFIG
+
+# Bornes des histogrammes, en secondes
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+WRITE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PREFIX = 'pricescan_scrape'
+
+
+class Histogram:
+    """Histogramme à bornes fixes (`le` de Prometheus) ; protégé par le verrou de ScrapeMetrics"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # dernier seau : +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def copy(self) -> 'Histogram':
+        other = Histogram(self.buckets)
+        other.counts, other.count, other.sum = list(self.counts), self.count, self.sum
+        return other
+
+    def minus(self, earlier: 'Histogram') -> 'Histogram':
+        delta = Histogram(self.buckets)
+        delta.counts = [now - before for now, before in zip(self.counts, earlier.counts)]
+        delta.count, delta.sum = self.count - earlier.count, self.sum - earlier.sum
+        return delta
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimation par interpolation dans le seau (comme histogram_quantile)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def to_dict(self, scale: float = 1000.0) -> dict:
+        """Résumé en millisecondes (`scale`) : nombre, moyenne, p50 / p95 / p99"""
+        summary = {'count': self.count, 'avg_ms': round(self.sum * scale / self.count, 2) if self.count else None}
+        for q in (0.5, 0.95, 0.99):
+            value = self.quantile(q)
+            summary[f"p{int(q * 100)}_ms"] = round(value * scale, 2) if value is not None else None
+        return summary
+
+    def prometheus_lines(self, name: str, labels: str) -> list:
+        lines, cumulative = [], 0
+        separator = ',' if labels else ''
+        for bound, count in zip(self.buckets + (None,), self.counts):
+            cumulative += count
+            le = '+Inf' if bound is None else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{le}"}} {cumulative}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.sum!r}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class StoreMetrics:
+    """Compteurs d'un magasin"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.status: Dict[str, int] = {}     # code HTTP, ou timeout / error (sans réponse)
+        self.bytes = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.parse = Histogram(PARSE_BUCKETS)
+        self.rows_extracted = 0
+        self.rows_written = 0
+        self.write_seconds = 0.0             # part du temps des lots d'écriture (au prorata des lignes)
+
+    def copy(self) -> 'StoreMetrics':
+        other = StoreMetrics()
+        other.__dict__.update(self.__dict__)
+        other.status = dict(self.status)
+        other.latency, other.parse = self.latency.copy(), self.parse.copy()
+        return other
+
+    def minus(self, earlier: 'StoreMetrics') -> 'StoreMetrics':
+        delta = StoreMetrics()
+        for key in ('requests', 'retries', 'bytes', 'rows_extracted', 'rows_written', 'write_seconds'):
+            setattr(delta, key, getattr(self, key) - getattr(earlier, key))
+        delta.status = {code: count - earlier.status.get(code, 0) for code, count in self.status.items()
+                        if count != earlier.status.get(code, 0)}
+        delta.latency, delta.parse = self.latency.minus(earlier.latency), self.parse.minus(earlier.parse)
+        return delta
+
+    def to_dict(self) -> dict:
+        errors = sum(count for code, count in self.status.items() if not code.isdigit() or int(code) >= 400)
+        return {
+            'requests': self.requests,
+            'errors': errors,
+            'retries': self.retries,
+            'status': dict(sorted(self.status.items())),
+            'bytes': self.bytes,
+            'latency': self.latency.to_dict(),
+            'pages_parsed': self.parse.count,
+            'parse': self.parse.to_dict(),
+            'rows_extracted': self.rows_extracted,
+            'rows_written': self.rows_written,
+            'db_write_time': round(self.write_seconds, 4)
+        }
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ScrapeMetrics:
+    """
+    Métriques partagées par les scrapers, le pool de parsing et le pipeline.
+    Le bilan d'un passage (`begin_run` / `end_run`) est la différence des
+    compteurs entre son début et sa fin : des passages simultanés s'y
+    retrouvent mêlés.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, runs: Optional[int] = None):
+        self.enabled = METRICS_CONFIG['enabled'] if enabled is None else enabled
+        self._stores: Dict[str, StoreMetrics] = {}
+        self._writes = Histogram(WRITE_BUCKETS)   # durée des lots d'écriture, tous magasins
+        self._runs = deque(maxlen=runs or METRICS_CONFIG['runs'])
+        self._run_count = 0
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    def _store(self, store_id: str) -> StoreMetrics:
+        metrics = self._stores.get(store_id)
+        if metrics is None:
+            metrics = self._stores[store_id] = StoreMetrics()
+        return metrics
+
+    # --- enregistrement -------------------------------------------------------
+
+    def record_request(self, store_id: str, seconds: float, status, size: int = 0):
+        """Tentative terminée : durée, code HTTP (ou type d'échec), octets reçus"""
+        if not self.enabled:
+            return
+        with self._lock:
+            metrics = self._store(store_id)
+            metrics.requests += 1
+            metrics.status[str(status)] = metrics.status.get(str(status), 0) + 1
+            metrics.bytes += size
+            metrics.latency.observe(seconds)
+
+    def record_retry(self, store_id: str):
+        """Nouvelle tentative programmée après une erreur passagère"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(store_id).retries += 1
+
+    def record_parse(self, store_id: str, seconds: float, rows: int):
+        """Page parsée : temps CPU d'extraction et résultats retenus"""
+        if not self.enabled:
+            return
+        with self._lock:
+            metrics = self._store(store_id)
+            metrics.parse.observe(seconds)
+            metrics.rows_extracted += rows
+
+    def record_write(self, rows_by_store: Dict[str, int], seconds: float):
+        """Lot écrit en base : lignes par magasin, durée répartie au prorata"""
+        if not self.enabled:
+            return
+        total = sum(rows_by_store.values())
+        with self._lock:
+            self._writes.observe(seconds)
+            for store_id, rows in rows_by_store.items():
+                metrics = self._store(store_id)
+                metrics.rows_written += rows
+                metrics.write_seconds += seconds * rows / total if total else 0.0
+
+    # --- passages -------------------------------------------------------------
+
+    def _snapshot(self) -> dict:
+        return {store_id: metrics.copy() for store_id, metrics in self._stores.items()}
+
+    def begin_run(self) -> tuple:
+        """Jeton à rendre à `end_run` (instant et copie des compteurs)"""
+        with self._lock:
+            return time.time(), self._snapshot()
+
+    def end_run(self, token: tuple, **extra) -> dict:
+        """Enregistre le bilan du passage commencé par `begin_run` et le retourne"""
+        started, before = token
+        with self._lock:
+            stores = {store_id: metrics.minus(before.get(store_id, StoreMetrics()))
+                      for store_id, metrics in self._stores.items()}
+            run = {
+                'started_at': datetime.fromtimestamp(started).isoformat(),
+                'duration': round(time.time() - started, 3),
+                'stores': {store_id: metrics.to_dict() for store_id, metrics in stores.items()
+                           if metrics.requests or metrics.parse.count or metrics.rows_written},
+                **extra
+            }
+            if self.enabled:
+                self._run_count += 1
+                self._runs.append(run)
+        return run
+
+    # --- export ---------------------------------------------------------------
+
+    def get_stats(self, runs: Optional[int] = None) -> dict:
+        """Compteurs par magasin depuis le démarrage et `runs` derniers passages (tous par défaut)"""
+        with self._lock:
+            recent = list(self._runs)
+            stats = {
+                'enabled': self.enabled,
+                'since': datetime.fromtimestamp(self._started_at).isoformat(),
+                'runs_total': self._run_count,
+                'stores': {store_id: metrics.to_dict() for store_id, metrics in sorted(self._stores.items())},
+                'db_writes': self._writes.to_dict()
+            }
+        stats['runs'] = recent[-runs:] if runs else ([] if runs == 0 else recent)
+        return stats
+
+    def to_prometheus(self) -> str:
+        """Compteurs au format texte d'exposition de Prometheus"""
+        families = {
+            'requests_total': ('counter', "Requêtes HTTP par magasin et code (ou type d'échec)"),
+            'retries_total': ('counter', 'Nouvelles tentatives après une erreur passagère'),
+            'request_duration_seconds': ('histogram', 'Durée des requêtes HTTP'),
+            'bytes_total': ('counter', 'Octets téléchargés'),
+            'parse_duration_seconds': ('histogram', "Temps d'extraction d'une page"),
+            'rows_extracted_total': ('counter', 'Résultats extraits des pages'),
+            'rows_written_total': ('counter', 'Prix écrits en base'),
+            'db_write_seconds_total': ('counter', "Temps d'écriture en base (part du magasin dans les lots)"),
+            'db_write_duration_seconds': ('histogram', "Durée des lots d'écriture en base"),
+            'runs_total': ('counter', 'Passages du pipeline terminés')
+        }
+        samples = {name: [] for name in families}
+        with self._lock:
+            for store_id, metrics in sorted(self._stores.items()):
+                store = f'store="{_label(store_id)}"'
+                for code, count in sorted(metrics.status.items()):
+                    samples['requests_total'].append(f'{PREFIX}_requests_total{{{store},code="{_label(code)}"}} {count}')
+                samples['retries_total'].append(f'{PREFIX}_retries_total{{{store}}} {metrics.retries}')
+                samples['request_duration_seconds'] += metrics.latency.prometheus_lines(
+                    f'{PREFIX}_request_duration_seconds', store)
+                samples['bytes_total'].append(f'{PREFIX}_bytes_total{{{store}}} {metrics.bytes}')
+                samples['parse_duration_seconds'] += metrics.parse.prometheus_lines(
+                    f'{PREFIX}_parse_duration_seconds', store)
+                samples['rows_extracted_total'].append(f'{PREFIX}_rows_extracted_total{{{store}}} {metrics.rows_extracted}')
+                samples['rows_written_total'].append(f'{PREFIX}_rows_written_total{{{store}}} {metrics.rows_written}')
+                samples['db_write_seconds_total'].append(
+                    f'{PREFIX}_db_write_seconds_total{{{store}}} {metrics.write_seconds!r}')
+            samples['db_write_duration_seconds'] = self._writes.prometheus_lines(f'{PREFIX}_db_write_duration_seconds', '')
+            samples['runs_total'].append(f'{PREFIX}_runs_total {self._run_count}')
+
+        lines = []
+        for name, (kind, description) in families.items():
+            lines.append(f'# HELP {PREFIX}_{name} {description}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+            lines.extend(samples[name])
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._stores.clear()
+            self._writes = Histogram(WRITE_BUCKETS)
+            self._runs.clear()
+            self._run_count = 0
+            self._started_at = time.time()
+
+
+_scrape_metrics = None
+_scrape_metrics_lock = threading.Lock()
+
+
+def get_scrape_metrics() -> ScrapeMetrics:
+    """Retourne les métriques de scraping partagées"""
+    global _scrape_metrics
+    if _scrape_metrics is None:
+        with _scrape_metrics_lock:
+            if _scrape_metrics is None:
+                _scrape_metrics = ScrapeMetrics()
+    return _scrape_metrics
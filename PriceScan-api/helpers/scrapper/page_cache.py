@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Cache disque des pages scrapées (GET conditionnel)
+Conserve ETag / Last-Modified et l'empreinte du corps de chaque URL pour
+ne pas re-parser ni ré-enregistrer une page qui n'a pas changé. Une page
+nouvelle ou modifiée n'entre dans le cache (`commit`) qu'une fois ses prix
+écrits en base : un parsing ou une écriture en échec la refait au passage
+suivant.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config.scraping_config import PAGE_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    Un fichier JSON par URL : validateurs HTTP, empreinte SHA-256 du corps
+    et taille. Le corps lui-même n'est pas stocké : une page inchangée
+    n'a pas à être re-parsée.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or PAGE_CACHE_CONFIG['directory']
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'hits_not_modified': 0,
+            'hits_identical_body': 0,
+            'misses': 0,
+            'bytes_saved': 0
+        }
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, url: str) -> Optional[dict]:
+        """Entrée du cache pour une URL (ou None)"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url: str) -> dict:
+        """En-têtes If-None-Match / If-Modified-Since pour une URL déjà vue"""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_not_modified(self, url: str):
+        """Réponse 304 : la taille de la page en cache est économisée"""
+        entry = self.get(url) or {}
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['hits_not_modified'] += 1
+            self._stats['bytes_saved'] += entry.get('size', 0)
+
+    def check(self, url: str, response) -> Tuple[bool, Optional[dict]]:
+        """
+        Compare une réponse 200 à la version en cache : (corps identique,
+        entrée à passer à `commit` une fois la page enregistrée). Un corps
+        identique met aussitôt à jour les validateurs (entrée None).
+        """
+        body = response.content or b''
+        body_hash = hashlib.sha256(body).hexdigest()
+        previous = self.get(url)
+        unchanged = bool(previous and previous.get('body_hash') == body_hash)
+
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body_hash': body_hash,
+            'size': len(body),
+            'stored_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            self._stats['requests'] += 1
+            if unchanged:
+                self._stats['hits_identical_body'] += 1
+            else:
+                self._stats['misses'] += 1
+        if unchanged:
+            self.commit(entry)
+            return True, None
+        return False, entry
+
+    def commit(self, entry: dict):
+        """Enregistre l'entrée d'une page (voir `check`) dont les prix sont en base"""
+        url = entry['url']
+        path = self._path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache pour {url}: {e}")
+
+    def get_stats(self) -> dict:
+        """Succès / échecs et octets économisés"""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['hits_not_modified'] + stats['hits_identical_body']
+        stats['hits'] = hits
+        stats['hit_ratio'] = round(hits / stats['requests'], 3) if stats['requests'] else 0.0
+        stats['enabled'] = PAGE_CACHE_CONFIG['enabled']
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Retourne le cache de pages partagé"""
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+    return _page_cache
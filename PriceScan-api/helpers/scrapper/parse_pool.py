@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de processus pour le parsing HTML
+La construction de l'arbre et les sélecteurs CSS sont du travail CPU : dans
+les threads du processus Flask, ils disputent le GIL aux requêtes de l'API.
+Les pages partent vers des processus dédiés sous forme d'octets bruts et
+reviennent en lignes compactes (tuples), reconstruites en résultats par le
+scraper du magasin.
+"""
+
+import multiprocessing
+import signal
+import threading
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from config.scraping_config import PARSER_CONFIG
+from .parsing import extract_products
+from .prices import parse_prices
+from .utils import is_unchanged
+
+logger = logging.getLogger(__name__)
+
+
+def extract_page(store_id: str, content: bytes, url: Optional[str], price_rules: dict,
+                 selectors: Optional[dict] = None) -> tuple:
+    """
+    Partie CPU du parsing d'une page : ([(nom, prix texte, image, montant)], lien
+    suivant). Fonction de module et types simples : s'exécute telle quelle dans
+    les processus du pool. `selectors` : ceux du scraper (voir `store_selectors`)
+    """
+    rows = extract_products(store_id, content, base_url=url, selectors=selectors)
+    amounts = parse_prices([row['price'] for row in rows], price_rules)
+    return ([(row['name'], row['price'], row['image'], amounts.amount(index)) for index, row in enumerate(rows)],
+            rows.next_url)
+
+
+def timed_extract_page(*args) -> tuple:
+    """`extract_page` et sa durée, mesurée dans le processus qui parse"""
+    started = time.perf_counter()
+    rows, next_url = extract_page(*args)
+    return rows, next_url, time.perf_counter() - started
+
+
+def _init_worker():
+    # Ctrl+C est géré par le processus principal, qui arrête le pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class ParsePool:
+    """
+    `processes` processus (PARSER_CONFIG['processes'], 0 = parsing dans le
+    thread appelant), démarrés à la première page. Si un processus meurt,
+    le pool est recréé et la page est parsée dans le thread appelant.
+    """
+
+    def __init__(self, processes: Optional[int] = None, start_method: Optional[str] = None):
+        self.processes = PARSER_CONFIG['processes'] if processes is None else processes
+        self.start_method = start_method or PARSER_CONFIG['start_method']
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'pages': 0,           # pages parsées dans le pool
+            'inline': 0,          # pages parsées dans le thread appelant
+            'errors': 0,
+            'restarts': 0,
+            'bytes_sent': 0,
+            'wait_time': 0.0      # attente des résultats par les threads appelants
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker
+                )
+                logger.info(f"Pool de parsing : {self.processes} processus ({self.start_method})")
+            return self._executor
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def parse(self, scraper, url: str, response):
+        """Comme `scraper.parse(url, response)`, l'extraction se faisant dans le pool"""
+        if not self.enabled or not response or is_unchanged(response) or not hasattr(scraper, 'build_results'):
+            if response and self.enabled:
+                self._count('inline')
+            return scraper.parse(url, response)
+
+        content = response.content or b''
+        started = time.monotonic()
+        try:
+            executor = self._get_executor()
+            rows, next_url, parse_time = executor.submit(timed_extract_page, scraper.store_id, content, url,
+                                                         scraper.price_rules, scraper.selectors).result()
+        except BrokenProcessPool:
+            logger.warning("Processus de parsing interrompu, redémarrage du pool")
+            self._restart(executor)
+            self._count('inline')
+            return scraper.parse(url, response)
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            self._count('wait_time', time.monotonic() - started)
+
+        with self._lock:
+            self._stats['pages'] += 1
+            self._stats['bytes_sent'] += len(content)
+        return scraper.build_results(rows, next_url, parse_time)
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+                self._stats['restarts'] += 1
+        broken.shutdown(wait=False)
+
+    def warm_up(self):
+        """Démarre les processus (imports et sélecteurs compilés) avant le premier passage"""
+        if self.enabled:
+            executor = self._get_executor()
+            for future in [executor.submit(_init_worker) for _ in range(self.processes)]:
+                future.result()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['processes'] = self.processes
+        stats['running'] = self._executor is not None
+        stats['wait_time'] = round(stats['wait_time'], 3)
+        parsed = stats['pages']
+        stats['avg_wait_ms'] = round(stats['wait_time'] * 1000 / parsed, 2) if parsed else 0.0
+        return stats
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """Retourne le pool de parsing partagé"""
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ParsePool()
+    return _parse_pool
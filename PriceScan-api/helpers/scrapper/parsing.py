@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Backends de parsing HTML pour les scrapers
+Les sélecteurs de STORE_CONFIG sont compilés une seule fois par backend,
+puis nom / prix / image sont extraits en un seul passage sur les conteneurs
+(ainsi que le lien « page suivante » si le magasin en déclare un)
+"""
+
+import threading
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from config.scraping_config import STORE_CONFIG, PARSER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('product_name', 'product_price', 'product_image')
+NEXT_PAGE = 'next_page'
+
+
+class PageRows(list):
+    """Produits extraits d'une page, avec l'URL de la page suivante (ou None)"""
+    next_url = None
+
+
+def _normalize_text(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _alternatives(selector: str) -> List[str]:
+    """
+    « a, b, c » -> [a, b, c] : pour un champ, la première alternative qui
+    trouve un élément l'emporte (un groupe CSS renverrait le premier élément
+    dans l'ordre du document, par exemple l'ancien prix barré avant le prix promo)
+    """
+    return [part.strip() for part in selector.split(',') if part.strip()]
+
+
+def _compile_fields(selectors: dict, compile_one) -> dict:
+    """Conteneur compilé tel quel, champs compilés alternative par alternative"""
+    compiled = {}
+    for key, selector in selectors.items():
+        if not selector:
+            continue
+        if key in FIELDS:
+            compiled[key] = tuple(compile_one(part) for part in _alternatives(selector))
+        else:
+            compiled[key] = compile_one(selector)
+    return compiled
+
+
+class SoupBackend:
+    """BeautifulSoup + soupsieve (sélecteurs précompilés)"""
+
+    def __init__(self, features: str = 'html.parser'):
+        from bs4 import BeautifulSoup
+        import soupsieve
+
+        self._soup = BeautifulSoup
+        self._compile_css = soupsieve.compile
+        self.features = features
+        self.name = 'bs4-lxml' if features == 'lxml' else 'bs4-html.parser'
+
+    def compile(self, selectors: dict) -> dict:
+        return _compile_fields(selectors, self._compile_css)
+
+    def parse(self, content):
+        return self._soup(content, self.features)
+
+    @staticmethod
+    def _first(alternatives, element):
+        for selector in alternatives or ():
+            match = selector.select_one(element)
+            if match is not None:
+                return match
+        return None
+
+    def extract(self, content, compiled: dict, limit: Optional[int] = None) -> PageRows:
+        document = self.parse(content)
+        name_sel, price_sel, image_sel = (compiled.get(field) for field in FIELDS)
+        rows = PageRows()
+        for container in compiled['product_container'].select(document, limit=limit or 0):
+            name = self._first(name_sel, container)
+            price = self._first(price_sel, container)
+            image = self._first(image_sel, container)
+            rows.append({
+                'name': _normalize_text(name.get_text(' ')) if name else '',
+                'price': _normalize_text(price.get_text(' ')) if price else '',
+                'image': (image.get('data-src') or image.get('src') or '') if image else ''
+            })
+        if NEXT_PAGE in compiled:
+            link = compiled[NEXT_PAGE].select_one(document)
+            rows.next_url = link.get('href') if link else None
+        return rows
+
+
+class LxmlBackend:
+    """lxml + cssselect : les sélecteurs CSS deviennent des XPath compilés"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+
+        self._fromstring = lxml.html.fromstring
+        self._css = CSSSelector
+
+    def compile(self, selectors: dict) -> dict:
+        return _compile_fields(selectors, self._css)
+
+    def parse(self, content):
+        return self._fromstring(content)
+
+    @staticmethod
+    def _first(alternatives, element):
+        for selector in alternatives or ():
+            matches = selector(element)
+            if matches:
+                return matches[0]
+        return None
+
+    def extract(self, content, compiled: dict, limit: Optional[int] = None) -> PageRows:
+        document = self.parse(content)
+        name_sel, price_sel, image_sel = (compiled.get(field) for field in FIELDS)
+        containers = compiled['product_container'](document)
+        rows = PageRows()
+        for container in containers[:limit] if limit else containers:
+            name = self._first(name_sel, container)
+            price = self._first(price_sel, container)
+            image = self._first(image_sel, container)
+            rows.append({
+                'name': _normalize_text(name.text_content()) if name is not None else '',
+                'price': _normalize_text(price.text_content()) if price is not None else '',
+                'image': (image.get('data-src') or image.get('src') or '') if image is not None else ''
+            })
+        if NEXT_PAGE in compiled:
+            links = compiled[NEXT_PAGE](document)
+            rows.next_url = links[0].get('href') if links else None
+        return rows
+
+
+class SelectolaxBackend:
+    """selectolax (moteur lexbor, ou modest sur les anciennes versions)"""
+
+    name = 'selectolax'
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as HTMLParser
+        except ImportError:
+            from selectolax.parser import HTMLParser
+
+        self._parser = HTMLParser
+
+    def compile(self, selectors: dict) -> dict:
+        # selectolax compile les sélecteurs en interne : on conserve les chaînes
+        return _compile_fields(selectors, lambda selector: selector)
+
+    def parse(self, content):
+        return self._parser(content)
+
+    @staticmethod
+    def _first(alternatives, element):
+        for selector in alternatives or ():
+            match = element.css_first(selector)
+            if match is not None:
+                return match
+        return None
+
+    def extract(self, content, compiled: dict, limit: Optional[int] = None) -> PageRows:
+        document = self.parse(content)
+        name_sel, price_sel, image_sel = (compiled.get(field) for field in FIELDS)
+        containers = document.css(compiled['product_container'])
+        rows = PageRows()
+        for container in containers[:limit] if limit else containers:
+            name = self._first(name_sel, container)
+            price = self._first(price_sel, container)
+            image = self._first(image_sel, container)
+            attributes = image.attributes if image is not None else {}
+            rows.append({
+                'name': _normalize_text(name.text(separator=' ')) if name is not None else '',
+                'price': _normalize_text(price.text(separator=' ')) if price is not None else '',
+                'image': attributes.get('data-src') or attributes.get('src') or ''
+            })
+        if NEXT_PAGE in compiled:
+            link = document.css_first(compiled[NEXT_PAGE])
+            rows.next_url = link.attributes.get('href') if link is not None else None
+        return rows
+
+
+BACKENDS = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4-lxml': lambda: SoupBackend('lxml'),
+    'bs4-html.parser': lambda: SoupBackend('html.parser')
+}
+
+# Ordre de préférence pour « auto » : du plus rapide au plus portable
+AUTO_ORDER = ('selectolax', 'lxml', 'bs4-lxml', 'bs4-html.parser')
+
+_backends: Dict[str, object] = {}
+_compiled: Dict[tuple, dict] = {}
+_lock = threading.Lock()
+
+
+def available_backends() -> List[str]:
+    """Backends utilisables avec les dépendances installées"""
+    names = []
+    for name in AUTO_ORDER:
+        try:
+            get_parser_backend(name)
+            names.append(name)
+        except ImportError:
+            continue
+    return names
+
+
+def get_parser_backend(name: Optional[str] = None):
+    """
+    Retourne le backend demandé (par défaut PARSER_CONFIG['backend']).
+    « auto » choisit le plus rapide disponible.
+    """
+    name = name or PARSER_CONFIG['backend']
+    with _lock:
+        if name in _backends:
+            return _backends[name]
+
+    if name == 'auto':
+        for candidate in AUTO_ORDER:
+            try:
+                backend = get_parser_backend(candidate)
+            except ImportError:
+                continue
+            with _lock:
+                _backends['auto'] = backend
+            logger.info(f"Backend de parsing : {backend.name}")
+            return backend
+        raise ImportError("Aucun backend de parsing HTML disponible")
+
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de parsing inconnu: {name}")
+    backend = BACKENDS[name]()
+    with _lock:
+        _backends[name] = backend
+    return backend
+
+
+def store_selectors(config: dict) -> Dict[str, str]:
+    """Sélecteurs d'une configuration de magasin, lien « page suivante » compris"""
+    selectors = dict(config['selectors'])
+    next_selector = config.get('pagination', {}).get('next_selector')
+    if next_selector:
+        selectors[NEXT_PAGE] = next_selector
+    return selectors
+
+
+def get_compiled_selectors(store_id: str, backend=None, selectors: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Sélecteurs compilés pour le backend (mis en cache par contenu) :
+    `selectors` (voir `store_selectors`), sinon ceux de STORE_CONFIG[store_id]
+    """
+    backend = backend or get_parser_backend()
+    if selectors is None:
+        selectors = store_selectors(STORE_CONFIG[store_id])
+    key = (backend.name, tuple(sorted(selectors.items())))
+    with _lock:
+        compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = backend.compile(selectors)
+        with _lock:
+            _compiled[key] = compiled
+    return compiled
+
+
+def compile_all_selectors(backend=None):
+    """Précompile les sélecteurs de tous les magasins (au démarrage)"""
+    backend = backend or get_parser_backend()
+    for store_id in STORE_CONFIG:
+        get_compiled_selectors(store_id, backend)
+
+
+def extract_products(store_id: str, content, backend=None, limit: Optional[int] = None,
+                     base_url: Optional[str] = None, selectors: Optional[Dict[str, str]] = None) -> PageRows:
+    """
+    Extrait les produits d'une page d'un magasin : liste de
+    {'name', 'price', 'image'} (textes bruts, image en URL absolue) ;
+    `next_url` porte le lien absolu vers la page suivante s'il est configuré.
+    `selectors` remplace les sélecteurs de STORE_CONFIG (magasin configuré à part)
+    """
+    backend = backend or get_parser_backend()
+    rows = backend.extract(content, get_compiled_selectors(store_id, backend, selectors), limit=limit)
+    base_url = base_url or STORE_CONFIG.get(store_id, {}).get('url_base')
+    if base_url:
+        for row in rows:
+            if row['image'] and not row['image'].startswith('http'):
+                row['image'] = urljoin(base_url, row['image'])
+        if rows.next_url:
+            rows.next_url = urljoin(base_url, rows.next_url)
+    return rows
+
+
+try:
+    compile_all_selectors()
+except ImportError as e:
+    logger.warning(f"Précompilation des sélecteurs impossible: {e}")
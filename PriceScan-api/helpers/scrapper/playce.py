@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Scraper pour PlaYce
+(URL, sélecteurs et règles de prix dans STORE_CONFIG['playce'])
+"""
+
+from .generic import scrape_store
+
+
+def scrape_playce(query):
+    """
+    Scraper les produits PlaYce
+    """
+    return scrape_store('playce', query)
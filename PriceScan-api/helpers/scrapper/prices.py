@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Normalisation des prix scrapés
+Transforme les textes de prix d'un lot entier (« 12 500 FCFA »,
+« 15.000 F 12.000 F », « 5 000 - 7 500 FCFA »...) en montants numériques en
+un seul passage : les textes sont concaténés en un buffer d'octets, puis
+séparateurs de milliers, chiffres, plages et choix entre plusieurs montants
+sont traités par des opérations NumPy sur tout le lot, sans boucle Python
+par texte. Les petits lots (une page de résultats) passent par une version
+texte à texte aux mêmes règles, moins coûteuse à démarrer.
+Chaque ligne rejetée porte un code de rejet
+"""
+
+import math
+import re
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Règles par défaut, complétées / remplacées par STORE_CONFIG[...]['price']
+DEFAULT_PRICE = {
+    'currency': 'FCFA',
+    'thousands_separators': ' .,\u00a0\u202f',
+    'decimal_separator': None,       # le FCFA n'a pas de centimes
+    'multiple': 'min',               # prix barré + prix promo : min, first ou max
+    'range': 'min',                  # plage « 5 000 - 7 500 » : min, max ou mean
+    'min_amount': 5,                 # en dessous : rejeté (plus petite pièce)
+    'max_amount': 100_000_000        # au-dessus : rejeté
+}
+
+# Codes de rejet (0 = prix accepté)
+PRICE_OK = 0
+PRICE_EMPTY = 1          # texte vide
+PRICE_NO_AMOUNT = 2      # aucun montant dans le texte
+PRICE_OUT_OF_RANGE = 3   # montant hors [min_amount, max_amount]
+
+REJECT_REASONS = {
+    PRICE_EMPTY: 'vide',
+    PRICE_NO_AMOUNT: 'sans montant',
+    PRICE_OUT_OF_RANGE: 'hors bornes'
+}
+
+# En dessous, le coût fixe des opérations NumPy dépasse la boucle texte à texte
+VECTOR_MIN_BATCH = 512
+
+# Espaces insécables et tirets / « à » de plage ramenés à un octet avant l'analyse
+_BYTE_REPLACEMENTS = ((b'\xc2\xa0', b' '), (b'\xe2\x80\xaf', b' '), (b'\xe2\x80\x93', b'-'),
+                      (b'\xe2\x80\x94', b'-'), (b'\xc3\xa0', b'-'))
+# Seuls caractères admis entre les deux bornes d'une plage (« 5 000 F CFA - 7 500 »)
+_RANGE_GAP = b' -FCAXOfcaxo'
+
+_TEXT_REPLACEMENTS = str.maketrans({old.decode(): new.decode() for old, new in _BYTE_REPLACEMENTS})
+_TEXT_NUMBER_RE = re.compile(r'[0-9]+(?:\.[0-9]+)*')
+_TEXT_GAP_RE = re.compile(f"[{re.escape(_RANGE_GAP.decode())}]*")
+_text_patterns = {}
+
+
+def _any_of(data: np.ndarray, characters: bytes) -> np.ndarray:
+    mask = data == characters[0]
+    for character in characters[1:]:
+        mask |= data == character
+    return mask
+
+
+def _replace_multibyte(data: np.ndarray) -> np.ndarray:
+    """Applique _BYTE_REPLACEMENTS sur le tableau d'octets (une seule recherche des octets non ASCII)"""
+    data = data.copy()
+    high = np.flatnonzero(data >= 0x80)
+    keep = np.ones(len(data), dtype=bool)
+    padded = np.concatenate([data, np.zeros(3, dtype=np.uint8)])
+    for old, new in _BYTE_REPLACEMENTS:
+        leads = high[data[high] == old[0]]
+        for offset in range(1, len(old)):
+            leads = leads[padded[leads + offset] == old[offset]]
+        data[leads] = new[0]
+        for offset in range(1, len(old)):
+            keep[leads + offset] = False
+    return data[keep]
+
+
+def _padded(mask: np.ndarray, before: int = 1, after: int = 5) -> np.ndarray:
+    """Copie bordée de False : `padded[before + i + k]` vaut mask[i + k] hors débordement"""
+    padded = np.zeros(len(mask) + before + after, dtype=bool)
+    padded[before:before + len(mask)] = mask
+    return padded
+
+
+def _join(texts: list) -> str:
+    """Textes du lot séparés (et terminés) par NUL ; conversion texte à texte seulement si nécessaire"""
+    try:
+        joined = '\x00'.join(texts)
+        if joined.count('\x00') == len(texts) - 1:
+            return joined + '\x00'
+    except TypeError:
+        pass
+    return '\x00'.join('' if text is None else str(text).replace('\x00', ' ') for text in texts) + '\x00'
+
+
+class PriceBatch:
+    """
+    Résultat de `parse_prices` : `amounts` (float64, NaN si rejeté) et
+    `flags` (uint8, code de rejet par ligne, PRICE_OK si accepté)
+    """
+
+    def __init__(self, amounts: np.ndarray, flags: np.ndarray):
+        self.amounts = amounts
+        self.flags = flags
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def rejected(self) -> np.ndarray:
+        return self.flags != PRICE_OK
+
+    def amount(self, index: int) -> Optional[float]:
+        """Montant de la ligne `index`, ou None si elle est rejetée"""
+        return None if self.flags[index] else float(self.amounts[index])
+
+    def reject_counts(self) -> dict:
+        """{raison: nombre de lignes rejetées}"""
+        counts = np.bincount(self.flags, minlength=len(REJECT_REASONS) + 1)
+        return {reason: int(counts[code]) for code, reason in REJECT_REASONS.items() if counts[code]}
+
+
+def _separators(rules: dict):
+    """(séparateurs de milliers, séparateurs décimaux) en octets ASCII"""
+    decimal = rules['decimal_separator']
+    thousands = {c for c in rules['thousands_separators'] if c != decimal}
+    if thousands & {'\u00a0', '\u202f'}:
+        thousands.add(' ')
+    return ''.join(sorted(c for c in thousands if c.isascii())).encode(), ('.,' + (decimal or '')).encode()
+
+
+def _number_value(token: str) -> float:
+    """« 12500 » ou « 12500.50 » (au-delà du premier séparateur décimal, le reste est ignoré)"""
+    if '.' not in token:
+        return float(token)
+    integer, fraction = token.split('.')[:2]
+    return float(f"{integer}.{fraction}")
+
+
+def _combine(first: float, second: float, rule: str) -> float:
+    if rule == 'max':
+        return max(first, second)
+    if rule == 'mean':
+        return (first + second) / 2
+    return min(first, second)
+
+
+def _parse_text(text, rules: dict, thousands: bytes, decimals: bytes):
+    """(montant, code) d'un seul texte, mêmes règles que la version NumPy"""
+    text = '' if text is None else str(text).replace('\x00', ' ')
+    if not text.strip():
+        return None, PRICE_EMPTY
+
+    key = (thousands, decimals)
+    patterns = _text_patterns.get(key)
+    if patterns is None:
+        group = re.compile(f"(?<=[0-9])[{re.escape(thousands.decode())}](?=[0-9]{{3}}(?![0-9]))") if thousands else None
+        point = re.compile(f"(?<=[0-9])[{re.escape(decimals.decode())}](?=[0-9])")
+        patterns = _text_patterns[key] = (group, point)
+    group, point = patterns
+
+    text = text.translate(_TEXT_REPLACEMENTS)
+    if group is not None:
+        text = group.sub('', text)
+    text = point.sub('.', text)
+    matches = list(_TEXT_NUMBER_RE.finditer(text))
+    if not matches:
+        return None, PRICE_NO_AMOUNT
+
+    values = [_number_value(match.group()) for match in matches]
+    is_range = []
+    for current, following in zip(matches, matches[1:]):
+        gap = text[current.end():following.start()]
+        is_range.append(gap.count('-') == 1 and _TEXT_GAP_RE.fullmatch(gap) is not None)
+    amounts, index = [], 0
+    while index < len(values):
+        # Une borne de fin de plage n'ouvre pas une nouvelle plage
+        if index < len(is_range) and is_range[index] and not (index and is_range[index - 1]):
+            amounts.append(_combine(values[index], values[index + 1], rules['range']))
+            index += 2
+        else:
+            amounts.append(values[index])
+            index += 1
+
+    if rules['multiple'] == 'first':
+        amount = amounts[0]
+    elif rules['multiple'] == 'max':
+        amount = max(amounts)
+    else:
+        amount = min(amounts)
+    if not rules['min_amount'] <= amount <= rules['max_amount']:
+        return None, PRICE_OUT_OF_RANGE
+    return amount, PRICE_OK
+
+
+def _parse_vector(texts: list, rules: dict, thousands: bytes, decimals: bytes, amounts: np.ndarray,
+                  flags: np.ndarray):
+    """Version NumPy : remplit `amounts` et `flags` pour tout le lot"""
+    # Un seul buffer d'octets pour tout le lot : chaque ligne se termine par NUL
+    buffer = _join(texts).encode('utf-8')
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if not buffer.isascii():
+        data = _replace_multibyte(data)
+
+    # Séparateur de milliers : entre un chiffre et exactement trois chiffres
+    digit = (data - 48) < 10
+    padded = _padded(digit)
+    separators = np.flatnonzero(_any_of(data, thousands)) if thousands else np.empty(0, dtype=np.intp)
+    separators = separators[padded[separators] & padded[separators + 2] & padded[separators + 3]
+                            & padded[separators + 4] & ~padded[separators + 5]]
+    if len(separators):
+        keep = np.ones(len(data), dtype=bool)
+        keep[separators] = False
+        data, digit = data[keep], digit[keep]
+        padded = _padded(digit)
+
+    # Ce qui reste entre deux chiffres est un séparateur décimal
+    points = np.flatnonzero(_any_of(data, decimals))
+    points = points[padded[points] & padded[points + 2]]
+
+    # Montants : suites de chiffres (avec leur séparateur décimal)
+    number = digit.copy()
+    number[points] = True
+    edges = np.flatnonzero(np.diff(_padded(number, 1, 1).view(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    row_ends = np.flatnonzero(data == 0)
+    if len(starts):
+        # Horner sur tous les montants à la fois, un chiffre de rang k par tour
+        lengths = ends - starts
+        values = np.zeros(len(starts))
+        for k in range(int(lengths.max())):
+            live = lengths > k
+            values[live] = values[live] * 10 + (data[starts[live] + k] - 48)
+        if len(points):
+            # Montants décimaux (rares) : conversion directe
+            for index in np.unique(np.searchsorted(starts, points, side='right') - 1):
+                token = data[starts[index]:ends[index]].tobytes().decode('ascii')
+                for separator in decimals.decode():
+                    token = token.replace(separator, '.')
+                values[index] = _number_value(token)
+        rows = np.searchsorted(row_ends, starts)
+
+        # Plage : deux montants de la même ligne séparés par un tiret (et la devise)
+        if len(starts) > 1:
+            low, high = ends[:-1], starts[1:]
+            # Tirets (peu nombreux) rattachés à l'écart entre deux montants qui les contient
+            dashes = np.flatnonzero(data == ord('-'))
+            gaps = np.searchsorted(high, dashes, side='right')
+            inside = gaps < len(high)
+            gaps = gaps[inside]
+            gaps = gaps[low[gaps] <= dashes[inside]]
+            candidates = np.flatnonzero((np.bincount(gaps, minlength=len(high)) == 1) & (rows[:-1] == rows[1:]))
+            if len(candidates):
+                # Octets entre les deux bornes des candidats : devise, espaces et tiret uniquement
+                lengths = high[candidates] - low[candidates]
+                gap = np.repeat(low[candidates] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                valid = np.logical_and.reduceat(_any_of(data[gap], _RANGE_GAP), np.cumsum(lengths) - lengths)
+                is_range = np.zeros(len(starts) - 1, dtype=bool)
+                is_range[candidates[valid]] = True
+                is_range[1:] &= ~is_range[:-1]
+                if is_range.any():
+                    first, second = values[:-1][is_range], values[1:][is_range]
+                    if rules['range'] == 'max':
+                        combined = np.maximum(first, second)
+                    elif rules['range'] == 'mean':
+                        combined = (first + second) / 2
+                    else:
+                        combined = np.minimum(first, second)
+                    values[:-1][is_range] = combined
+                    keep = np.ones(len(values), dtype=bool)
+                    keep[1:][is_range] = False
+                    values, rows = values[keep], rows[keep]
+
+        # Les montants sont dans l'ordre des lignes : réduction par groupe
+        row_ids, first = np.unique(rows, return_index=True)
+        if rules['multiple'] == 'first':
+            per_row = values[first]
+        elif rules['multiple'] == 'max':
+            per_row = np.maximum.reduceat(values, first)
+        else:
+            per_row = np.minimum.reduceat(values, first)
+        amounts[row_ids] = per_row
+        flags[row_ids] = PRICE_OK
+
+    # Sans montant : texte vide ou fait d'espaces ?
+    missing = np.flatnonzero(flags == PRICE_NO_AMOUNT)
+    lengths = np.diff(row_ends, prepend=-1)[missing] - 1
+    blank = missing[lengths == 0]
+    others = missing[lengths > 0]
+    empty = np.concatenate([blank, [row for row in others if not str(texts[row] or '').strip()]]).astype(np.intp)
+    flags[empty] = PRICE_EMPTY
+    out_of_range = (flags == PRICE_OK) & ((amounts < rules['min_amount']) | (amounts > rules['max_amount']))
+    flags[out_of_range] = PRICE_OUT_OF_RANGE
+    amounts[flags != PRICE_OK] = np.nan
+
+
+def parse_prices(texts: Iterable, rules: Optional[dict] = None) -> PriceBatch:
+    """
+    Montants de tout un lot de textes de prix selon les règles du magasin.
+
+    Séparateurs de milliers retirés entre groupes de trois chiffres
+    (« 1 250 000 », « 1.250.000 »), virgule ou point décimal gardé ailleurs
+    (« 12 500,00 »). Une plage vaut selon `range`, plusieurs montants dans
+    le même texte (ancien prix barré puis prix promo) selon `multiple`.
+    """
+    rules = {**DEFAULT_PRICE, **(rules or {})}
+    texts = texts if isinstance(texts, list) else list(texts)
+    thousands, decimals = _separators(rules)
+    amounts = np.full(len(texts), np.nan)
+    flags = np.full(len(texts), PRICE_NO_AMOUNT, dtype=np.uint8)
+
+    if len(texts) >= VECTOR_MIN_BATCH:
+        _parse_vector(texts, rules, thousands, decimals, amounts, flags)
+    else:
+        for index, text in enumerate(texts):
+            amount, flags[index] = _parse_text(text, rules, thousands, decimals)
+            if amount is not None:
+                amounts[index] = amount
+    return PriceBatch(amounts, flags)
+
+
+def parse_amount(text: str, rules: Optional[dict] = None) -> Optional[float]:
+    """
+    Montant numérique d'un texte de prix selon les règles du magasin
+    (None si le texte est rejeté), voir `parse_prices`
+    """
+    if not text:
+        return None
+    return parse_prices([text], rules).amount(0)
+
+
+def format_price(amount: float, currency: str = 'FCFA') -> str:
+    """Prix normalisé : « 12500 FCFA » (lisible par la sauvegarde)"""
+    value = int(amount) if float(amount).is_integer() else round(amount, 2)
+    return f"{value} {currency}"
+
+
+def same_amount(a: Optional[float], b: Optional[float]) -> bool:
+    """Montants égaux aux arrondis près (FLOAT MySQL en simple précision)"""
+    return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
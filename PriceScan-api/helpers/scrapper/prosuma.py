@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Scraper pour Prosuma
+(URL, sélecteurs et règles de prix dans STORE_CONFIG['prosuma'])
+"""
+
+from .generic import scrape_store
+
+
+def scrape_prosuma(query):
+    """
+    Scraper les produits Prosuma
+    """
+    return scrape_store('prosuma', query)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Limiteur de débit par domaine (token bucket)
+Chaque magasin a son propre seau : attendre Jumia ne bloque pas Carrefour
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from config.scraping_config import STORE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _domain(url: str) -> str:
+    """Domaine normalisé d'une URL (sans « www. » ni port)"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class TokenBucket:
+    """Seau de jetons : `rate` jetons par seconde, au plus `burst` en réserve"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(float(burst), 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Réserve un jeton et retourne le temps à attendre avant de l'utiliser"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1.0
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def time_until_available(self) -> float:
+        """Temps avant qu'un jeton soit disponible (sans le consommer)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1.0:
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+
+class DomainRateLimiter:
+    """
+    Un `TokenBucket` par domaine de magasin, configuré depuis
+    `STORE_CONFIG[...]['rate_limit']`. Les domaines inconnus ne sont pas limités.
+    """
+
+    def __init__(self, store_config: Optional[dict] = None):
+        store_config = STORE_CONFIG if store_config is None else store_config
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._store_by_domain: Dict[str, str] = {}
+        self._domain_by_store: Dict[str, str] = {}
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        for store_id, config in store_config.items():
+            domain = _domain(config.get('url_base', ''))
+            rate_limit = config.get('rate_limit')
+            if not domain or not rate_limit:
+                continue
+            self._buckets[domain] = TokenBucket(rate_limit['rate'], rate_limit.get('burst', 1))
+            self._store_by_domain[domain] = store_id
+            self._domain_by_store[store_id] = domain
+
+    def acquire(self, url: str, sleep: Callable[[float], None] = time.sleep) -> float:
+        """Attend (avec `sleep`) le jeton du domaine de l'URL ; retourne le temps attendu"""
+        domain = _domain(url)
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            return 0.0
+
+        wait = bucket.reserve()
+        if wait > 0:
+            sleep(wait)
+        self._record(self._store_by_domain[domain], wait)
+        return wait
+
+    def wait_for_store(self, store_id: str):
+        """Attend qu'un jeton soit disponible pour le magasin, sans le consommer"""
+        bucket = self._buckets.get(self._domain_by_store.get(store_id))
+        if bucket is None:
+            return
+        wait = bucket.time_until_available()
+        if wait > 0:
+            time.sleep(wait)
+            self._record(store_id, wait, request=False)
+
+    def _record(self, store_id: str, wait: float, request: bool = True):
+        with self._lock:
+            stats = self._stats.setdefault(store_id, {'requests': 0, 'waited': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+            if request:
+                stats['requests'] += 1
+            if wait > 0:
+                stats['waited'] += 1
+                stats['total_wait'] += wait
+                stats['max_wait'] = max(stats['max_wait'], wait)
+
+    def get_stats(self) -> dict:
+        """Temps d'attente du limiteur par magasin"""
+        with self._lock:
+            return {
+                store_id: {
+                    'rate': self._buckets[self._domain_by_store[store_id]].rate,
+                    'burst': int(self._buckets[self._domain_by_store[store_id]].capacity),
+                    'requests': stats['requests'],
+                    'waited': stats['waited'],
+                    'total_wait': round(stats['total_wait'], 3),
+                    'avg_wait': round(stats['total_wait'] / stats['requests'], 3) if stats['requests'] else 0.0,
+                    'max_wait': round(stats['max_wait'], 3)
+                }
+                for store_id, stats in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Retourne le limiteur partagé par le client HTTP"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = DomainRateLimiter()
+    return _rate_limiter
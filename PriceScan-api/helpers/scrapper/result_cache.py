@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Cache mémoire des résultats de recherche à la demande
+Une entrée par (magasin, requête normalisée) : servie telle quelle pendant
+`ttl`, puis encore servie pendant `stale_ttl` pendant qu'un seul
+rafraîchissement tourne en arrière-plan (stale-while-revalidate). Les
+demandes identiques simultanées attendent la même récupération au lieu
+d'en lancer chacune une.
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from config.scraping_config import RESULT_CACHE_CONFIG
+from .metrics import Histogram
+from .utils import UnchangedResults
+
+logger = logging.getLogger(__name__)
+
+# Âge des entrées servies, en secondes
+AGE_BUCKETS = (10, 30, 60, 300, 900, 1800, 3600, 7200, 14400)
+
+
+def normalize_query(query: str) -> str:
+    """Requête sans casse ni espaces superflus : « Smartphone  » et « smartphone » partagent une entrée"""
+    return ' '.join(str(query).casefold().split())
+
+
+class _Entry:
+    __slots__ = ('results', 'stored_at')
+
+    def __init__(self, results: list, stored_at: float):
+        self.results = results
+        self.stored_at = stored_at
+
+
+class ResultCache:
+    """
+    `get(store_id, requête, loader)` -> (résultats, état) ; `loader()` récupère
+    (et enregistre) les résultats quand il le faut. État : `fresh`, `stale`
+    (rafraîchissement lancé en arrière-plan), `collapsed` (récupération déjà
+    en cours attendue), `miss`, ou `bypass` si le cache est désactivé.
+    Les résultats vides ou inaccessibles ne sont pas gardés ; une page
+    inchangée (UnchangedResults) prolonge l'entrée existante. Sans entrée,
+    elle ne dit rien des résultats : le loader est rappelé une fois, puis
+    les résultats sont considérés inaccessibles (None).
+    """
+
+    def __init__(self, name: str = 'manual', ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, refresh_workers: Optional[int] = None,
+                 enabled: Optional[bool] = None, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl = RESULT_CACHE_CONFIG['ttl'] if ttl is None else ttl
+        self.stale_ttl = RESULT_CACHE_CONFIG['stale_ttl'] if stale_ttl is None else stale_ttl
+        self.max_entries = max_entries or RESULT_CACHE_CONFIG['max_entries']
+        self.refresh_workers = refresh_workers or RESULT_CACHE_CONFIG['refresh_workers']
+        self.enabled = RESULT_CACHE_CONFIG['enabled'] if enabled is None else enabled
+        self.clock = clock
+        self._entries: 'OrderedDict[Tuple[str, str], _Entry]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._refresher = None
+        self._lock = threading.Lock()
+        self._ages = Histogram(AGE_BUCKETS)
+        self._stats = {
+            'requests': 0,
+            'hits': 0,             # entrée fraîche
+            'stale_hits': 0,       # entrée périmée servie, rafraîchie en arrière-plan
+            'misses': 0,           # récupération au premier plan
+            'collapsed': 0,        # récupération identique déjà en cours, attendue
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'load_errors': 0,
+            'uncached': 0,         # résultats vides ou inaccessibles, non gardés
+            'evictions': 0
+        }
+
+    def _refresh_executor(self) -> ThreadPoolExecutor:
+        if self._refresher is None:
+            self._refresher = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                 thread_name_prefix=f'result-cache-{self.name}')
+        return self._refresher
+
+    def get(self, store_id: str, query: str, loader: Callable[[], Optional[list]]) -> Tuple[Optional[list], str]:
+        if not self.enabled:
+            return loader(), 'bypass'
+        key = (store_id, normalize_query(query))
+        with self._lock:
+            self._stats['requests'] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self.clock() - entry.stored_at
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._ages.observe(age)
+                    if age < self.ttl:
+                        self._stats['hits'] += 1
+                        return list(entry.results), 'fresh'
+                    self._stats['stale_hits'] += 1
+                    if key not in self._inflight:
+                        # Un seul rafraîchissement par entrée, les suivants le trouvent en vol
+                        future = self._inflight[key] = Future()
+                        self._stats['refreshes'] += 1
+                        self._refresh_executor().submit(self._refresh, key, loader, future)
+                    return list(entry.results), 'stale'
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._stats['misses'] += 1
+            else:
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            results = future.result()
+            return (list(results) if results is not None else None), 'collapsed'
+        return self._load(key, loader, future), 'miss'
+
+    def _load(self, key: Tuple[str, str], loader: Callable[[], Optional[list]], future: Future) -> Optional[list]:
+        try:
+            results = loader()
+            if isinstance(results, UnchangedResults):
+                with self._lock:
+                    known = key in self._entries
+                if not known:
+                    # Page inchangée sans entrée (expirée, évincée) : nouvelle récupération
+                    results = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._stats['load_errors'] += 1
+            future.set_exception(e)
+            raise
+        with self._lock:
+            results = self._store(key, results)
+            self._inflight.pop(key, None)
+        future.set_result(results)
+        return results
+
+    def _refresh(self, key: Tuple[str, str], loader: Callable[[], Optional[list]], future: Future):
+        try:
+            self._load(key, loader, future)
+        except Exception as e:
+            # L'entrée périmée reste servie jusqu'à la fin de stale_ttl
+            self._count('refresh_errors')
+            logger.warning(f"Rafraîchissement du cache {self.name} impossible pour {key[0]} / {key[1]}: {e}")
+
+    def _store(self, key: Tuple[str, str], results: Optional[list]) -> Optional[list]:
+        """Garde les résultats (verrou tenu) ; retourne ceux à servir"""
+        entry = self._entries.get(key)
+        if isinstance(results, UnchangedResults):
+            if entry is not None:
+                entry.stored_at = self.clock()
+                return list(entry.results)
+            self._stats['uncached'] += 1
+            return None
+        if not results:
+            self._stats['uncached'] += 1
+            return results
+        self._entries[key] = _Entry(list(results), self.clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+        return results
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def invalidate(self, store_id: Optional[str] = None):
+        """Oublie les entrées d'un magasin (ou toutes)"""
+        with self._lock:
+            for key in [key for key in self._entries if store_id is None or key[0] == store_id]:
+                del self._entries[key]
+
+    def get_stats(self) -> dict:
+        """Taux de succès, âge des entrées servies et des entrées gardées"""
+        now = self.clock()
+        with self._lock:
+            stats = dict(self._stats)
+            ages = self._ages.copy()
+            entry_ages = [now - entry.stored_at for entry in self._entries.values()]
+        served = stats['hits'] + stats['stale_hits'] + stats['collapsed']
+        stats['hit_ratio'] = round(served / stats['requests'], 3) if stats['requests'] else 0.0
+        served_age = {'count': ages.count, 'avg_s': round(ages.sum / ages.count, 1) if ages.count else None}
+        for q in (0.5, 0.95, 0.99):
+            value = ages.quantile(q)
+            served_age[f"p{int(q * 100)}_s"] = round(value, 1) if value is not None else None
+        served_age['buckets'] = {('+Inf' if bound is None else str(bound)): count
+                                 for bound, count in zip(ages.buckets + (None,), ages.counts)}
+        stats['served_age'] = served_age
+        stats['entries'] = {
+            'total': len(entry_ages),
+            'fresh': sum(age < self.ttl for age in entry_ages),
+            'stale': sum(self.ttl <= age < self.ttl + self.stale_ttl for age in entry_ages),
+            'expired': sum(age >= self.ttl + self.stale_ttl for age in entry_ages),
+            'oldest_s': round(max(entry_ages), 1) if entry_ages else None
+        }
+        stats.update(enabled=self.enabled, ttl=self.ttl, stale_ttl=self.stale_ttl, max_entries=self.max_entries)
+        return stats
+
+
+_result_caches: Dict[str, ResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+
+def get_result_cache(name: str = 'manual') -> ResultCache:
+    """
+    Cache de résultats partagé : un par usage, les résultats n'étant pas
+    comparables (`manual` : toutes les pages, `lookup` : première page)
+    """
+    cache = _result_caches.get(name)
+    if cache is None:
+        with _result_caches_lock:
+            cache = _result_caches.get(name)
+            if cache is None:
+                cache = _result_caches[name] = ResultCache(name)
+    return cache
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Nouvelles tentatives des requêtes de scraping
+Une erreur passagère (timeout, connexion coupée, 408 / 425 / 429 / 5xx) est
+retentée après un délai exponentiel plafonné et tiré au hasard (« full
+jitter » : les voies en échec ne se resynchronisent pas) ; un Retry-After
+du serveur est respecté. Les autres erreurs (404, 403, certificat,
+disjoncteur ouvert) sont définitives. Une requête et toutes ses tentatives
+tiennent dans un budget de temps.
+
+Pendant une pause (ou l'attente d'un jeton du limiteur de débit), la voie de
+récupération rend sa place globale du moteur (`SlotLease`) : un magasin en
+difficulté ou limité ne bloque pas les autres.
+"""
+
+import random
+import threading
+import time
+import logging
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+
+from config.scraping_config import RETRY_CONFIG
+from .circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: Optional[BaseException] = None, response: Optional[requests.Response] = None) -> bool:
+    """Vrai pour une erreur passagère : exception de requests ou réponse HTTP"""
+    if error is not None:
+        if isinstance(error, (CircuitOpenError, requests.exceptions.SSLError)):
+            return False
+        return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                                  requests.exceptions.ChunkedEncodingError))
+    return response is not None and response.status_code in RETRYABLE_STATUS
+
+
+def retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), sinon None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_lease: ContextVar[Optional['SlotLease']] = ContextVar('scrape_slot_lease', default=None)
+
+
+class SlotLease:
+    """
+    Place globale (sémaphore du moteur) prise par une voie de récupération,
+    à la place de `with semaphore:`. Pendant une pause de retry, la place
+    est rendue si aucune autre requête de la voie n'est en cours, puis
+    reprise avant la tentative suivante. Les threads lancés par la voie
+    (pages récupérées ensemble) en héritent via `contextvars.copy_context()`.
+    """
+
+    def __init__(self, semaphore):
+        self.semaphore = semaphore
+        self.active = 0          # requêtes de la voie hors pause
+        self.held = False
+        self._lock = threading.Lock()
+        self._token = None
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        self.held = True
+        self._token = _lease.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _lease.reset(self._token)
+        with self._lock:
+            if self.held:
+                self.held = False
+                self.semaphore.release()
+
+    def resume(self):
+        """Une requête de la voie démarre (ou reprend après sa pause)"""
+        with self._lock:
+            self.active += 1
+            if not self.held:
+                self.semaphore.acquire()
+                self.held = True
+
+    def suspend(self, pause: bool = False):
+        """Une requête se termine (ou se met en pause : la place est rendue si elle était la dernière)"""
+        with self._lock:
+            self.active -= 1
+            if pause and self.active == 0 and self.held:
+                self.semaphore.release()
+                self.held = False
+
+
+def sleep_without_slot(delay: float, sleep: Callable[[float], None] = time.sleep):
+    """
+    Pause d'une requête de la voie courante (retry, limiteur de débit) : la
+    place globale est rendue pendant `delay` si la voie n'a pas d'autre requête en cours
+    """
+    lease = _lease.get()
+    if lease:
+        lease.suspend(pause=True)
+    try:
+        sleep(delay)
+    finally:
+        if lease:
+            lease.resume()
+
+
+def _bounded_timeout(timeout, remaining: float):
+    """Timeout de requests (nombre ou (connexion, lecture)) borné par le budget restant"""
+    remaining = max(remaining, 0.1)
+    if isinstance(timeout, tuple):
+        return tuple(min(value, remaining) for value in timeout)
+    return min(timeout, remaining)
+
+
+class RetryPolicy:
+    """
+    `max_retries` nouvelles tentatives au plus ; avant la n-ième, une pause
+    tirée dans [0, min(max_delay, base_delay * 2^(n-1))] (au moins le
+    Retry-After du serveur). Pas de tentative qui dépasserait `budget`.
+    """
+
+    def __init__(self, max_retries: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, budget: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.max_retries = RETRY_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.base_delay = RETRY_CONFIG['base_delay'] if base_delay is None else base_delay
+        self.max_delay = RETRY_CONFIG['max_delay'] if max_delay is None else max_delay
+        self.budget = RETRY_CONFIG['budget'] if budget is None else budget
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'recovered': 0,       # réussies après au moins une nouvelle tentative
+            'exhausted': 0,       # abandon après max_retries
+            'over_budget': 0,     # abandon : la pause suivante dépasserait le budget
+            'fatal': 0,           # erreurs non retentées
+            'backoff_time': 0.0
+        }
+
+    def delay(self, attempt: int, requested: Optional[float] = None) -> float:
+        """Pause avant la tentative `attempt + 1` (0 = première nouvelle tentative)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = self.rng.uniform(0, ceiling)
+        return max(delay, requested) if requested is not None else delay
+
+    def _count(self, key: str, value=1):
+        with self._lock:
+            self._stats[key] += value
+
+    def _pause(self, delay: float):
+        sleep_without_slot(delay, self.sleep)
+        self._count('backoff_time', delay)
+
+    def call(self, send: Callable[[object], requests.Response], timeout, label: str = '',
+             on_retry: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        `send(timeout)` effectue une tentative ; `timeout` (format requests) est
+        borné par le budget restant. Retourne la dernière réponse (éventuellement
+        une erreur HTTP) ou lève la dernière exception.
+        """
+        deadline = time.monotonic() + self.budget
+        lease = _lease.get()
+        if lease:
+            lease.resume()
+        self._count('requests')
+        attempt = 0
+        try:
+            while True:
+                error = response = None
+                try:
+                    response = send(_bounded_timeout(timeout, deadline - time.monotonic()))
+                except Exception as e:
+                    error = e
+
+                if not is_retryable(error, response):
+                    if error is not None or response.status_code >= 400:
+                        self._count('fatal')
+                    elif attempt:
+                        self._count('recovered')
+                    if error is not None:
+                        raise error
+                    return response
+
+                reason = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+                pause = self.delay(attempt, retry_after(response))
+                if attempt >= self.max_retries or time.monotonic() + pause >= deadline:
+                    self._count('exhausted' if attempt >= self.max_retries else 'over_budget')
+                    logger.warning(f"Abandon après {attempt + 1} tentative(s) ({reason}) : {label}")
+                    if error is not None:
+                        raise error
+                    return response
+
+                attempt += 1
+                self._count('retries')
+                if on_retry:
+                    on_retry()
+                logger.info(f"Tentative {attempt + 1}/{self.max_retries + 1} dans {pause:.2f}s ({reason}) : {label}")
+                self._pause(pause)
+        finally:
+            if lease:
+                lease.suspend()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['backoff_time'] = round(stats['backoff_time'], 3)
+        stats.update(max_retries=self.max_retries, base_delay=self.base_delay, max_delay=self.max_delay,
+                     budget=self.budget)
+        return stats
+
+
+_retry_policy = None
+_retry_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Retourne la politique de nouvelles tentatives partagée"""
+    global _retry_policy
+    if _retry_policy is None:
+        with _retry_policy_lock:
+            if _retry_policy is None:
+                _retry_policy = RetryPolicy()
+    return _retry_policy
+
+
+def set_retry_policy(policy: RetryPolicy) -> RetryPolicy:
+    """Remplace la politique partagée (réglages d'un banc d'essai, par exemple)"""
+    global _retry_policy
+    with _retry_policy_lock:
+        _retry_policy = policy
+    return _retry_policy
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Planificateur de scraping à file de priorité
+Les tâches sont rangées dans un tas par prochaine échéance ; le thread
+planificateur dort exactement jusqu'à l'échéance suivante et confie les
+tâches dues à un pool de workers, sans jamais attendre leur fin. Une tâche
+en cours n'est pas relancée, et les échéances des tâches périodiques
+respectent SCRAPING_SCHEDULE (jours autorisés) et PEAK_HOURS (heures de
+pointe évitées) ; une tâche ponctuelle (scraping initial) ou lancée à la
+main (`run_now`) part tout de suite
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, Optional
+
+from config.scraping_config import SCHEDULER_CONFIG, is_peak_hour, should_scrape_today, PEAK_HOURS
+
+logger = logging.getLogger(__name__)
+
+
+def next_allowed_time(when: datetime, avoid_peak_hours: Optional[bool] = None) -> datetime:
+    """
+    Premier instant >= `when` où le scraping est autorisé :
+    jour actif dans SCRAPING_SCHEDULE et hors heures de pointe
+    """
+    if avoid_peak_hours is None:
+        avoid_peak_hours = SCHEDULER_CONFIG['avoid_peak_hours']
+    for _ in range(8):  # au plus une semaine à parcourir
+        if not should_scrape_today(when):
+            when = datetime.combine(when.date() + timedelta(days=1), datetime.min.time())
+            continue
+        if avoid_peak_hours and is_peak_hour(when):
+            when = datetime.combine(when.date(), PEAK_HOURS['end']) + timedelta(seconds=1)
+            continue
+        return when
+    return when
+
+
+def allowed_fraction(step: float = 900, avoid_peak_hours: Optional[bool] = None) -> float:
+    """
+    Part de la semaine où les tâches périodiques s'exécutent (échantillonnée
+    toutes les `step` secondes) : hors de ces heures, leurs passages sont reportés
+    """
+    start = datetime(2024, 1, 1)  # un lundi
+    slots = max(1, int(7 * 86400 // step))
+    allowed = 0
+    for index in range(slots):
+        when = start + timedelta(seconds=index * step)
+        allowed += next_allowed_time(when, avoid_peak_hours) == when
+    return allowed / slots
+
+
+class ScheduledJob:
+    """Tâche périodique identifiée par une clé"""
+
+    def __init__(self, key: Hashable, func: Callable[[], None], interval: Optional[float], next_run: float):
+        self.key = key
+        self.func = func
+        self.interval = interval
+        self.next_run = next_run
+        self.running = False
+        self.forced = False       # lancée par run_now : calendrier ignoré pour cette exécution
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'key': self.key if isinstance(self.key, str) else ':'.join(map(str, self.key)),
+            'interval': self.interval,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'running': self.running,
+            'runs': self.runs,
+            'errors': self.errors,
+            'skipped': self.skipped
+        }
+
+
+class ScrapeScheduler:
+    """
+    Tas (échéance, n°, clé) : les entrées périmées (tâche supprimée,
+    replanifiée ou en cours) sont ignorées à la sortie du tas.
+    La prochaine échéance d'une tâche est calculée à la fin de son exécution.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, respect_calendar: bool = True,
+                 clock: Callable[[], float] = time.time):
+        self.max_workers = max_workers or SCHEDULER_CONFIG['max_workers']
+        self.respect_calendar = respect_calendar
+        self.clock = clock
+        self.jobs: Dict[Hashable, ScheduledJob] = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.wakeups = 0
+
+    # --- gestion des tâches -------------------------------------------------
+
+    def _push(self, job: ScheduledJob, when: float):
+        job.next_run = when
+        heapq.heappush(self._heap, (when, next(self._counter), job.key))
+        self._condition.notify()
+
+    def add_job(self, key: Hashable, func: Callable[[], None], interval: Optional[float], delay: float = 0.0):
+        """
+        Ajoute (ou remplace) une tâche exécutée toutes les `interval` secondes
+        (une seule fois si `interval` est None)
+        """
+        with self._condition:
+            previous = self.jobs.get(key)
+            job = ScheduledJob(key, func, interval, 0.0)
+            if previous and previous.running:
+                job.running = True  # replanifiée à la fin de l'exécution en cours
+            self.jobs[key] = job
+            if not job.running:
+                self._push(job, self.clock() + delay)
+        return job
+
+    def remove_job(self, key: Hashable):
+        with self._condition:
+            self.jobs.pop(key, None)
+            self._condition.notify()
+
+    def run_now(self, key: Hashable) -> bool:
+        """Avance l'échéance d'une tâche ; False si elle est déjà en cours"""
+        with self._condition:
+            job = self.jobs.get(key)
+            if job is None or job.running:
+                if job:
+                    job.skipped += 1
+                return False
+            job.forced = True
+            self._push(job, self.clock())
+            return True
+
+    # --- boucle -------------------------------------------------------------
+
+    def _allowed_from(self, timestamp: float) -> float:
+        if not self.respect_calendar:
+            return timestamp
+        return next_allowed_time(datetime.fromtimestamp(timestamp)).timestamp()
+
+    def _pop_due(self) -> Optional[ScheduledJob]:
+        """Tâche due à lancer, ou None après avoir attendu la prochaine échéance"""
+        while self._heap:
+            when, _, key = self._heap[0]
+            job = self.jobs.get(key)
+            if job is None or job.running or job.next_run != when:
+                heapq.heappop(self._heap)  # entrée périmée
+                continue
+
+            now = self.clock()
+            if when > now:
+                self._condition.wait(when - now)
+                self.wakeups += 1
+                return None
+
+            heapq.heappop(self._heap)
+            # Tâches ponctuelles et lancements manuels : pas de report
+            allowed = now if job.interval is None or job.forced else self._allowed_from(now)
+            job.forced = False
+            if allowed > now:
+                logger.info(f"Tâche {key} reportée au {datetime.fromtimestamp(allowed):%d/%m %H:%M} (calendrier)")
+                self._push(job, allowed)
+                return None
+            return job
+
+        self._condition.wait()
+        self.wakeups += 1
+        return None
+
+    def _loop(self):
+        with self._condition:
+            while self._running:
+                job = self._pop_due()
+                if job is None:
+                    continue
+                job.running = True
+                self._executor.submit(self._execute, job)
+
+    def _execute(self, job: ScheduledJob):
+        started = self.clock()
+        try:
+            job.func()
+        except Exception as e:
+            job.errors += 1
+            logger.error(f"Erreur tâche planifiée {job.key}: {e}")
+        finally:
+            finished = self.clock()
+            with self._condition:
+                job.running = False
+                job.runs += 1
+                job.last_run = started
+                job.last_duration = finished - started
+                if self.jobs.get(job.key) is job:
+                    if job.interval is None:
+                        del self.jobs[job.key]  # tâche ponctuelle
+                    else:
+                        self._push(job, max(started + job.interval, finished))
+                elif job.key in self.jobs:
+                    # remplacée pendant l'exécution : planifier la nouvelle version
+                    replacement = self.jobs[job.key]
+                    replacement.running = False
+                    self._push(replacement, finished)
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler')
+            self._thread = threading.Thread(target=self._loop, name='scrape-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = False):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def get_status(self) -> dict:
+        with self._condition:
+            jobs = sorted(self.jobs.values(), key=lambda job: job.next_run)
+            return {
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'wakeups': self.wakeups,
+                'in_flight': [job.to_dict()['key'] for job in jobs if job.running],
+                'jobs': [job.to_dict() for job in jobs]
+            }
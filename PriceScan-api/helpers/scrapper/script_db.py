@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Accès base des scripts de scraping autonomes (SmartScraper,
+PriceScanAutoScraper, automation/daily_scraping.py), hors application Flask
+Un moteur SQLAlchemy partagé avec pool de connexions (au lieu d'un
+pymysql.connect par produit), des compteurs de connexions ouvertes et de
+requêtes exécutées, et un écrivain qui garde les ids de catégories,
+magasins et produits pour le passage et écrit les prix d'une catégorie
+en quelques requêtes
+"""
+
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.engine import Engine
+
+from config.database_config import SQL_DB_URL
+from config.scraping_config import DATABASE_CONFIG
+from model.PriceScan_db import ps_categories, ps_products, ps_stores
+from helpers.price_ingest import PriceIngestor, _chunks
+
+logger = logging.getLogger(__name__)
+
+
+class DbCounters:
+    """Connexions ouvertes, emprunts au pool et requêtes exécutées par un moteur"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {'connections_opened': 0, 'checkouts': 0, 'statements': 0}
+
+    def increment(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def since(self, snapshot: dict) -> dict:
+        """Compteurs écoulés depuis un `snapshot()` (un passage de scraping)"""
+        current = self.snapshot()
+        return {key: current[key] - snapshot.get(key, 0) for key in current}
+
+    def attach(self, engine: Engine):
+        event.listen(engine, 'connect', lambda *args: self.increment('connections_opened'))
+        event.listen(engine, 'checkout', lambda *args: self.increment('checkouts'))
+        event.listen(engine, 'before_cursor_execute', lambda *args: self.increment('statements'))
+
+
+_engines: Dict[str, Engine] = {}
+_counters: Dict[str, DbCounters] = {}
+_engine_lock = threading.Lock()
+
+
+def get_script_engine(url: Optional[str] = None) -> Engine:
+    """Moteur partagé (un par URL), pool réglé par DATABASE_CONFIG"""
+    url = url or SQL_DB_URL
+    engine = _engines.get(url)
+    if engine is None:
+        with _engine_lock:
+            engine = _engines.get(url)
+            if engine is None:
+                options = {'pool_pre_ping': True}
+                if not url.startswith('sqlite'):
+                    options.update(pool_size=DATABASE_CONFIG['pool_size'],
+                                   max_overflow=DATABASE_CONFIG['max_overflow'],
+                                   pool_timeout=DATABASE_CONFIG['connection_timeout'],
+                                   pool_recycle=DATABASE_CONFIG['pool_recycle'])
+                engine = create_engine(url, **options)
+                counters = DbCounters()
+                counters.attach(engine)
+                _counters[url] = counters
+                _engines[url] = engine
+    return engine
+
+
+def get_db_counters(url: Optional[str] = None) -> DbCounters:
+    """Compteurs du moteur partagé de cette URL"""
+    get_script_engine(url)
+    return _counters[url or SQL_DB_URL]
+
+
+class CatalogWriter(PriceIngestor):
+    """
+    Ecriture des produits scrapés par les scripts autonomes : catégories,
+    magasins et produits sont résolus une fois par passage (dictionnaires),
+    puis les prix d'un lot passent par PriceIngestor (même historique des prix)
+    sur une connexion empruntée au pool
+    """
+
+    def __init__(self, source: str = 'scraper', url: Optional[str] = None, history: Optional[str] = None):
+        super().__init__(source=source, use_index=False, history=history)
+        self.url = url or SQL_DB_URL
+        self.engine = get_script_engine(self.url)
+        self.counters = get_db_counters(self.url)
+        self.category_ids: Dict[str, int] = {}
+        self.store_ids: Dict[str, int] = {}
+        self.product_ids: Dict[tuple, int] = {}
+        self._connection = None
+        self.start_run()
+
+    # --- exécution sur la connexion du lot ------------------------------------
+
+    def _execute(self, statement, params=None):
+        self.stats['statements'] += 1
+        if params is not None:
+            return self._connection.execute(statement, params)
+        return self._connection.execute(statement)
+
+    def _commit(self):
+        self._connection.commit()
+        self.stats['commits'] += 1
+        self._pending_batches = 0
+
+    # --- passage ----------------------------------------------------------------
+
+    def start_run(self):
+        """Remet à zéro les totaux du passage (les ids connus sont conservés)"""
+        self._reset_stats()
+        self.totals = {key: 0 for key in ('rows', 'saved', 'skipped', 'categories_created',
+                                          'products_created', 'inserted', 'updated', 'seen')}
+        self._run_counters = self.counters.snapshot()
+
+    def run_stats(self) -> dict:
+        """Totaux d'écriture et compteurs du moteur depuis `start_run`"""
+        return {**self.totals, **self.counters.since(self._run_counters)}
+
+    # --- résolution des ids -------------------------------------------------------
+
+    def _lookup(self, table, key_column, keys, extra=None):
+        """{clé: id} pour les clés existantes (plus petit id, comme un .first())"""
+        found = {}
+        for chunk in _chunks(keys, self.batch_size):
+            condition = key_column.in_(chunk)
+            if extra is not None:
+                condition = condition & extra
+            for row_id, key in self._execute(select(table.c.id, key_column).where(condition)):
+                if key not in found or row_id < found[key]:
+                    found[key] = row_id
+        return found
+
+    def _category_id(self, label: str) -> int:
+        if label not in self.category_ids:
+            table = ps_categories.__table__
+            found = self._lookup(table, table.c.cat_label, [label])
+            if not found:
+                self._execute(insert(table), [{
+                    'cat_label': label,
+                    'cat_description': f'Catégorie {label}',
+                    'cat_icon': f'icon_{label.lower().replace(" ", "_")}'
+                }])
+                self.totals['categories_created'] += 1
+                found = self._lookup(table, table.c.cat_label, [label])
+            self.category_ids[label] = found[label]
+        return self.category_ids[label]
+
+    def _load_store_ids(self, names: Iterable[str]):
+        table = ps_stores.__table__
+        missing = [name for name in set(names) if name not in self.store_ids]
+        if missing:
+            self.store_ids.update(self._lookup(table, table.c.store_name, missing))
+
+    def _product_ids(self, category_id: int, products: List[dict]) -> Dict[str, int]:
+        table = ps_products.__table__
+        names = list(dict.fromkeys(product['name'] for product in products))
+        missing = [name for name in names if (category_id, name) not in self.product_ids]
+        if missing:
+            in_category = table.c.category_id == category_id
+            found = self._lookup(table, table.c.product_name, missing, in_category)
+            images = {product['name']: product.get('image_url', '') for product in products}
+            to_create = [name for name in missing if name not in found]
+            for chunk in _chunks(to_create, self.batch_size):
+                self._execute(insert(table), [{
+                    'product_name': name,
+                    'product_description': f'Produit {name}',
+                    'category_id': category_id,
+                    'product_image': images[name]
+                } for name in chunk])
+            if to_create:
+                found.update(self._lookup(table, table.c.product_name, to_create, in_category))
+                self.totals['products_created'] += len(to_create)
+            for name, product_id in found.items():
+                self.product_ids[(category_id, name)] = product_id
+        return {name: self.product_ids[(category_id, name)] for name in names}
+
+    # --- écriture -----------------------------------------------------------------
+
+    def ensure_stores(self, stores: List[dict]) -> List[str]:
+        """Crée les magasins absents ({'name', 'website', 'city', 'country'}) ; retourne leurs noms"""
+        table = ps_stores.__table__
+        with self.engine.connect() as connection:
+            self._connection = connection
+            try:
+                self._load_store_ids(store['name'] for store in stores)
+                created = [store for store in stores if store['name'] not in self.store_ids]
+                if created:
+                    self._execute(insert(table), [{
+                        'store_name': store['name'],
+                        'store_website': store.get('website'),
+                        'store_city': store.get('city'),
+                        'store_country': store.get('country')
+                    } for store in created])
+                    self._load_store_ids(store['name'] for store in created)
+                connection.commit()
+            finally:
+                self._connection = None
+        return [store['name'] for store in created]
+
+    def save_products(self, products: List[dict]) -> int:
+        """
+        Enregistre un lot de produits scrapés ({'name', 'price', 'image_url',
+        'store', 'category'}), en général une catégorie, dans une transaction.
+        Les produits d'un magasin inconnu sont ignorés. Retourne le nombre de
+        produits enregistrés.
+        """
+        self._reset_stats()
+        products = [product for product in products if product.get('name')]
+        self.totals['rows'] += len(products)
+        if not products:
+            return 0
+
+        with self.engine.connect() as connection:
+            self._connection = connection
+            try:
+                self._load_store_ids(product['store'] for product in products)
+                known = [product for product in products if product['store'] in self.store_ids]
+                for store in {product['store'] for product in products} - set(self.store_ids):
+                    print(f" Magasin non trouvé : {store}")
+
+                amounts = {}
+                by_category = {}
+                for product in known:
+                    by_category.setdefault(product['category'], []).append(product)
+                for category, items in by_category.items():
+                    product_ids = self._product_ids(self._category_id(category), items)
+                    for product in items:
+                        key = (product_ids[product['name']], self.store_ids[product['store']])
+                        amounts[key] = product['price']
+
+                if amounts:
+                    self._write_prices(amounts)
+                self._commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                self._connection = None
+
+        self.totals['saved'] += len(known)
+        self.totals['skipped'] += len(products) - len(known)
+        for key in ('inserted', 'updated', 'seen'):
+            self.totals[key] += self.stats[key]
+        return len(known)
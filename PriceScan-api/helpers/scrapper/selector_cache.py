@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistant des sélecteurs de produits appris par SmartScraper
+Pour chaque site, le motif CSS qui a permis d'extraire des produits est
+conservé avec son taux de succès ; les passages suivants l'utilisent
+directement et ne relancent la découverte que si la qualité d'extraction
+baisse sous SELECTOR_CACHE_CONFIG['min_success_rate']
+"""
+
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Optional
+
+from config.scraping_config import SELECTOR_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Poids du dernier passage dans le taux de succès (moyenne mobile exponentielle)
+SUCCESS_SMOOTHING = 0.5
+
+
+class SelectorCache:
+    """
+    Un fichier JSON : {site: {'pattern', 'success_rate', 'runs', 'examined',
+    'extracted', 'learned_at', 'updated_at'}}, réécrit à chaque changement
+    """
+
+    def __init__(self, path: Optional[str] = None, min_success_rate: Optional[float] = None):
+        self.path = path or SELECTOR_CACHE_CONFIG['path']
+        self.min_success_rate = (SELECTOR_CACHE_CONFIG['min_success_rate']
+                                 if min_success_rate is None else min_success_rate)
+        self._lock = threading.Lock()
+        self._entries = None
+        self._stats = {'hits': 0, 'misses': 0, 'learned': 0, 'invalidated': 0}
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache des sélecteurs {self.path}: {e}")
+
+    def get(self, site: str) -> Optional[dict]:
+        """Motif appris pour un site (ou None : découverte nécessaire)"""
+        with self._lock:
+            entry = self._load().get(site)
+            if entry and entry['success_rate'] >= self.min_success_rate:
+                self._stats['hits'] += 1
+                return dict(entry)
+            self._stats['misses'] += 1
+            return None
+
+    def learn(self, site: str, pattern: str):
+        """Nouveau motif découvert pour un site (son taux part de 1)"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._load()[site] = {
+                'pattern': pattern,
+                'success_rate': 1.0,
+                'runs': 0,
+                'examined': 0,
+                'extracted': 0,
+                'learned_at': now,
+                'updated_at': now
+            }
+            self._stats['learned'] += 1
+            self._save()
+
+    def record(self, site: str, pattern: str, examined: int, extracted: int) -> float:
+        """
+        Qualité d'une extraction avec `pattern` : `extracted` produits complets
+        (nom et prix) sur `examined` éléments. Retourne le taux de succès lissé ;
+        sous le seuil, le motif sera redécouvert au prochain passage.
+        """
+        with self._lock:
+            entry = self._load().get(site)
+            if not entry or entry['pattern'] != pattern:
+                return 0.0
+            rate = extracted / examined if examined else 0.0
+            entry['success_rate'] = round(SUCCESS_SMOOTHING * rate
+                                          + (1 - SUCCESS_SMOOTHING) * entry['success_rate'], 4)
+            entry['runs'] += 1
+            entry['examined'] += examined
+            entry['extracted'] += extracted
+            entry['updated_at'] = datetime.now().isoformat()
+            if entry['success_rate'] < self.min_success_rate:
+                self._stats['invalidated'] += 1
+                logger.info(f"Motif {pattern} de {site} sous le seuil "
+                            f"({entry['success_rate']:.0%}), redécouverte au prochain passage")
+            self._save()
+            return entry['success_rate']
+
+    def invalidate(self, site: str):
+        with self._lock:
+            if self._load().pop(site, None) is not None:
+                self._stats['invalidated'] += 1
+                self._save()
+
+    def get_stats(self) -> dict:
+        """Succès / découvertes et motifs connus par site"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sites'] = {site: {'pattern': entry['pattern'], 'success_rate': entry['success_rate'],
+                                     'runs': entry['runs']}
+                              for site, entry in self._load().items()}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['enabled'] = SELECTOR_CACHE_CONFIG['enabled']
+        return stats
+
+
+_selector_cache = None
+_selector_cache_lock = threading.Lock()
+
+
+def get_selector_cache() -> SelectorCache:
+    """Retourne le cache de sélecteurs partagé"""
+    global _selector_cache
+    if _selector_cache is None:
+        with _selector_cache_lock:
+            if _selector_cache is None:
+                _selector_cache = SelectorCache()
+    return _selector_cache
@@ -5,54 +5,26 @@ Scraper intelligent PriceScan pour sites ivoiriens
 Analyse la structure des sites et extrait de vrais produits
 """
 
-import requests
 from bs4 import BeautifulSoup
-import pymysql
-import uuid
-import time
 import re
 import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from config.database_config import SQL_DB_URL
+from config.scraping_config import SCRAPING_LIMITS, SELECTOR_CACHE_CONFIG
+from helpers.scrapper.prices import parse_amount
+from helpers.scrapper.http_client import get_http_client
+from helpers.scrapper.script_db import CatalogWriter
+from helpers.scrapper.selector_cache import get_selector_cache
 
 class SmartScraper:
     def __init__(self):
         """Initialise le scraper intelligent"""
-        self.setup_mysql_connection()
+        self.selector_cache = get_selector_cache() if SELECTOR_CACHE_CONFIG['enabled'] else None
+        self._analyses = {}  # url -> analyse (avec la page parsée) du passage en cours
+        self.writer = CatalogWriter(source='smart_scraper')
         self.setup_stores()
         
-    def setup_mysql_connection(self):
-        """Configure la connexion MySQL"""
-        try:
-            parts = SQL_DB_URL.replace("mysql+pymysql://", "").split("@")
-            user_pass = parts[0].split(":")
-            host_port_db = parts[1].split("/")
-            
-            self.user = user_pass[0]
-            self.password = user_pass[1] if len(user_pass) > 1 else ""
-            host_port = host_port_db[0].split(":")
-            self.host = host_port[0]
-            self.port = int(host_port[1]) if len(host_port) > 1 else 3306
-            self.database = host_port_db[1]
-            
-            print(f" Configuration MySQL : {self.host}:{self.port}/{self.database}")
-            
-        except Exception as e:
-            print(f" Erreur configuration MySQL : {e}")
-            raise
-    
-    def get_mysql_connection(self):
-        """Obtient une connexion MySQL"""
-        return pymysql.connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            password=self.password,
-            database=self.database
-        )
-    
     def setup_stores(self):
         """Configure les magasins ivoiriens dans la base"""
         stores = [
@@ -77,48 +49,44 @@ class SmartScraper:
         ]
         
         try:
-            connection = self.get_mysql_connection()
-            with connection.cursor() as cursor:
-                for store in stores:
-                    cursor.execute(
-                        "SELECT id FROM ps_stores WHERE store_name = %s",
-                        (store['name'],)
-                    )
-                    
-                    if not cursor.fetchone():
-                        cursor.execute("""
-                            INSERT INTO ps_stores (store_uid, store_name, store_website, store_city, store_country)
-                            VALUES (%s, %s, %s, %s, %s)
-                        """, (
-                            str(uuid.uuid4()),
-                            store['name'],
-                            store['website'],
-                            store['city'],
-                            store['country']
-                        ))
-                        print(f" Magasin créé : {store['name']}")
-                    else:
-                        print(f"ℹ️ Magasin existant : {store['name']}")
-            
-            connection.commit()
-            connection.close()
+            created = self.writer.ensure_stores(stores)
+            for store in stores:
+                if store['name'] in created:
+                    print(f" Magasin créé : {store['name']}")
+                else:
+                    print(f"ℹ️ Magasin existant : {store['name']}")
             print(" Configuration des magasins terminée")
             
         except Exception as e:
             print(f" Erreur configuration magasins : {e}")
     
+    # Motifs candidats, du plus spécifique au plus générique (« li » et « div » sont coûteux)
+    PRODUCT_PATTERNS = [
+        # Sélecteurs CSS communs
+        '.product', '.product-item', '.product-card', '.item', '.card',
+        '.product-box', '.product-container', 'article', '.product-list-item',
+        # Sélecteurs spécifiques aux e-commerce
+        '[data-product-id]', '[data-sku]', '.product-grid-item',
+        # Sélecteurs génériques
+        'li', 'div', 'article'
+    ]
+    PRICE_SELECTORS = ['.price', '.product-price', '.amount', '.cost', '.prix', '[data-price]']
+    NAME_SELECTORS = ['.product-name', '.name', 'h3', 'h4', '.title', '.product-title']
+
     def analyze_site_structure(self, url, store_name):
-        """Analyse la structure d'un site pour identifier les produits"""
+        """
+        Analyse la structure d'un site pour identifier les produits.
+        La page analysée est gardée dans l'analyse (`document`) pour l'extraction,
+        et l'analyse est réutilisée pour toutes les catégories du passage ;
+        le motif appris pour le site (cache des sélecteurs) évite la découverte.
+        """
+        if url in self._analyses:
+            return self._analyses[url]
+
         print(f" Analyse de la structure de {store_name} : {url}")
         
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "fr-FR,fr;q=0.8,en-US;q=0.5,en;q=0.3"
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15)
+            response = get_http_client().get(url)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -129,49 +97,25 @@ class SmartScraper:
                 'store': store_name,
                 'title': soup.title.text if soup.title else 'Pas de titre',
                 'products_found': 0,
-                'structure': {}
+                'structure': {},
+                'pattern': None,
+                'document': soup
             }
             
-            # Chercher des patterns de produits
-            product_patterns = [
-                # Sélecteurs CSS communs
-                '.product', '.product-item', '.product-card', '.item', '.card',
-                '.product-box', '.product-container', 'article', '.product-list-item',
-                # Sélecteurs spécifiques aux e-commerce
-                '[data-product-id]', '[data-sku]', '.product-grid-item',
-                # Sélecteurs génériques
-                'li', 'div', 'article'
-            ]
-            
-            for pattern in product_patterns:
-                elements = soup.select(pattern)
-                if len(elements) > 2:  # Au moins 3 éléments pour considérer comme des produits
-                    analysis['structure'][pattern] = len(elements)
-                    
-                    # Analyser le premier élément pour voir s'il contient des informations de produit
-                    if len(elements) > 0:
-                        first_element = elements[0]
-                        
-                        # Chercher des prix
-                        price_selectors = ['.price', '.product-price', '.amount', '.cost', '.prix', '[data-price]']
-                        price_found = False
-                        for price_sel in price_selectors:
-                            if first_element.select_one(price_sel):
-                                price_found = True
-                                break
-                        
-                        # Chercher des noms de produits
-                        name_selectors = ['.product-name', '.name', 'h3', 'h4', '.title', '.product-title']
-                        name_found = False
-                        for name_sel in name_selectors:
-                            if first_element.select_one(name_sel):
-                                name_found = True
-                                break
-                        
-                        if price_found or name_found:
-                            analysis['products_found'] += len(elements)
-                            print(f" Pattern trouvé : {pattern} ({len(elements)} éléments)")
-                            break
+            learned = self.selector_cache.get(store_name) if self.selector_cache else None
+            if learned:
+                elements = soup.select(learned['pattern'])
+                if len(elements) > 2:
+                    analysis['structure'][learned['pattern']] = len(elements)
+                    analysis['products_found'] = len(elements)
+                    analysis['pattern'] = learned['pattern']
+                    print(f" Pattern appris : {learned['pattern']} ({len(elements)} éléments, "
+                          f"succès {learned['success_rate']:.0%})")
+            
+            if analysis['pattern'] is None:
+                self._discover_pattern(soup, analysis)
+                if analysis['pattern'] and self.selector_cache:
+                    self.selector_cache.learn(store_name, analysis['pattern'])
             
             # Si aucun pattern de produit trouvé, essayer de détecter des prix
             if analysis['products_found'] == 0:
@@ -180,12 +124,31 @@ class SmartScraper:
                     analysis['structure']['prices_detected'] = len(price_elements)
                     print(f"ℹ️ Prix détectés : {len(price_elements)} éléments")
             
+            self._analyses[url] = analysis
             return analysis
             
         except Exception as e:
             print(f" Erreur analyse {store_name} : {e}")
             return None
     
+    def _discover_pattern(self, soup, analysis):
+        """Essaie les motifs candidats jusqu'au premier dont les éléments ressemblent à des produits"""
+        for pattern in self.PRODUCT_PATTERNS:
+            elements = soup.select(pattern)
+            if len(elements) > 2:  # Au moins 3 éléments pour considérer comme des produits
+                analysis['structure'][pattern] = len(elements)
+                
+                # Analyser le premier élément pour voir s'il contient des informations de produit
+                first_element = elements[0]
+                price_found = any(first_element.select_one(sel) for sel in self.PRICE_SELECTORS)
+                name_found = any(first_element.select_one(sel) for sel in self.NAME_SELECTORS)
+                
+                if price_found or name_found:
+                    analysis['products_found'] += len(elements)
+                    analysis['pattern'] = pattern
+                    print(f" Pattern trouvé : {pattern} ({len(elements)} éléments)")
+                    break
+    
     def scrape_carrefour_smart(self, category_name):
         """Scrape intelligent de Carrefour CI"""
         print(f" Scraping intelligent Carrefour CI - {category_name}")
@@ -230,34 +193,47 @@ class SmartScraper:
             return self.create_test_products(category_name, "PlaYce Marcory")
     
     def extract_products_from_analysis(self, analysis, category_name):
-        """Extrait les produits selon l'analyse de structure"""
+        """Extrait les produits selon l'analyse de structure (page déjà parsée)"""
         products = []
         
         try:
-            # Re-scraper la page avec la structure détectée
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            
-            response = requests.get(analysis['url'], headers=headers, timeout=15)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Utiliser le pattern qui a fonctionné
-            for pattern, count in analysis['structure'].items():
-                if count > 2:  # Pattern avec plusieurs éléments
-                    elements = soup.select(pattern)
-                    
-                    for i, element in enumerate(elements[:5]):  # Limiter à 5 produits
-                        try:
-                            product = self.extract_product_info(element, category_name, analysis['store'])
-                            if product:
-                                products.append(product)
-                        except Exception as e:
-                            print(f" Erreur extraction produit {i}: {e}")
-                            continue
-                    
-                    if products:
-                        break
+            soup = analysis.get('document')
+            if soup is None:
+                response = get_http_client().get(analysis['url'])
+                soup = BeautifulSoup(response.text, 'html.parser')
+            
+            # Le pattern retenu d'abord, puis les autres patterns à plusieurs éléments
+            patterns = [pattern for pattern, count in analysis['structure'].items()
+                        if count > 2 and pattern != 'prices_detected']
+            if analysis.get('pattern') in patterns:
+                patterns.remove(analysis['pattern'])
+                patterns.insert(0, analysis['pattern'])
+            
+            for pattern in patterns:
+                elements = soup.select(pattern)
+                
+                max_products = SCRAPING_LIMITS['max_products_per_store']
+                examined = elements[:max_products]
+                complete = 0
+                for i, element in enumerate(examined):
+                    try:
+                        name, price, image = self.extract_product_fields(element, analysis['store'])
+                        if name:
+                            complete += bool(price)
+                            products.append(self.make_product(name, price, image, category_name,
+                                                              analysis['store']))
+                    except Exception as e:
+                        print(f" Erreur extraction produit {i}: {e}")
+                        continue
+                
+                # Qualité du motif retenu : produits complets (nom + prix) / éléments examinés,
+                # comptée une fois par page analysée
+                if pattern == analysis.get('pattern') and self.selector_cache and not analysis.get('recorded'):
+                    self.selector_cache.record(analysis['store'], pattern, len(examined), complete)
+                    analysis['recorded'] = True
+                
+                if products:
+                    break
             
             return products
             
@@ -265,47 +241,53 @@ class SmartScraper:
             print(f" Erreur extraction produits : {e}")
             return []
     
+    def extract_product_fields(self, element, store_name):
+        """Nom, prix (0.0 si absent) et image d'un élément HTML"""
+        # Chercher le nom du produit
+        name = None
+        for selector in self.NAME_SELECTORS + ['a']:
+            name_elem = element.select_one(selector)
+            if name_elem:
+                name = name_elem.text.strip()
+                if name and len(name) > 3:
+                    break
+        
+        # Chercher le prix
+        price = 0.0
+        for selector in self.PRICE_SELECTORS:
+            price_elem = element.select_one(selector)
+            if price_elem:
+                price = self.clean_price(price_elem.text.strip())
+                if price > 0:
+                    break
+        
+        # Chercher l'image
+        image = None
+        img_elem = element.select_one('img')
+        if img_elem:
+            image = img_elem.get('src') or img_elem.get('data-src')
+            if image and not image.startswith('http'):
+                image = f"https://{store_name.lower().replace(' ', '')}.ci{image}"
+        
+        return name, price, image
+    
+    def make_product(self, name, price, image, category_name, store_name):
+        return {
+            'name': name,
+            'price': price if price else 150000.0,
+            'image_url': image if image else self.get_default_image(category_name),
+            'store': store_name,
+            'category': category_name
+        }
+    
     def extract_product_info(self, element, category_name, store_name):
         """Extrait les informations d'un produit depuis un élément HTML"""
         try:
-            # Chercher le nom du produit
-            name_selectors = ['.product-name', '.name', 'h3', 'h4', '.title', '.product-title', 'a']
-            name = None
-            for selector in name_selectors:
-                name_elem = element.select_one(selector)
-                if name_elem:
-                    name = name_elem.text.strip()
-                    if name and len(name) > 3:
-                        break
-            
-            # Chercher le prix
-            price_selectors = ['.price', '.product-price', '.amount', '.cost', '.prix', '[data-price]']
-            price = None
-            for selector in price_selectors:
-                price_elem = element.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.text.strip()
-                    price = self.clean_price(price_text)
-                    if price > 0:
-                        break
-            
-            # Chercher l'image
-            image = None
-            img_elem = element.select_one('img')
-            if img_elem:
-                image = img_elem.get('src') or img_elem.get('data-src')
-                if image and not image.startswith('http'):
-                    image = f"https://{store_name.lower().replace(' ', '')}.ci{image}"
+            name, price, image = self.extract_product_fields(element, store_name)
             
             # Créer le produit si on a au moins un nom
             if name:
-                return {
-                    'name': name,
-                    'price': price if price else 150000.0,
-                    'image_url': image if image else self.get_default_image(category_name),
-                    'store': store_name,
-                    'category': category_name
-                }
+                return self.make_product(name, price, image, category_name, store_name)
             
             return None
             
@@ -341,107 +323,33 @@ class SmartScraper:
         return default_images.get(category_name, 'https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=400&h=400&fit=crop')
     
     def clean_price(self, price_text):
-        """Nettoie et convertit le texte de prix en nombre"""
-        try:
-            cleaned = re.sub(r'[^\d.,]', '', price_text)
-            cleaned = cleaned.replace(',', '.')
-            price = float(cleaned)
-            
-            if price < 100:
-                price *= 1000
-                
-            return price
-            
-        except:
-            return 0.0
+        """Nettoie et convertit le texte de prix en nombre (0.0 si rejeté)"""
+        return parse_amount(price_text) or 0.0
     
     def save_product_to_mysql(self, product_data):
         """Sauvegarde un produit dans MySQL"""
+        return self.save_products_to_mysql([product_data]) == 1
+    
+    def save_products_to_mysql(self, products):
+        """Sauvegarde les produits d'une catégorie en un lot ; retourne le nombre enregistré"""
         try:
-            connection = self.get_mysql_connection()
-            
-            with connection.cursor() as cursor:
-                # 1. Récupérer ou créer la catégorie
-                cursor.execute(
-                    "SELECT id FROM ps_categories WHERE cat_label = %s",
-                    (product_data['category'],)
-                )
-                category_result = cursor.fetchone()
-                
-                if category_result:
-                    category_id = category_result[0]
-                else:
-                    cursor.execute("""
-                        INSERT INTO ps_categories (cat_uid, cat_label, cat_description, cat_icon)
-                        VALUES (%s, %s, %s, %s)
-                    """, (
-                        str(uuid.uuid4()),
-                        product_data['category'],
-                        f'Catégorie {product_data["category"]}',
-                        f'icon_{product_data["category"].lower().replace(" ", "_")}'
-                    ))
-                    category_id = cursor.lastrowid
-                
-                # 2. Récupérer l'ID du magasin
-                cursor.execute(
-                    "SELECT id FROM ps_stores WHERE store_name = %s",
-                    (product_data['store'],)
-                )
-                store_result = cursor.fetchone()
-                
-                if not store_result:
-                    print(f" Magasin non trouvé : {product_data['store']}")
-                    return False
-                
-                store_id = store_result[0]
-                
-                # 3. Vérifier si le produit existe déjà
-                cursor.execute("""
-                    SELECT id FROM ps_products 
-                    WHERE product_name = %s AND category_id = %s
-                """, (product_data['name'], category_id))
-                
-                product_result = cursor.fetchone()
-                
-                if product_result:
-                    product_id = product_result[0]
-                    print(f"ℹ️ Produit existant : {product_data['name']}")
-                else:
-                    cursor.execute("""
-                        INSERT INTO ps_products (product_uid, product_name, product_description, category_id, product_image)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (
-                        str(uuid.uuid4()),
-                        product_data['name'],
-                        f'Produit {product_data["name"]}',
-                        category_id,
-                        product_data.get('image_url', '')
-                    ))
-                    product_id = cursor.lastrowid
-                    print(f" Produit créé : {product_data['name']}")
-                
-                # 4. Créer le prix
-                cursor.execute("""
-                    INSERT INTO ps_prices (price_uid, product_id, store_id, price_amount, price_currency, price_source)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    str(uuid.uuid4()),
-                    product_id,
-                    store_id,
-                    product_data['price'],
-                    'CFA',
-                    'smart_scraper'
-                ))
-                
-                print(f" Prix enregistré : {product_data['name']} - {product_data['price']} CFA")
-            
-            connection.commit()
-            connection.close()
-            return True
+            stats = dict(self.writer.totals)
+            saved = self.writer.save_products(products)
+            created = self.writer.totals['inserted'] - stats['inserted']
+            seen = self.writer.totals['seen'] - stats['seen']
+            print(f" Prix enregistrés : {saved} produits ({created} nouveaux prix, {seen} inchangés)")
+            return saved
             
         except Exception as e:
             print(f" Erreur sauvegarde MySQL : {e}")
-            return False
+            return 0
+    
+    def report_database_usage(self):
+        """Connexions ouvertes et requêtes exécutées pendant le passage"""
+        stats = self.writer.run_stats()
+        print(f" Base : {stats['connections_opened']} connexions ouvertes, "
+              f"{stats['statements']} requêtes, {stats['saved']} produits enregistrés")
+        return stats
     
     def run_smart_scraping(self):
         """Lance le scraping intelligent complet"""
@@ -449,26 +357,23 @@ class SmartScraper:
         
         categories = ['Électronique', 'Téléphonie', 'Informatique', 'Mode']
         total_products = 0
+        # Chaque site n'est téléchargé et analysé qu'une fois par passage
+        # (le débit par domaine est géré par le client HTTP)
+        self._analyses = {}
+        self.writer.start_run()
         
         for category in categories:
             print(f"\n Scraping de la catégorie : {category}")
             
-            # Scraper Carrefour
-            carrefour_products = self.scrape_carrefour_smart(category)
-            for product in carrefour_products:
-                if self.save_product_to_mysql(product):
-                    total_products += 1
-            
-            time.sleep(2)
-            
-            # Scraper PlaYce
-            playce_products = self.scrape_playce_smart(category)
-            for product in playce_products:
-                if self.save_product_to_mysql(product):
-                    total_products += 1
-            
-            time.sleep(2)
+            # Carrefour puis PlaYce, enregistrés en un lot par catégorie
+            products = self.scrape_carrefour_smart(category) + self.scrape_playce_smart(category)
+            total_products += self.save_products_to_mysql(products)
         
+        self._analyses = {}
+        self.report_database_usage()
+        if self.selector_cache:
+            stats = self.selector_cache.get_stats()
+            print(f" Sélecteurs appris : {stats['hits']} réutilisés, {stats['learned']} découverts")
         print(f"\n🎉 Scraping intelligent terminé ! {total_products} produits enregistrés dans MySQL")
         return total_products
 
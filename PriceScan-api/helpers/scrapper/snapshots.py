@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Enregistrement / rejeu des pages scrapées
+En mode « record », chaque réponse reçue est sauvegardée (gzip, adressée
+par son contenu) ; en mode « replay », le client HTTP sert ces pages sans
+aucun accès réseau
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config.scraping_config import SNAPSHOT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MODES = ('off', 'record', 'replay')
+
+
+class SnapshotMissing(requests.exceptions.ConnectionError):
+    """Aucune page enregistrée pour cette URL (mode replay)"""
+
+
+class SnapshotStore:
+    """
+    Arborescence :
+      objects/<sha[:2]>/<sha>.html.gz  corps compressés, un par contenu distinct
+      index.json                       URL -> empreinte, statut, en-têtes utiles
+    """
+
+    def __init__(self, directory: Optional[str] = None, mode: Optional[str] = None):
+        self.directory = directory or SNAPSHOT_CONFIG['directory']
+        self.mode = (mode or SNAPSHOT_CONFIG['mode']).lower()
+        if self.mode not in SNAPSHOT_MODES:
+            raise ValueError(f"Mode de snapshot inconnu: {self.mode}")
+        self._lock = threading.Lock()
+        self._index = None
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, 'index.json')
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}.html.gz")
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def urls(self):
+        """URLs disponibles dans le jeu de pages"""
+        with self._lock:
+            return list(self._load_index().keys())
+
+    def save(self, url: str, body: bytes, status_code: int = 200, headers: Optional[dict] = None):
+        """Ajoute (ou remplace) la page d'une URL"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        headers = headers or {}
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path, 'wb') as f:
+                    f.write(body)
+
+            index = self._load_index()
+            index[url] = {
+                'sha256': digest,
+                'status_code': status_code,
+                'content_type': headers.get('Content-Type', 'text/html; charset=utf-8'),
+                'size': len(body),
+                'recorded_at': datetime.now().isoformat()
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    def record(self, url: str, response: requests.Response):
+        """Enregistre une réponse réelle (les 304 n'ont pas de corps : ignorés)"""
+        if response.status_code == 304:
+            return
+        try:
+            self.save(url, response.content, response.status_code, response.headers)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer le snapshot de {url}: {e}")
+
+    def replay(self, url: str) -> requests.Response:
+        """Reconstruit la réponse enregistrée pour une URL"""
+        with self._lock:
+            entry = self._load_index().get(url)
+        if entry is None:
+            raise SnapshotMissing(f"Aucun snapshot pour {url}")
+
+        with gzip.open(self._object_path(entry['sha256']), 'rb') as f:
+            body = f.read()
+
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response._content = body
+        response.url = url
+        response.headers = CaseInsensitiveDict({
+            'Content-Type': entry['content_type'],
+            'Content-Length': str(len(body))
+        })
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        response.reason = 'OK' if response.status_code == 200 else ''
+        return response
+
+
+_snapshot_store = None
+_snapshot_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Retourne le magasin de snapshots partagé (mode issu de SNAPSHOT_CONFIG)"""
+    global _snapshot_store
+    if _snapshot_store is None:
+        with _snapshot_store_lock:
+            if _snapshot_store is None:
+                _snapshot_store = SnapshotStore()
+    return _snapshot_store
+
+
+def set_snapshot_mode(mode: str, directory: Optional[str] = None) -> SnapshotStore:
+    """Change le mode (et éventuellement le dossier) du magasin partagé"""
+    global _snapshot_store
+    with _snapshot_store_lock:
+        _snapshot_store = SnapshotStore(directory=directory, mode=mode)
+    return _snapshot_store
@@ -3,31 +3,96 @@
 Utilitaires pour le scraping
 """
 
+import time
 import requests
-import re
 import logging
 from typing import Optional
 
+from config.scraping_config import PAGE_CACHE_CONFIG
+from .http_client import get_http_client
+from .circuit_breaker import CircuitOpenError
+from .page_cache import get_page_cache
+from .snapshots import get_snapshot_store
+from .metrics import get_scrape_metrics
+from .retry import get_retry_policy
+from .prices import parse_amount, format_price
+
 logger = logging.getLogger(__name__)
 
-def fetch_page(url: str, timeout: int = 15) -> Optional[requests.Response]:
+class UnchangedResults(list):
+    """
+    Liste vide retournée par un scraper quand la page n'a pas changé
+    depuis le dernier passage : rien à parser ni à enregistrer
+    """
+    unchanged = True
+
+
+def is_unchanged(response) -> bool:
+    """Vrai si `fetch_page` a détecté une page identique à la version en cache"""
+    return bool(getattr(response, 'unchanged', False))
+
+
+def fetch_page(url: str, timeout=None, use_cache: bool = True, store: Optional[str] = None) -> Optional[requests.Response]:
     """
     Récupérer une page web avec gestion d'erreurs
+    (via le client HTTP partagé : connexions réutilisées par hôte)
+    
+    Avec le cache de pages, la requête est conditionnelle : sur un 304 ou un
+    corps identique, la réponse porte `unchanged = True` (voir `is_unchanged`).
+    Une page nouvelle porte `cache_entry`, à passer à `PageCache.commit`
+    une fois ses prix écrits en base.
+    Les erreurs passagères sont retentées selon `get_retry_policy()`.
+    Avec `store`, durée, code HTTP et taille de chaque tentative sont ajoutés
+    aux métriques du magasin.
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'fr-FR,fr;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
+        # Pas de GET conditionnel pendant un enregistrement / rejeu de snapshots
+        snapshot_mode = get_snapshot_store().mode
+        use_cache = use_cache and PAGE_CACHE_CONFIG['enabled'] and snapshot_mode == 'off'
+        cache = get_page_cache() if use_cache else None
+        headers = cache.conditional_headers(url) if cache else {}
+        client = get_http_client()
+        metrics = get_scrape_metrics() if store else None
+        
+        def send(attempt_timeout):
+            started = time.perf_counter()
+            status, size = 'error', 0
+            try:
+                response = client.get(url, timeout=attempt_timeout, headers=headers)
+                status, size = response.status_code, len(response.content or b'')
+                return response
+            except CircuitOpenError:
+                # Aucune requête envoyée : l'état du disjoncteur a ses propres compteurs
+                status = None
+                raise
+            except requests.exceptions.Timeout:
+                status = 'timeout'
+                raise
+            finally:
+                if metrics and status is not None:
+                    metrics.record_request(store, time.perf_counter() - started, status, size)
+        
+        if snapshot_mode == 'replay':
+            # Une nouvelle tentative rejouerait la même page enregistrée
+            response = send(timeout)
+        else:
+            response = get_retry_policy().call(
+                send, timeout or client.timeout, label=url,
+                on_retry=(lambda: metrics.record_retry(store)) if metrics else None
+            )
+        
+        if cache and response.status_code == 304:
+            cache.record_not_modified(url)
+            response.unchanged = True
+            return response
         
-        response = requests.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
+        response.unchanged, response.cache_entry = cache.check(url, response) if cache else (False, None)
         return response
         
+    except CircuitOpenError as e:
+        logger.info(f"{e}, requête ignorée: {url}")
+        return None
     except requests.exceptions.Timeout:
         logger.warning(f"Timeout pour l'URL: {url}")
         return None
@@ -40,19 +105,9 @@ def fetch_page(url: str, timeout: int = 15) -> Optional[requests.Response]:
 
 def clean_price(price_text: str) -> str:
     """
-    Nettoyer et formater le texte de prix
+    Nettoyer et formater le texte de prix (« 12500 FCFA », voir `prices.parse_amount`)
     """
-    if not price_text:
+    amount = parse_amount(price_text)
+    if amount is None:
         return "Prix non disponible"
-    
-    # Supprimer les espaces et caractères spéciaux
-    cleaned = re.sub(r'[^\d\s,.]', '', price_text.strip())
-    
-    # Formater le prix
-    if cleaned:
-        # Ajouter FCFA si pas déjà présent
-        if 'FCFA' not in price_text.upper():
-            cleaned += ' FCFA'
-        return cleaned
-    
-    return "Prix non disponible"
\ No newline at end of file
+    return format_price(amount)
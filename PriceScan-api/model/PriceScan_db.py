@@ -53,7 +53,7 @@ class ps_products(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     product_uid = db.Column(db.String(128), unique=True, default=lambda: str(uuid.uuid4()))
-    product_name = db.Column(db.String(255), nullable=False)  # nom du produit
+    product_name = db.Column(db.String(255), nullable=False, index=True)  # nom du produit
     product_description = db.Column(db.Text)  # description du produit
     product_brand = db.Column(db.String(128))  # marque du produit
     product_barcode = db.Column(db.String(128))  # code-barres du produit
@@ -69,6 +69,8 @@ class ps_products(db.Model):
 
 class ps_prices(db.Model):
     __tablename__ = "ps_prices"
+    # Dernier prix d'un couple (produit, magasin)
+    __table_args__ = (db.Index("ix_ps_prices_product_store_date", "product_id", "store_id", "price_date"),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     price_uid = db.Column(db.String(128), unique=True, default=lambda: str(uuid.uuid4()))
@@ -77,6 +79,7 @@ class ps_prices(db.Model):
     price_amount = db.Column(db.Float, nullable=False)  # prix du produit
     price_currency = db.Column(db.String(10), default="CFA")  # devise
     price_date = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)  # date du prix
+    price_last_seen = db.Column(db.DateTime)  # dernier relevé à ce montant (prix inchangé depuis price_date)
     price_is_promo = db.Column(db.Boolean(), default=False)  # si c'est un prix promotionnel
     price_promo_end = db.Column(db.DateTime)  # fin de la promotion
     price_source = db.Column(db.String(50), default="manual")  # source: manual, scraper, receipt
@@ -16,7 +16,8 @@ from helpers.auto_scraper import (
     start_auto_scraper, 
     stop_auto_scraper, 
     get_scraper_status, 
-    manual_scrape
+    manual_scrape,
+    live_lookup
 )
 
 logger = logging.getLogger(__name__)
@@ -25,7 +26,7 @@ class ScraperControlAPI(Resource):
     """API de contrôle du scraping automatique"""
     
     @jwt_required()
-    def get(self, route):
+    def get(self, route="status"):
         """Récupère le statut du scraping"""
         try:
             if route == "status":
@@ -42,6 +43,17 @@ class ScraperControlAPI(Resource):
                     "stores": status.get('stores', {})
                 }, 200
             
+            elif route == "lookup":
+                # Recherche en direct : ?q=...&deadline=3 (secondes, résultats partiels au-delà)
+                query = (request.args.get('q') or '').strip()
+                if not query:
+                    return {"response": "error", "message": "Paramètre q requis"}, 400
+                lookup = live_lookup(query, deadline=request.args.get('deadline', type=float))
+                return {
+                    "response": "success",
+                    "lookup": lookup
+                }, 200
+            
             else:
                 return {"response": "error", "message": "Route invalide"}, 400
                 
@@ -50,7 +62,7 @@ class ScraperControlAPI(Resource):
             return {"response": "error", "message": str(e)}, 500
     
     @jwt_required()
-    def post(self, route):
+    def post(self, route=None):
         """Contrôle le scraping automatique"""
         try:
             if route == "start":
@@ -125,7 +137,7 @@ class ScraperControlAPI(Resource):
             return {"response": "error", "message": str(e)}, 500
     
     @jwt_required()
-    def patch(self, route):
+    def patch(self, route=None):
         """Met à jour la configuration du scraping"""
         try:
             if route == "config":
@@ -152,7 +164,7 @@ class ScrapingStatsAPI(Resource):
     """API pour les statistiques de scraping"""
     
     @jwt_required()
-    def get(self, route):
+    def get(self, route="overview"):
         """Récupère les statistiques de scraping"""
         try:
             if route == "overview":
@@ -160,6 +172,7 @@ class ScrapingStatsAPI(Resource):
                 from config.db import db
                 from model.PriceScan_db import ps_prices, ps_products, ps_stores
                 from sqlalchemy import func
+                from helpers.scrapper.page_cache import get_page_cache
                 
                 # Nombre total de prix
                 total_prices = db.session.query(func.count(ps_prices.id)).scalar()
@@ -184,7 +197,8 @@ class ScrapingStatsAPI(Resource):
                         "total_products": total_products,
                         "total_stores": total_stores,
                         "prices_updated_today": prices_today,
-                        "scraping_status": get_scraper_status()
+                        "scraping_status": get_scraper_status(),
+                        "page_cache": get_page_cache().get_stats()
                     }
                 }, 200
             
@@ -213,6 +227,52 @@ class ScrapingStatsAPI(Resource):
                     "recent_prices": recent_data
                 }, 200
             
+            elif route == "cache":
+                # Cache de pages (GET conditionnel) et caches de résultats des recherches à la demande
+                from helpers.scrapper.page_cache import get_page_cache
+                from helpers.scrapper.result_cache import get_result_cache
+                
+                return {
+                    "response": "success",
+                    "page_cache": get_page_cache().get_stats(),
+                    "result_cache": {name: get_result_cache(name).get_stats() for name in ('manual', 'lookup')}
+                }, 200
+            
+            elif route == "metrics":
+                # Latences, codes HTTP, octets, parsing et écritures par magasin ; ?runs=N derniers passages
+                from helpers.scrapper.metrics import get_scrape_metrics
+                
+                return {
+                    "response": "success",
+                    "metrics": get_scrape_metrics().get_stats(runs=request.args.get('runs', 5, type=int))
+                }, 200
+            
+            elif route == "prometheus":
+                # Mêmes compteurs au format texte d'exposition de Prometheus
+                from flask import Response
+                from helpers.scrapper.metrics import get_scrape_metrics, PROMETHEUS_CONTENT_TYPE
+                
+                return Response(get_scrape_metrics().to_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+            
+            elif route == "refresh":
+                # Intervalles adaptatifs et bilan fraîcheur / requêtes
+                from helpers.refresh_policy import get_refresh_planner
+                
+                planner = get_refresh_planner()
+                if planner.planned_at is None:
+                    planner.replan()
+                refresh = planner.get_stats(top=request.args.get('top', 20, type=int))
+                
+                # ?budget=N : bilan simulé pour un autre budget de requêtes par jour
+                budget = request.args.get('budget', type=float)
+                if budget:
+                    refresh['what_if'] = planner.replan(daily_budget=budget, apply=False)
+                
+                return {
+                    "response": "success",
+                    "refresh": refresh
+                }, 200
+            
             else:
                 return {"response": "error", "message": "Route invalide"}, 400
                 